@@ -1,5 +1,5 @@
 from django.contrib import admin
-from . import models
+from . import models, tokens
 
 
 @admin.register(models.School)
@@ -46,3 +46,22 @@ class TeacherAdmin(admin.ModelAdmin):
         return ", ".join([str(classroom) for classroom in teacher.classrooms.all()])
 
     get_classrooms.short_description = "Classrooms"
+
+
+@admin.register(models.ApiToken)
+class ApiTokenAdmin(admin.ModelAdmin):
+    list_display = ["prefix", "name", "user", "created_at", "revoked_at"]
+    list_filter = ["revoked_at"]
+    search_fields = ["name", "user__username"]
+    readonly_fields = ["prefix", "digest", "created_at", "revoked_at"]
+    ordering = ["-created_at"]
+    actions = ["revoke"]
+
+    def has_add_permission(self, request):
+        # Keys are only shown once, by the issue_token command
+        return False
+
+    @admin.action(description="Revoke selected tokens", permissions=["change"])
+    def revoke(self, request, queryset):
+        revoked = tokens.revoke(queryset)
+        self.message_user(request, f"Revoked {revoked} token(s).")
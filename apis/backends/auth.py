@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+
+
+def user_cache_key(user_id):
+    return f"apis:user:{user_id}"
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    ModelBackend keeping the users of sessions in the `API_USER_CACHE` cache,
+    so that session-authenticated requests skip the `auth_user` query.
+    Entries are deleted whenever the user is saved or deleted, see
+    apis.signals.handlers, and otherwise expire after
+    `API_USER_CACHE_SECONDS`.
+    """
+
+    def get_user(self, user_id):
+        alias = getattr(settings, "API_USER_CACHE", None)
+        if alias is None:
+            return super().get_user(user_id)
+        cache = caches[alias]
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, settings.API_USER_CACHE_SECONDS)
+        return user
+
+
+def forget_user(user_id):
+    """Deletes the cached user `user_id`, if users are cached."""
+    alias = getattr(settings, "API_USER_CACHE", None)
+    if alias is not None:
+        caches[alias].delete(user_cache_key(user_id))
@@ -0,0 +1,24 @@
+"""
+SQLite backend for concurrent writers.
+
+Applies the `PRAGMAS` of the database settings to every new connection, so
+that WAL journaling and the busy timeout are on before the first query, and
+opens write transactions with `BEGIN IMMEDIATE`. A deferred `BEGIN` only
+takes the write lock on the first write, and a transaction that already read
+cannot wait for it: SQLite fails it at once with `database is locked` instead
+of honoring `busy_timeout`. Taking the lock up front makes concurrent writers
+queue on it.
+"""
+
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.settings_dict.get("PRAGMAS", {}).items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute("BEGIN IMMEDIATE")
@@ -0,0 +1,129 @@
+"""
+Helpers maintaining the denormalized `*_count` columns of School and
+Classroom.
+
+Single-row changes go through the signal handlers in apis.signals.handlers,
+which shift the counters with `F()` expressions. Bulk operations that skip the
+signals, and the `reconcile_counters` command, recount with one set-based
+`UPDATE` per table instead.
+"""
+
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from apis import versioning
+from apis.models import School, Classroom, Student, Teacher
+
+
+def count_subquery(queryset):
+    """
+    Wraps a queryset already filtered on OuterRef("pk") and reduced with
+    `.values(<grouping field>)` into a correlated COUNT(*) subquery.
+    """
+    return Coalesce(
+        Subquery(queryset.order_by().annotate(count=Count("*")).values("count")),
+        0,
+    )
+
+
+def shift_students(classroom_id, delta):
+    """Adds `delta` students to a classroom and to its school."""
+    Classroom.objects.filter(pk=classroom_id).update(
+        students_count=F("students_count") + delta
+    )
+    School.objects.filter(classrooms=classroom_id).update(
+        students_count=F("students_count") + delta
+    )
+
+
+def add_students(counts_by_classroom):
+    """
+    Applies `{classroom_id: added students}` from a bulk insert to the
+    classrooms and their schools, one UPDATE per classroom and per school.
+    """
+    counts_by_school = {}
+    classroom_schools = Classroom.objects.filter(
+        pk__in=counts_by_classroom
+    ).values_list("pk", "school_id")
+    for classroom_id, school_id in classroom_schools:
+        delta = counts_by_classroom[classroom_id]
+        Classroom.objects.filter(pk=classroom_id).update(
+            students_count=F("students_count") + delta
+        )
+        counts_by_school[school_id] = counts_by_school.get(school_id, 0) + delta
+    for school_id, delta in counts_by_school.items():
+        shift_school(school_id, students_count=delta)
+
+
+def shift_school(school_id, **deltas):
+    """Adds each `<name>_count=delta` keyword to the matching school counter."""
+    School.objects.filter(pk=school_id).update(
+        **{name: F(name) + delta for name, delta in deltas.items()}
+    )
+
+
+def recount_classrooms(classroom_ids=None):
+    """
+    Recomputes the counters of the given classrooms, or of every classroom
+    when `classroom_ids` is None. Returns the number of classrooms updated.
+    """
+    classrooms = Classroom.objects.all()
+    if classroom_ids is not None:
+        classrooms = classrooms.filter(pk__in=classroom_ids)
+    return classrooms.update(
+        students_count=count_subquery(
+            Student.objects.filter(classroom=OuterRef("pk")).values("classroom")
+        ),
+        teachers_count=count_subquery(
+            Teacher.classrooms.through.objects.filter(
+                classroom=OuterRef("pk")
+            ).values("classroom")
+        ),
+    )
+
+
+def recount_schools(school_ids=None):
+    """
+    Recomputes the counters of the given schools, or of every school when
+    `school_ids` is None. Returns the number of schools updated.
+    """
+    schools = School.objects.all()
+    if school_ids is not None:
+        schools = schools.filter(pk__in=school_ids)
+    return schools.update(
+        classrooms_count=count_subquery(
+            Classroom.objects.filter(school=OuterRef("pk")).values("school")
+        ),
+        students_count=count_subquery(
+            Student.objects.filter(classroom__school=OuterRef("pk")).values(
+                "classroom__school"
+            )
+        ),
+        teachers_count=count_subquery(
+            Teacher.objects.filter(school=OuterRef("pk")).values("school")
+        ),
+    )
+
+
+def reconcile(school_ids=None):
+    """
+    Recounts the given schools and their classrooms, or everything when
+    `school_ids` is None, in one transaction. Returns the number of schools
+    and of classrooms updated.
+    """
+    classroom_ids = None
+    if school_ids is not None:
+        classroom_ids = Classroom.objects.filter(school__in=school_ids).values(
+            "pk"
+        )
+    with transaction.atomic():
+        classrooms = recount_classrooms(classroom_ids)
+        schools = recount_schools(school_ids)
+        versioning.bump(School, Classroom)
+    return schools, classrooms
+
+
+def reconcile_job(job, school_ids=None):
+    """Handler of the "reconcile_counters" job."""
+    schools, classrooms = reconcile(school_ids)
+    return {"schools": schools, "classrooms": classrooms}
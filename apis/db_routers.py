@@ -0,0 +1,35 @@
+"""
+Read/write splitting between the `default` database and its `replica` copy,
+refreshed by the `sync_replica` command.
+
+ReplicaMiddleware marks the GET and HEAD requests of the v1 viewsets as
+replica reads, and ReplicaRouter sends their reads there. Any write pins the
+rest of the request to `default`, and the middleware sets a cookie pinning
+the client's next requests too, until the replica has caught up.
+"""
+
+from contextvars import ContextVar
+
+REPLICA = "replica"
+
+# Alias reads of the current request go to, None for the default routing
+read_alias = ContextVar("read_alias", default=None)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        # Read your own writes for the rest of the request
+        read_alias.set(None)
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica is a copy of default, never migrated on its own
+        if db == REPLICA:
+            return False
+        return None
@@ -0,0 +1,88 @@
+"""
+Set-based deletion of a school and everything under it, see
+SchoolViewSet.destroy.
+
+`Model.delete()` collects the whole cascade into memory to run the delete
+signals, then deletes it in one transaction holding the SQLite write lock
+throughout. Here each table loses the school's rows through `DELETE ...
+WHERE id IN (SELECT ... LIMIT n)` statements, in dependency order and one
+transaction per chunk, so memory stays flat and other writers get the lock
+between chunks.
+
+The delete signals are skipped. Counters only concern rows that go away with
+the school, and the versions are bumped with each chunk.
+"""
+
+from django.db import connection, transaction
+from django.db.models import Q
+from apis import jobs, versioning
+from apis.models import School, Classroom, Student, Teacher
+
+# Rows deleted per transaction
+CHUNK_SIZE = 5_000
+
+
+def delete_school(school_id, chunk_size=CHUNK_SIZE, progress=None):
+    """
+    Deletes the school `school_id` with its classrooms, students, teachers
+    and teacher/classroom links. `progress` is called with the number of
+    schools, classrooms, teachers and students deleted so far. Returns the
+    number of rows deleted per table.
+    """
+    through = Teacher.classrooms.through
+    steps = [
+        (
+            "links",
+            through.objects.filter(
+                Q(classroom__school=school_id) | Q(teacher__school=school_id)
+            ),
+            (Teacher, Classroom),
+        ),
+        ("students", Student.objects.filter(classroom__school=school_id), (Student,)),
+        ("classrooms", Classroom.objects.filter(school=school_id), (Classroom,)),
+        ("teachers", Teacher.objects.filter(school=school_id), (Teacher,)),
+        ("schools", School.objects.filter(pk=school_id), (School,)),
+    ]
+    deleted = {}
+    done = 0
+    for name, queryset, models in steps:
+        deleted[name] = 0
+        for rows in delete_in_chunks(queryset, chunk_size, models):
+            deleted[name] += rows
+            if name != "links":
+                done += rows
+                if progress is not None:
+                    progress(done)
+    return deleted
+
+
+def delete_in_chunks(queryset, chunk_size, models):
+    """
+    Deletes the rows of `queryset` `chunk_size` at a time, each chunk in its
+    own transaction bumping the versions of `models`. Yields the number of
+    rows of each chunk.
+    """
+    model = queryset.model
+    quote_name = connection.ops.quote_name
+    subquery, params = (
+        queryset.order_by().values("pk")[:chunk_size].query.sql_with_params()
+    )
+    sql = (
+        f"DELETE FROM {quote_name(model._meta.db_table)} "
+        f"WHERE {quote_name(model._meta.pk.column)} IN ({subquery})"
+    )
+    while True:
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(sql, params)
+                rows = cursor.rowcount
+            if rows:
+                versioning.bump(*models)
+        yield rows
+        if rows < chunk_size:
+            return
+
+
+def delete_school_job(job, school_id):
+    """Handler of the "delete_school" job."""
+    return delete_school(school_id, progress=lambda done: jobs.report(job, done))
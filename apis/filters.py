@@ -1,8 +1,37 @@
+from django.db.models import Value
+from django.db.models.functions import Lower
+from django.db.models.lookups import Exact
 from django_filters import FilterSet, filters
+from django_filters.constants import EMPTY_VALUES
 from .models import School, Classroom, Student, Teacher
 
 
-class SchoolFilter(FilterSet):
+class LowerExactFilter(filters.CharFilter):
+    """
+    `iexact` as `LOWER(field) = LOWER(value)`, which the `Lower()` indexes of
+    apis.models serve. Django compiles `iexact` to `LIKE` on SQLite and to
+    `UPPER()` on PostgreSQL, neither of which can use them.
+    """
+
+    def filter(self, qs, value):
+        if value in EMPTY_VALUES:
+            return qs
+        if self.distinct:
+            qs = qs.distinct()
+        return self.get_method(qs)(Exact(Lower(self.field_name), Lower(Value(value))))
+
+
+class BaseFilterSet(FilterSet):
+    """Declares the `iexact` filters of `Meta.fields` as LowerExactFilter."""
+
+    @classmethod
+    def filter_for_lookup(cls, field, lookup_type):
+        if lookup_type == "iexact":
+            return LowerExactFilter, {}
+        return super().filter_for_lookup(field, lookup_type)
+
+
+class SchoolFilter(BaseFilterSet):
     class Meta:
         model = School
         fields = {
@@ -10,7 +39,7 @@ class SchoolFilter(FilterSet):
         }
 
 
-class ClassroomFilter(FilterSet):
+class ClassroomFilter(BaseFilterSet):
     class Meta:
         model = Classroom
         fields = {
@@ -18,10 +47,12 @@ class ClassroomFilter(FilterSet):
         }
 
 
-class StudentFilter(FilterSet):
-    school = filters.ChoiceFilter(
+class StudentFilter(BaseFilterSet):
+    # Validated with a single primary key lookup when the filter is used,
+    # nothing is queried at import time
+    school = filters.ModelChoiceFilter(
         field_name="classroom__school",
-        choices=School.objects.values_list("id", "name"),
+        queryset=School.objects.all(),
     )
 
     class Meta:
@@ -34,7 +65,7 @@ class StudentFilter(FilterSet):
         }
 
 
-class TeacherFilter(FilterSet):
+class TeacherFilter(BaseFilterSet):
     class Meta:
         model = Teacher
         fields = {
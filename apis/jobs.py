@@ -0,0 +1,219 @@
+"""
+Background jobs, for operations too slow for a request.
+
+A job is a row of apis.models.Job naming a handler of HANDLERS and its
+keyword arguments. Handlers receive the job, report their progress with
+`report` and return a JSON-serializable result. Clients poll the job at
+/api/v1/jobs/<id>/.
+
+With `API_JOB_THREADS`, `enqueue` runs the job in a thread of the current
+process once the transaction commits. Otherwise the job waits for the
+workers of `manage.py run_workers`, see apis.workers.
+
+A worker `claim`s a job with a conditional UPDATE, which leases it for
+`API_JOB_LEASE_SECONDS`, and `renew`s the lease while the job runs. Jobs
+whose lease expired, because their worker died, are claimed again. A failed
+attempt is retried after a backoff until `max_attempts`, so handlers must be
+safe to run again after a partial run.
+"""
+
+import logging
+import os
+import socket
+import threading
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from apis.models import JOB_FAILED, JOB_QUEUED, JOB_RUNNING, JOB_SUCCEEDED, Job
+
+logger = logging.getLogger(__name__)
+
+# Dotted paths of the handlers of each job kind
+HANDLERS = {
+    "delete_school": "apis.deletion.delete_school_job",
+    "import_roster": "apis.roster.import_roster_job",
+    "reconcile_counters": "apis.counters.reconcile_job",
+}
+
+# Jobs looked at per claim, in case other workers take the first ones
+CLAIM_CANDIDATES = 10
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def enqueue(kind, payload, total=None, start=None):
+    """
+    Creates a job. Unless `start` is False, or None with `API_JOB_THREADS`
+    off, it is run in a thread when the current transaction commits.
+    """
+    if kind not in HANDLERS:
+        raise ValueError(f"Unknown job kind {kind!r}.")
+    job = Job.objects.create(kind=kind, payload=payload, total=total)
+    if start is None:
+        start = settings.API_JOB_THREADS
+    if start:
+        transaction.on_commit(lambda: start_thread(job.pk))
+    return job
+
+
+def find_pending(kind, **payload):
+    """Returns the queued or running job of `kind` with `payload`, if any."""
+    lookups = {f"payload__{key}": value for key, value in payload.items()}
+    return (
+        Job.objects.filter(kind=kind, status__in=[JOB_QUEUED, JOB_RUNNING], **lookups)
+        .order_by("pk")
+        .first()
+    )
+
+
+def start_thread(job_id):
+    def target():
+        try:
+            run(job_id)
+        finally:
+            connections.close_all()
+
+    threading.Thread(target=target, name=f"job-{job_id}", daemon=True).start()
+
+
+def run(job_id, worker=None):
+    """
+    Claims and runs the job `job_id` in this thread. Returns False when the
+    job was not ready, e.g. already claimed by a worker.
+    """
+    worker = worker or f"{worker_name()}:{threading.get_ident()}"
+    job = claim(worker, job_id)
+    if job is None:
+        return False
+    with heartbeat(worker, job.pk):
+        execute(job, worker)
+    return True
+
+
+@contextmanager
+def heartbeat(worker, job_id):
+    """Renews the lease of `worker` on `job_id` from a thread meanwhile."""
+    stopped = threading.Event()
+
+    def target():
+        try:
+            while not stopped.wait(settings.API_JOB_LEASE_SECONDS / 3):
+                renew(worker, [job_id])
+        finally:
+            connections.close_all()
+
+    thread = threading.Thread(target=target, name=f"job-{job_id}-heartbeat")
+    thread.start()
+    try:
+        yield
+    finally:
+        stopped.set()
+        thread.join()
+
+
+def claim(worker, job_id=None):
+    """
+    Leases the next ready job to `worker` and returns it, or None when no
+    job is ready. Ready jobs are queued ones due to run and running ones
+    whose lease expired, the latter failing when it was their last attempt.
+    """
+    now = timezone.now()
+    ready = Q(status=JOB_QUEUED, run_after__lte=now) | Q(
+        status=JOB_RUNNING, lease_expires_at__lt=now
+    )
+    candidates = Job.objects.filter(ready).order_by("run_after", "pk")
+    if job_id is not None:
+        candidates = candidates.filter(pk=job_id)
+    for job in candidates[:CLAIM_CANDIDATES]:
+        # Matches only while no other worker claimed the job meanwhile
+        unchanged = Job.objects.filter(
+            pk=job.pk, status=job.status, attempts=job.attempts
+        )
+        if job.status == JOB_RUNNING and job.attempts >= job.max_attempts:
+            unchanged.update(
+                status=JOB_FAILED,
+                error=f"Lease of {job.leased_by} expired.",
+                leased_by="",
+                lease_expires_at=None,
+                finished_at=now,
+            )
+            continue
+        claimed = unchanged.update(
+            status=JOB_RUNNING,
+            attempts=F("attempts") + 1,
+            leased_by=worker,
+            lease_expires_at=now + timedelta(seconds=settings.API_JOB_LEASE_SECONDS),
+            started_at=now,
+        )
+        if claimed:
+            job.refresh_from_db()
+            return job
+    return None
+
+
+def leased(job, worker):
+    """The job as long as the current attempt of `worker` holds it."""
+    return Job.objects.filter(
+        pk=job.pk, status=JOB_RUNNING, leased_by=worker, attempts=job.attempts
+    )
+
+
+def renew(worker, job_ids):
+    """Extends the leases `worker` holds on `job_ids`."""
+    return Job.objects.filter(
+        pk__in=job_ids, status=JOB_RUNNING, leased_by=worker
+    ).update(
+        lease_expires_at=timezone.now()
+        + timedelta(seconds=settings.API_JOB_LEASE_SECONDS)
+    )
+
+
+def execute(job, worker):
+    """Runs the handler of a claimed job and records the outcome."""
+    try:
+        result = import_string(HANDLERS[job.kind])(job, **job.payload)
+    except Exception as error:
+        logger.exception("Job %s failed", job)
+        fail(job, worker, f"{type(error).__name__}: {error}")
+    else:
+        leased(job, worker).update(
+            status=JOB_SUCCEEDED,
+            result=result,
+            error="",
+            leased_by="",
+            lease_expires_at=None,
+            finished_at=timezone.now(),
+        )
+
+
+def fail(job, worker, error):
+    """
+    Records a failed attempt of a claimed job: queued again after a backoff,
+    or failed after its last attempt.
+    """
+    now = timezone.now()
+    fields = {"error": error, "leased_by": "", "lease_expires_at": None}
+    if job.attempts < job.max_attempts:
+        backoff = settings.API_JOB_RETRY_BACKOFF * 2 ** (job.attempts - 1)
+        fields.update(
+            status=JOB_QUEUED, progress=0, run_after=now + timedelta(seconds=backoff)
+        )
+    else:
+        fields.update(status=JOB_FAILED, finished_at=now)
+    return leased(job, worker).update(**fields)
+
+
+def report(job, progress, total=None):
+    """Records the progress of a running job."""
+    job.progress = progress
+    fields = {"progress": progress}
+    if total is not None:
+        job.total = fields["total"] = total
+    Job.objects.filter(pk=job.pk).update(**fields)
@@ -0,0 +1,88 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from apis import jobs, roster
+
+
+class Command(BaseCommand):
+    help = (
+        "Imports a roster CSV, creating or updating students and teachers by "
+        "full name. See apis/roster.py for the columns."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV file to import.")
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report the errors of every row without writing anything.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=5_000,
+            help="Rows upserted per transaction.",
+        )
+        parser.add_argument(
+            "--background",
+            action="store_true",
+            help="Queue a job for `run_workers` instead of importing now.",
+        )
+
+    def handle(
+        self,
+        *args,
+        path,
+        dry_run=False,
+        chunk_size=5_000,
+        background=False,
+        **options,
+    ):
+        if background:
+            if not os.path.isfile(path):
+                raise CommandError(f"No file {path!r}.")
+            payload = {
+                "path": os.path.abspath(path),
+                "chunk_size": chunk_size,
+                "dry_run": dry_run,
+            }
+            job = jobs.enqueue("import_roster", payload, start=False)
+            self.stdout.write(self.style.SUCCESS(f"Queued job {job.pk}."))
+            return
+
+        start = time.perf_counter()
+
+        def on_error(line, message):
+            self.stderr.write(f"line {line}: {message}")
+
+        def on_progress(result):
+            seconds = time.perf_counter() - start
+            self.stdout.write(
+                f"{result.rows} row(s), {result.errors} error(s) "
+                f"({result.rows / seconds:.0f} rows/s)"
+            )
+
+        try:
+            with open(path, newline="", encoding="utf-8-sig") as file:
+                result = roster.import_roster(
+                    file,
+                    chunk_size=chunk_size,
+                    dry_run=dry_run,
+                    on_error=on_error,
+                    on_progress=on_progress,
+                )
+        except (OSError, roster.RosterError) as error:
+            raise CommandError(error)
+
+        seconds = time.perf_counter() - start
+        summary = (
+            f"{result.rows} row(s): {result.students} student(s) and "
+            f"{result.teachers} teacher(s) {'valid' if dry_run else 'imported'}, "
+            f"{result.errors} error(s) in {seconds:.1f}s "
+            f"({result.rows / seconds:.0f} rows/s)."
+        )
+        if dry_run:
+            summary = f"Dry run, nothing written. {summary}"
+        style = self.style.WARNING if result.errors else self.style.SUCCESS
+        self.stdout.write(style(summary))
@@ -0,0 +1,28 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from apis import tokens
+
+
+class Command(BaseCommand):
+    help = (
+        "Issues an API token for a user. The token is printed once and only "
+        "its digest is stored."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("username")
+        parser.add_argument(
+            "--name", default="", help="What the token is for, e.g. the client."
+        )
+
+    def handle(self, *args, username, name="", **options):
+        User = get_user_model()
+        try:
+            user = User.objects.get(**{User.USERNAME_FIELD: username})
+        except User.DoesNotExist:
+            raise CommandError(f"No user {username!r}.")
+        token, key = tokens.issue(user, name)
+        self.stdout.write(
+            self.style.SUCCESS(f"Issued token {token.pk} for {username}:")
+        )
+        self.stdout.write(key)
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from apis import counters, jobs
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes the denormalized students/teachers/classrooms counters of "
+        "schools and classrooms with set-based updates."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--school",
+            type=int,
+            action="append",
+            dest="school_ids",
+            help="Only reconcile this school and its classrooms (repeatable).",
+        )
+        parser.add_argument(
+            "--background",
+            action="store_true",
+            help="Queue a job for `run_workers` instead of reconciling now.",
+        )
+
+    def handle(self, *args, school_ids=None, background=False, **options):
+        if background:
+            job = jobs.enqueue(
+                "reconcile_counters", {"school_ids": school_ids}, start=False
+            )
+            self.stdout.write(self.style.SUCCESS(f"Queued job {job.pk}."))
+            return
+        schools, classrooms = counters.reconcile(school_ids)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Reconciled {schools} school(s) and {classrooms} classroom(s)."
+            )
+        )
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+from apis import response_cache
+
+
+class Command(BaseCommand):
+    help = "Prints the hit/miss counters of the API response cache."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--reset",
+            action="store_true",
+            help="Reset the counters after printing them.",
+        )
+
+    def handle(self, *args, reset=False, **options):
+        cache = response_cache.get_cache()
+        if cache is None:
+            raise CommandError("The response cache is disabled (API_RESPONSE_CACHE).")
+        stats = response_cache.get_stats(cache)
+        total = stats["hits"] + stats["misses"]
+        ratio = stats["hits"] / total if total else 0
+        self.stdout.write(
+            f"hits={stats['hits']} misses={stats['misses']} hit_ratio={ratio:.2%}"
+        )
+        if reset:
+            response_cache.reset_stats(cache)
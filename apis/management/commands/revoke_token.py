@@ -0,0 +1,31 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from apis import tokens
+from apis.models import ApiToken
+
+
+class Command(BaseCommand):
+    help = (
+        "Revokes API tokens by id, or all the tokens of a user. Other server "
+        "processes stop accepting them within API_TOKEN_CACHE_SECONDS."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("ids", nargs="*", type=int, help="Tokens to revoke.")
+        parser.add_argument("--user", help="Revoke every token of this user.")
+
+    def handle(self, *args, ids=(), user=None, **options):
+        if not ids and user is None:
+            raise CommandError("Give token ids or --user.")
+        queryset = ApiToken.objects.none()
+        if ids:
+            queryset = ApiToken.objects.filter(pk__in=ids)
+        if user is not None:
+            User = get_user_model()
+            if not User.objects.filter(**{User.USERNAME_FIELD: user}).exists():
+                raise CommandError(f"No user {user!r}.")
+            queryset |= ApiToken.objects.filter(
+                **{f"user__{User.USERNAME_FIELD}": user}
+            )
+        revoked = tokens.revoke(queryset)
+        self.stdout.write(self.style.SUCCESS(f"Revoked {revoked} token(s)."))
@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from apis import workers
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs the background jobs of the API in a pool of worker processes "
+        "until interrupted. See apis/jobs.py and apis/workers.py."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=None,
+            help="Jobs run at the same time (default: API_JOB_PROCESSES).",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.0,
+            help="Seconds between two looks for ready jobs.",
+        )
+        parser.add_argument(
+            "--burst",
+            action="store_true",
+            help="Exit once no job is running nor ready.",
+        )
+
+    def handle(self, *args, processes=None, poll_interval=1.0, burst=False, **options):
+        processes = processes or settings.API_JOB_PROCESSES
+        if processes < 1:
+            raise CommandError("At least one process is needed.")
+        workers.run_workers(processes, poll_interval, burst, log=self.stdout.write)
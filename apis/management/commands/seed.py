@@ -0,0 +1,62 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from apis import seeding
+
+
+class Command(BaseCommand):
+    help = (
+        "Inserts deterministic synthetic schools, classrooms, teachers and "
+        "students for load tests."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--schools", type=int, default=100)
+        parser.add_argument(
+            "--classrooms", type=int, default=12, help="Classrooms per school."
+        )
+        parser.add_argument(
+            "--teachers", type=int, default=10, help="Teachers per school."
+        )
+        parser.add_argument(
+            "--students", type=int, default=30, help="Students per classroom."
+        )
+        parser.add_argument(
+            "--classrooms-per-teacher",
+            type=int,
+            default=2,
+            help="Classrooms of their school each teacher teaches.",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="Random seed, the same seed generates the same rows.",
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+
+        def progress(students):
+            self.stdout.write(f"{students} students inserted")
+
+        try:
+            inserted = seeding.seed(
+                options["schools"],
+                classrooms=options["classrooms"],
+                teachers=options["teachers"],
+                students=options["students"],
+                classrooms_per_teacher=options["classrooms_per_teacher"],
+                seed=options["seed"],
+                progress=progress,
+            )
+        except ValueError as error:
+            raise CommandError(error)
+        seconds = time.perf_counter() - start
+        rows = sum(inserted.values())
+        self.stdout.write(
+            self.style.SUCCESS(
+                ", ".join(f"{count} {name}" for name, count in inserted.items())
+                + f" inserted in {seconds:.1f}s ({rows / seconds:.0f} rows/s)."
+            )
+        )
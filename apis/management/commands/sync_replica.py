@@ -0,0 +1,81 @@
+import os
+import sqlite3
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from apis.db_routers import REPLICA
+
+
+def sync(source, target):
+    """
+    Copies the SQLite database `source` to `target` with `VACUUM INTO`.
+
+    The copy is one read transaction, which WAL writers do not block and
+    which, unlike the backup API, does not restart when they commit. It is
+    written to a temporary file in the rollback journal mode, then renamed
+    over `target`, so readers only ever see a complete copy. Any `-wal` and
+    `-shm` files left next to `target` belong to the replaced file and are
+    deleted.
+
+    Connections already open on `target` keep reading the replaced file, so
+    the replica must not be given a `CONN_MAX_AGE`: its connections are
+    then reopened by every request.
+    """
+    partial = f"{target}.partial"
+    remove(partial, f"{partial}-journal")
+    source_connection = sqlite3.connect(source)
+    try:
+        source_connection.execute("VACUUM INTO ?", (partial,))
+    finally:
+        source_connection.close()
+    partial_connection = sqlite3.connect(partial)
+    try:
+        partial_connection.execute("PRAGMA journal_mode = DELETE")
+    finally:
+        partial_connection.close()
+    os.replace(partial, target)
+    remove(f"{target}-wal", f"{target}-shm")
+
+
+def remove(*paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Refreshes the read replica database from the default one with "
+        "VACUUM INTO, once or every --interval seconds."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=0,
+            help="Seconds between refreshes, run once when 0 (default).",
+        )
+
+    def handle(self, *args, interval=0, **options):
+        if REPLICA not in connections.settings:
+            raise CommandError(f"No '{REPLICA}' database is configured.")
+        source = str(connections[DEFAULT_DB_ALIAS].settings_dict["NAME"])
+        target = str(connections[REPLICA].settings_dict["NAME"])
+        if source == target:
+            raise CommandError(f"'{REPLICA}' is the default database itself.")
+        if connections[REPLICA].settings_dict["CONN_MAX_AGE"]:
+            raise CommandError(
+                f"'{REPLICA}' has a CONN_MAX_AGE, its connections would keep "
+                "reading the replaced copies."
+            )
+
+        while True:
+            start = time.monotonic()
+            sync(source, target)
+            self.stdout.write(f"Synced {target} in {time.monotonic() - start:.2f}s.")
+            if not interval:
+                return
+            time.sleep(interval)
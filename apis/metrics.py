@@ -0,0 +1,228 @@
+"""
+Per-route request metrics, rendered in the Prometheus text format by
+apis.views.metrics.
+
+MetricsMiddleware observes every request into the process-local `registry`:
+latency histogram, SQL query count and time, and response size, labeled by
+the resolved view name and the method. The registry only adds numbers under
+a lock, so observing never blocks a request or the event loop on I/O. A
+background thread adds them every `API_METRICS_FLUSH_SECONDS` to the SQLite
+file named by `API_METRICS_FILE`, with one UPSERT per series, so that the
+endpoint reports the sum over all the worker processes of a server. What is
+left is flushed when the process exits.
+"""
+
+import atexit
+import os
+import sqlite3
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+
+# Upper bounds of the latency histogram buckets, in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Route label of the requests matching no URL pattern
+UNRESOLVED = "<unresolved>"
+
+COUNTERS = (
+    ("queries", "api_request_queries_total", "SQL queries run."),
+    ("sql_seconds", "api_request_sql_seconds_total", "Time spent in SQL."),
+    ("response_bytes", "api_response_bytes_total", "Response body bytes."),
+)
+
+# Names of the values of a Registry series, as stored in the file
+SERIES = tuple(f"le:{bound}" for bound in BUCKETS) + (
+    "count",
+    "duration_seconds",
+    "queries",
+    "sql_seconds",
+    "response_bytes",
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS samples (
+    route TEXT NOT NULL,
+    method TEXT NOT NULL,
+    name TEXT NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (route, method, name)
+) WITHOUT ROWID
+"""
+
+UPSERT = """
+INSERT INTO samples (route, method, name, value) VALUES (?, ?, ?, ?)
+ON CONFLICT (route, method, name) DO UPDATE SET value = value + excluded.value
+"""
+
+
+class QueryCounter:
+    """`execute_wrapper` counting the queries of a request and their time."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - start
+            self.count += 1
+
+
+class Registry:
+    """
+    Series of this process not flushed yet, as `{(route, method): [bucket
+    counts..., count, duration sum, queries, SQL seconds, response bytes]}`.
+    """
+
+    # Positions in a series after the bucket counts
+    COUNT, DURATION, QUERIES, SQL_SECONDS, RESPONSE_BYTES = range(
+        len(BUCKETS), len(BUCKETS) + 5
+    )
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Starts over with nothing pending, no connection and no flusher."""
+        self.pending = {}
+        self.pid = os.getpid()
+        # Serializes the use of the connection, which `lock` never waits for
+        self.conn_lock = threading.Lock()
+        self.conn = None
+        self.flusher = None
+
+    def observe(self, route, method, seconds, queries, sql_seconds, size):
+        with self.lock:
+            if self.pid != os.getpid():
+                # Forked: the parent flushes what it had, and its connection
+                # and flusher thread are not ours
+                self.reset()
+            if self.flusher is None:
+                self.flusher = threading.Thread(
+                    target=self.flush_periodically, name="metrics-flusher", daemon=True
+                )
+                self.flusher.start()
+            series = self.pending.get((route, method))
+            if series is None:
+                series = self.pending[route, method] = [0] * len(SERIES)
+            index = bisect_left(BUCKETS, seconds)
+            if index < len(BUCKETS):
+                series[index] += 1
+            series[self.COUNT] += 1
+            series[self.DURATION] += seconds
+            series[self.QUERIES] += queries
+            series[self.SQL_SECONDS] += sql_seconds
+            series[self.RESPONSE_BYTES] += size
+
+    def flush_periodically(self):
+        while True:
+            time.sleep(settings.API_METRICS_FLUSH_SECONDS)
+            if is_enabled():
+                self.flush()
+
+    def flush(self):
+        """Adds the pending series to the metrics file and clears them."""
+        with self.lock:
+            pending, self.pending = self.pending, {}
+        if not pending:
+            return
+        rows = []
+        for (route, method), series in pending.items():
+            rows.extend(
+                (route, method, name, value)
+                for name, value in zip(SERIES, series)
+                if value
+            )
+        with self.conn_lock:
+            with self.get_connection() as conn:
+                conn.executemany(UPSERT, rows)
+
+    def collect(self):
+        """Flushes, then returns `{(route, method): {name: value}}` of all processes."""
+        self.flush()
+        samples = {}
+        with self.conn_lock:
+            for route, method, name, value in self.get_connection().execute(
+                "SELECT route, method, name, value FROM samples ORDER BY route, method"
+            ):
+                samples.setdefault((route, method), {})[name] = value
+        return samples
+
+    def get_connection(self):
+        """The connection of this process to the metrics file, kept open."""
+        if self.conn is None:
+            self.conn = connect()
+        return self.conn
+
+
+registry = Registry()
+atexit.register(registry.flush)
+
+
+def connect():
+    # Used by the flusher thread and by the threads collecting for /metrics
+    conn = sqlite3.connect(
+        settings.API_METRICS_FILE, timeout=5, check_same_thread=False
+    )
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute(SCHEMA)
+    return conn
+
+
+def is_enabled():
+    return bool(getattr(settings, "API_METRICS_FILE", None))
+
+
+def render(samples, extra=()):
+    """
+    Renders `Registry.collect()` output in the Prometheus text format, with
+    `extra` `(name, type, help, value)` unlabeled samples appended.
+    """
+    lines = [
+        "# HELP api_request_duration_seconds Request latency.",
+        "# TYPE api_request_duration_seconds histogram",
+    ]
+    for (route, method), values in samples.items():
+        labels = f'route="{escape(route)}",method="{escape(method)}"'
+        cumulative = 0
+        for bound in BUCKETS:
+            cumulative += values.get(f"le:{bound}", 0)
+            lines.append(
+                f'api_request_duration_seconds_bucket{{{labels},le="{bound}"}} '
+                f"{number(cumulative)}"
+            )
+        count = values.get("count", 0)
+        lines += [
+            f'api_request_duration_seconds_bucket{{{labels},le="+Inf"}} {number(count)}',
+            f"api_request_duration_seconds_sum{{{labels}}} "
+            f"{number(values.get('duration_seconds', 0))}",
+            f"api_request_duration_seconds_count{{{labels}}} {number(count)}",
+        ]
+    for key, name, help_text in COUNTERS:
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+        for (route, method), values in samples.items():
+            labels = f'route="{escape(route)}",method="{escape(method)}"'
+            lines.append(f"{name}{{{labels}}} {number(values.get(key, 0))}")
+    for name, metric_type, help_text, value in extra:
+        lines += [
+            f"# HELP {name} {help_text}",
+            f"# TYPE {name} {metric_type}",
+            f"{name} {number(value)}",
+        ]
+    return "\n".join(lines) + "\n"
+
+
+def number(value):
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -0,0 +1,322 @@
+import random
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections, transaction
+from django.http import JsonResponse
+from django.urls import Resolver404, resolve
+from apis import metrics
+from apis.db_routers import REPLICA, read_alias
+
+READ_METHODS = ("GET", "HEAD")
+
+
+class ReplicaMiddleware:
+    """
+    Sends the reads of GET and HEAD requests to the v1 viewsets to the
+    replica when `API_READ_REPLICA` is on, see apis.db_routers. The reads of
+    a streaming response, e.g. an export, go there until it is consumed.
+
+    A successful write sets the `API_REPLICA_COOKIE` cookie for
+    `API_REPLICA_STICKY_SECONDS`, which should cover the `sync_replica`
+    interval, and requests carrying it read from `default`.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = self.route(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            if token is not None:
+                alias = read_alias.get()
+                read_alias.reset(token)
+        if token is not None and alias is not None and response.streaming:
+            self.stream(response, alias)
+        return self.pin(request, response)
+
+    async def __acall__(self, request):
+        token = self.route(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            if token is not None:
+                alias = read_alias.get()
+                read_alias.reset(token)
+        if token is not None and alias is not None and response.streaming:
+            self.stream(response, alias)
+        return self.pin(request, response)
+
+    def route(self, request):
+        """Marks the request as a replica read, returns the contextvar token."""
+        if (
+            not getattr(settings, "API_READ_REPLICA", False)
+            or REPLICA not in connections.settings
+            or request.method not in READ_METHODS
+            or settings.API_REPLICA_COOKIE in request.COOKIES
+            or not is_v1_view(request.path_info)
+        ):
+            return None
+        return read_alias.set(REPLICA)
+
+    def stream(self, response, alias):
+        """
+        Routes the reads of the streaming content to `alias`, unless the
+        request wrote, only while each chunk is produced.
+        """
+        if response.is_async:
+            response.streaming_content = self.aroute_chunks(
+                response.streaming_content, alias
+            )
+        else:
+            response.streaming_content = self.route_chunks(
+                response.streaming_content, alias
+            )
+
+    def route_chunks(self, content, alias):
+        iterator = iter(content)
+        while True:
+            token = read_alias.set(alias)
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                read_alias.reset(token)
+            yield chunk
+
+    async def aroute_chunks(self, content, alias):
+        iterator = aiter(content)
+        while True:
+            token = read_alias.set(alias)
+            try:
+                chunk = await anext(iterator)
+            except StopAsyncIteration:
+                return
+            finally:
+                read_alias.reset(token)
+            yield chunk
+
+    def pin(self, request, response):
+        if (
+            getattr(settings, "API_READ_REPLICA", False)
+            and request.method not in READ_METHODS
+            and response.status_code < 400
+        ):
+            response.set_cookie(
+                settings.API_REPLICA_COOKIE,
+                "1",
+                max_age=settings.API_REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+
+class MetricsMiddleware:
+    """
+    Observes the latency, SQL queries and response size of every request
+    into apis.metrics when `API_METRICS_FILE` is set. The queries of a
+    streaming response are counted until it is consumed.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not metrics.is_enabled():
+            return self.get_response(request)
+        start = time.perf_counter()
+        counter = metrics.QueryCounter()
+        with count_queries(counter):
+            response = self.get_response(request)
+        return self.observe(request, response, start, counter)
+
+    async def __acall__(self, request):
+        if not metrics.is_enabled():
+            return await self.get_response(request)
+        start = time.perf_counter()
+        counter = metrics.QueryCounter()
+        # The async ORM runs queries in the request's sync thread
+        queries = count_queries(counter)
+        await sync_to_async(queries.__enter__)()
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(queries.__exit__)(None, None, None)
+        return self.observe(request, response, start, counter)
+
+    def observe(self, request, response, start, counter):
+        match = request.resolver_match
+        route = match.view_name if match is not None else metrics.UNRESOLVED
+
+        def done(size):
+            metrics.registry.observe(
+                route,
+                request.method,
+                time.perf_counter() - start,
+                counter.count,
+                counter.seconds,
+                size,
+            )
+
+        if not response.streaming:
+            done(len(response.content))
+        elif response.is_async:
+            response.streaming_content = self.ameasure(response.streaming_content, done)
+        else:
+            response.streaming_content = self.measure(
+                response.streaming_content, done, counter
+            )
+        return response
+
+    def measure(self, content, done, counter):
+        size = 0
+        try:
+            with count_queries(counter):
+                for chunk in content:
+                    size += len(chunk)
+                    yield chunk
+        finally:
+            done(size)
+
+    async def ameasure(self, content, done):
+        size = 0
+        try:
+            async for chunk in content:
+                size += len(chunk)
+                yield chunk
+        finally:
+            done(size)
+
+
+@contextmanager
+def count_queries(counter):
+    """Installs `counter` as an execute wrapper of every database alias."""
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(counter))
+        yield
+
+
+class WriteRetryMiddleware:
+    """
+    Runs each write request in one transaction, rolled back on a server
+    error, and retries it with exponential backoff and jitter when SQLite
+    reports the database as locked. Answers 503 with a `Retry-After` once
+    `API_WRITE_RETRIES` retries are exhausted.
+
+    With the apis.backends.sqlite3 backend the transaction takes the write
+    lock when it starts, so writers queue on it up to `busy_timeout` and a
+    retried request has not written anything yet. Threads of one process
+    queue on `write_lock` first rather than polling SQLite.
+
+    Views marked with `transaction.non_atomic_requests`, which manage their
+    own transactions, run as they are.
+    """
+
+    write_lock = threading.Lock()
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.method in READ_METHODS or request.method == "OPTIONS":
+            return self.get_response(request)
+        if is_non_atomic(request):
+            return self.get_response(request)
+        # Read the body once so that each attempt can parse it again
+        request.body
+        retries = settings.API_WRITE_RETRIES
+        for attempt in range(retries + 1):
+            if attempt:
+                time.sleep(self.get_backoff(attempt))
+            response = self.attempt(request)
+            if response is not None:
+                return response
+        return self.get_busy_response()
+
+    def attempt(self, request):
+        """Returns the response, or None when the database was locked."""
+        request.lock_error = None
+        for name in ("_post", "_files"):
+            request.__dict__.pop(name, None)
+        if not self.write_lock.acquire(timeout=settings.API_WRITE_LOCK_TIMEOUT):
+            return None
+        try:
+            with transaction.atomic():
+                response = self.get_response(request)
+                if request.lock_error is not None or response.status_code >= 500:
+                    transaction.set_rollback(True)
+        except OperationalError as error:
+            # Raised by BEGIN or COMMIT, outside of the view
+            if not is_lock_error(error):
+                raise
+            return None
+        finally:
+            self.write_lock.release()
+        return None if request.lock_error is not None else response
+
+    def process_exception(self, request, exception):
+        if is_lock_error(exception):
+            # Answered here so that it is not logged as a server error
+            request.lock_error = exception
+            return self.get_busy_response()
+
+    def get_busy_response(self):
+        response = JsonResponse(
+            {"detail": "The database is busy, please retry."}, status=503
+        )
+        response["Retry-After"] = "1"
+        return response
+
+    def get_backoff(self, attempt):
+        delay = settings.API_WRITE_BACKOFF * 2 ** (attempt - 1)
+        return delay + random.uniform(0, delay)
+
+
+def is_lock_error(error):
+    return isinstance(error, OperationalError) and "is locked" in str(error)
+
+
+def is_non_atomic(request):
+    """
+    Whether the view of `request`, or the viewset action answering its
+    method, is marked with `transaction.non_atomic_requests`.
+    """
+    try:
+        view = resolve(request.path_info).func
+    except Resolver404:
+        return False
+    actions = getattr(view, "actions", None)
+    if actions is not None and request.method.lower() in actions:
+        view = getattr(view.cls, actions[request.method.lower()])
+    return DEFAULT_DB_ALIAS in getattr(view, "_non_atomic_requests", ())
+
+
+def is_v1_view(path):
+    try:
+        view = resolve(path).func
+    except Resolver404:
+        return False
+    view_class = getattr(view, "cls", None) or getattr(view, "view_class", None)
+    return view_class is not None and view_class.__module__.startswith("apis.views.v1.")
@@ -0,0 +1,17 @@
+# Generated by Django 5.0.4 on 2026-10-18 17:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apis', '0005_unique_school_name_alias'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='classroom',
+            index=models.Index(fields=['grade', 'room', 'id'], name='classroom_ordering'),
+        ),
+    ]
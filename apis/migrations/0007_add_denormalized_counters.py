@@ -0,0 +1,78 @@
+# Generated by Django 5.0.4 on 2026-10-18 17:49
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_subquery(queryset):
+    return Coalesce(
+        Subquery(queryset.order_by().annotate(count=Count("*")).values("count")),
+        0,
+    )
+
+
+def populate_counters(apps, schema_editor):
+    School = apps.get_model("apis", "School")
+    Classroom = apps.get_model("apis", "Classroom")
+    Student = apps.get_model("apis", "Student")
+    Teacher = apps.get_model("apis", "Teacher")
+    Classroom.objects.update(
+        students_count=count_subquery(
+            Student.objects.filter(classroom=OuterRef("pk")).values("classroom")
+        ),
+        teachers_count=count_subquery(
+            Teacher.classrooms.through.objects.filter(
+                classroom=OuterRef("pk")
+            ).values("classroom")
+        ),
+    )
+    School.objects.update(
+        classrooms_count=count_subquery(
+            Classroom.objects.filter(school=OuterRef("pk")).values("school")
+        ),
+        students_count=count_subquery(
+            Student.objects.filter(classroom__school=OuterRef("pk")).values(
+                "classroom__school"
+            )
+        ),
+        teachers_count=count_subquery(
+            Teacher.objects.filter(school=OuterRef("pk")).values("school")
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apis', '0006_add_classroom_ordering_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='classroom',
+            name='students_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='classroom',
+            name='teachers_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='school',
+            name='classrooms_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='school',
+            name='students_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='school',
+            name='teachers_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
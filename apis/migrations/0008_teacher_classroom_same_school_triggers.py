@@ -0,0 +1,93 @@
+from django.db import migrations
+
+# Raised by every trigger below, mapped back to a validation error by
+# apis.serializers.teacher
+MESSAGE = "teacher_classroom_same_school"
+
+CREATE_TRIGGERS = [
+    f"""
+    CREATE TRIGGER teacher_classroom_same_school_insert
+    BEFORE INSERT ON apis_teacher_classrooms
+    FOR EACH ROW
+    WHEN (SELECT school_id FROM apis_teacher WHERE id = NEW.teacher_id)
+        IS NOT (SELECT school_id FROM apis_classroom WHERE id = NEW.classroom_id)
+    BEGIN
+        SELECT RAISE(ABORT, '{MESSAGE}');
+    END
+    """,
+    f"""
+    CREATE TRIGGER teacher_classroom_same_school_update
+    BEFORE UPDATE OF teacher_id, classroom_id ON apis_teacher_classrooms
+    FOR EACH ROW
+    WHEN (SELECT school_id FROM apis_teacher WHERE id = NEW.teacher_id)
+        IS NOT (SELECT school_id FROM apis_classroom WHERE id = NEW.classroom_id)
+    BEGIN
+        SELECT RAISE(ABORT, '{MESSAGE}');
+    END
+    """,
+    f"""
+    CREATE TRIGGER teacher_school_same_school_update
+    BEFORE UPDATE OF school_id ON apis_teacher
+    FOR EACH ROW
+    WHEN NEW.school_id IS NOT OLD.school_id AND EXISTS (
+        SELECT 1 FROM apis_teacher_classrooms
+        INNER JOIN apis_classroom
+            ON apis_classroom.id = apis_teacher_classrooms.classroom_id
+        WHERE apis_teacher_classrooms.teacher_id = NEW.id
+            AND apis_classroom.school_id IS NOT NEW.school_id
+    )
+    BEGIN
+        SELECT RAISE(ABORT, '{MESSAGE}');
+    END
+    """,
+    f"""
+    CREATE TRIGGER classroom_school_same_school_update
+    BEFORE UPDATE OF school_id ON apis_classroom
+    FOR EACH ROW
+    WHEN NEW.school_id IS NOT OLD.school_id AND EXISTS (
+        SELECT 1 FROM apis_teacher_classrooms
+        INNER JOIN apis_teacher
+            ON apis_teacher.id = apis_teacher_classrooms.teacher_id
+        WHERE apis_teacher_classrooms.classroom_id = NEW.id
+            AND apis_teacher.school_id IS NOT NEW.school_id
+    )
+    BEGIN
+        SELECT RAISE(ABORT, '{MESSAGE}');
+    END
+    """,
+]
+
+DROP_TRIGGERS = [
+    "DROP TRIGGER IF EXISTS teacher_classroom_same_school_insert",
+    "DROP TRIGGER IF EXISTS teacher_classroom_same_school_update",
+    "DROP TRIGGER IF EXISTS teacher_school_same_school_update",
+    "DROP TRIGGER IF EXISTS classroom_school_same_school_update",
+]
+
+
+class RunSQLOnSQLite(migrations.RunSQL):
+    """RunSQL doing nothing on other database vendors."""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "sqlite":
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "sqlite":
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+class Migration(migrations.Migration):
+    """
+    Enforces in the database that a teacher's classrooms belong to the
+    teacher's school, so every write path including bulk inserts into the
+    through table is covered. Only SQLite is supported.
+    """
+
+    dependencies = [
+        ("apis", "0007_add_denormalized_counters"),
+    ]
+
+    operations = [
+        RunSQLOnSQLite(sql=CREATE_TRIGGERS, reverse_sql=DROP_TRIGGERS),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.0.4 on 2026-10-18 17:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("apis", "0008_teacher_classroom_same_school_triggers"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TableVersion",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=100, unique=True)),
+                ("version", models.BigIntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.0.4 on 2026-10-18 18:40
+
+import apis.models
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("apis", "0010_add_job"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="job",
+            name="attempts",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="job",
+            name="lease_expires_at",
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.AddField(
+            model_name="job",
+            name="leased_by",
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name="job",
+            name="max_attempts",
+            field=models.PositiveIntegerField(default=apis.models.default_max_attempts),
+        ),
+        migrations.AddField(
+            model_name="job",
+            name="run_after",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddIndex(
+            model_name="job",
+            index=models.Index(fields=["status", "run_after"], name="job_ready"),
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.0.4 on 2026-10-18 18:44
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("apis", "0011_add_job_leases"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="school",
+            index=models.Index(
+                django.db.models.functions.text.Lower("name"), name="school_name_ci"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="student",
+            index=models.Index(
+                django.db.models.functions.text.Lower("first_name"),
+                name="student_first_name_ci",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="student",
+            index=models.Index(
+                django.db.models.functions.text.Lower("last_name"),
+                name="student_last_name_ci",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="student",
+            index=models.Index(
+                models.F("classroom"),
+                django.db.models.functions.text.Lower("last_name"),
+                name="student_classroom_last_ci",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="student",
+            index=models.Index(
+                models.F("classroom"),
+                django.db.models.functions.text.Lower("gender"),
+                name="student_classroom_gender_ci",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="teacher",
+            index=models.Index(
+                django.db.models.functions.text.Lower("first_name"),
+                name="teacher_first_name_ci",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="teacher",
+            index=models.Index(
+                django.db.models.functions.text.Lower("last_name"),
+                name="teacher_last_name_ci",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="teacher",
+            index=models.Index(
+                models.F("school"),
+                django.db.models.functions.text.Lower("gender"),
+                name="teacher_school_gender_ci",
+            ),
+        ),
+    ]
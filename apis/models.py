@@ -1,7 +1,10 @@
+from django.conf import settings
 from django.core.validators import MaxValueValidator, MinValueValidator
 
-from django.db import models
-
+from django.db import models, router, transaction
+from django.db.models import DEFERRED, F
+from django.db.models.functions import Lower
+from django.utils import timezone
 
 GENDER_MALE = "M"
 GENDER_FEMALE = "F"
@@ -14,16 +17,66 @@ GENDER_CHOICES = (
 )
 
 
+class CountedModel(models.Model):
+    """
+    Base for models whose changes maintain the denormalized counters in
+    apis.signals.handlers.
+
+    Saves run in a transaction so the counter updates done by the post_save
+    handlers commit or roll back together with the row, and the values loaded
+    from the database are kept so handlers can tell when a foreign key moved.
+    """
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, **kwargs):
+        using = kwargs.get("using") or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using, savepoint=False):
+            super().save(*args, **kwargs)
+        update_fields = kwargs.get("update_fields")
+        for field in self._meta.concrete_fields:
+            if update_fields is None or field.name in update_fields:
+                self.set_loaded_value(field.attname, getattr(self, field.attname))
+
+    def get_loaded_value(self, attname):
+        """
+        Returns the value of `attname` as last read from or written to the
+        database, or None when it is unknown.
+        """
+        value = getattr(self, "_loaded_values", {}).get(attname)
+        return None if value is DEFERRED else value
+
+    def set_loaded_value(self, attname, value):
+        self.__dict__.setdefault("_loaded_values", {})[attname] = value
+
+
 class School(models.Model):
     name = models.CharField(max_length=100, unique=True)
     alias = models.CharField(max_length=100, unique=True)
     address = models.TextField()
+    # Maintained by apis.signals.handlers, see apis.counters
+    classrooms_count = models.IntegerField(default=0, editable=False)
+    students_count = models.IntegerField(default=0, editable=False)
+    teachers_count = models.IntegerField(default=0, editable=False)
 
     def __str__(self):
         return self.name
 
+    class Meta:
+        indexes = [
+            # Case-insensitive filters, see apis.filters.LowerExactFilter
+            models.Index(Lower("name"), name="school_name_ci"),
+        ]
 
-class Classroom(models.Model):
+
+class Classroom(CountedModel):
     grade = models.IntegerField(
         validators=[MaxValueValidator(12), MinValueValidator(1)]
     )
@@ -33,6 +86,9 @@ class Classroom(models.Model):
     school = models.ForeignKey(
         School, on_delete=models.CASCADE, related_name="classrooms"
     )
+    # Maintained by apis.signals.handlers, see apis.counters
+    students_count = models.IntegerField(default=0, editable=False)
+    teachers_count = models.IntegerField(default=0, editable=False)
 
     def __str__(self):
         return f"{self.grade}/{self.room}"
@@ -44,10 +100,14 @@ class Classroom(models.Model):
                 name="unique_classroom",
             )
         ]
+        indexes = [
+            # Keyset pagination seeks on Meta.ordering + id
+            models.Index(fields=["grade", "room", "id"], name="classroom_ordering"),
+        ]
         ordering = ["grade", "room"]
 
 
-class Teacher(models.Model):
+class Teacher(CountedModel):
     first_name = models.CharField(max_length=100)
     last_name = models.CharField(max_length=100)
     gender = models.CharField(max_length=1, choices=GENDER_CHOICES)
@@ -68,10 +128,18 @@ class Teacher(models.Model):
                 fields=["first_name", "last_name"], name="teacher_full_name"
             )
         ]
+        indexes = [
+            # Case-insensitive filters, see apis.filters.LowerExactFilter
+            models.Index(Lower("first_name"), name="teacher_first_name_ci"),
+            models.Index(Lower("last_name"), name="teacher_last_name_ci"),
+            # Gender within a school. Gender alone walks the full name
+            # constraint in list order, stopping once the page is full.
+            models.Index(F("school"), Lower("gender"), name="teacher_school_gender_ci"),
+        ]
         ordering = ["first_name", "last_name"]
 
 
-class Student(models.Model):
+class Student(CountedModel):
     first_name = models.CharField(max_length=100)
     last_name = models.CharField(max_length=100)
     gender = models.CharField(max_length=1, choices=GENDER_CHOICES)
@@ -88,4 +156,106 @@ class Student(models.Model):
                 fields=["first_name", "last_name"], name="student_full_name"
             ),
         ]
+        indexes = [
+            # Case-insensitive filters, see apis.filters.LowerExactFilter
+            models.Index(Lower("first_name"), name="student_first_name_ci"),
+            models.Index(Lower("last_name"), name="student_last_name_ci"),
+            models.Index(
+                F("classroom"), Lower("last_name"), name="student_classroom_last_ci"
+            ),
+            # Gender within a classroom or, through it, a school. Gender alone
+            # walks the full name constraint in list order.
+            models.Index(
+                F("classroom"), Lower("gender"), name="student_classroom_gender_ci"
+            ),
+        ]
         ordering = ["first_name", "last_name"]
+
+
+class TableVersion(models.Model):
+    """
+    Counter bumped on every change to the rows of a model, see
+    apis.versioning. Read endpoints derive their ETags from it.
+    """
+
+    name = models.CharField(max_length=100, unique=True)
+    version = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name}@{self.version}"
+
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+JOB_STATUS_CHOICES = (
+    (JOB_QUEUED, "Queued"),
+    (JOB_RUNNING, "Running"),
+    (JOB_SUCCEEDED, "Succeeded"),
+    (JOB_FAILED, "Failed"),
+)
+
+
+def default_max_attempts():
+    return settings.API_JOB_MAX_ATTEMPTS
+
+
+class Job(models.Model):
+    """
+    Operation too slow for a request, run in the background by apis.jobs.
+    Clients follow it at /api/v1/jobs/<id>/.
+    """
+
+    # Key of the handler in apis.jobs.HANDLERS
+    kind = models.CharField(max_length=50)
+    # Keyword arguments of the handler
+    payload = models.JSONField(default=dict)
+    status = models.CharField(
+        max_length=10, choices=JOB_STATUS_CHOICES, default=JOB_QUEUED
+    )
+    # Units of work done out of `total`, when the total is known
+    progress = models.PositiveBigIntegerField(default=0)
+    total = models.PositiveBigIntegerField(null=True)
+    result = models.JSONField(null=True)
+    error = models.TextField(blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=default_max_attempts)
+    # Queued jobs are not run before, set by the backoff of retries
+    run_after = models.DateTimeField(default=timezone.now)
+    # Worker running the job, until the lease expires
+    leased_by = models.CharField(max_length=100, blank=True)
+    lease_expires_at = models.DateTimeField(null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True)
+    finished_at = models.DateTimeField(null=True)
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.status})"
+
+    class Meta:
+        indexes = [
+            # Workers look for queued jobs due and running jobs whose lease expired
+            models.Index(fields=["status", "run_after"], name="job_ready"),
+        ]
+
+
+class ApiToken(models.Model):
+    """
+    Credential of an API client, see apis.tokens. Only the SHA-256 digest
+    of the token is stored.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="api_tokens"
+    )
+    name = models.CharField(max_length=100, blank=True)
+    # First characters of the token, to tell the tokens of a user apart
+    prefix = models.CharField(max_length=8)
+    digest = models.CharField(max_length=64, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    revoked_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.prefix}… ({self.name or self.user})"
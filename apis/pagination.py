@@ -0,0 +1,207 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from functools import reduce
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination over the model's `Meta.ordering` plus an `id`
+    tiebreaker.
+
+    The cursor carries the ordering values of the last (or first) row of the
+    current page, and the next page is fetched with a `WHERE` on those values
+    instead of an `OFFSET`, so page N costs the same as page 1 as long as an
+    index covers the ordering.
+    """
+
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.get_page_queryset(queryset, request)
+        return self.set_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """`paginate_queryset` for async views, reading with `async for`."""
+        queryset = self.get_page_queryset(queryset, request)
+        return self.set_page([row async for row in queryset])
+
+    def get_page_queryset(self, queryset, request):
+        """Returns the query fetching the page, plus one row to detect more."""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(queryset)
+        self.fields = [
+            get_field(queryset.model, field.lstrip("-")) for field in self.ordering
+        ]
+
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor["reverse"]
+        if self.cursor is not None:
+            queryset = queryset.filter(self.get_keyset_filter(self.cursor))
+        queryset = queryset.order_by(*self.get_order_by(reverse))
+        return queryset[: self.page_size + 1]
+
+    def set_page(self, results):
+        cursor = self.cursor
+        reverse = cursor is not None and cursor["reverse"]
+        has_more = len(results) > self.page_size
+        results = results[: self.page_size]
+        if reverse:
+            results.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = cursor is not None
+
+        self.first_position = self.get_position(results[0]) if results else None
+        self.last_position = self.get_position(results[-1]) if results else None
+        if not results and cursor is not None:
+            # Stepped past either end, keep a way back to where we came from
+            self.first_position = self.last_position = cursor["position"]
+        return results
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                return _positive_int(
+                    request.query_params[self.page_size_query_param],
+                    strict=True,
+                    cutoff=self.max_page_size,
+                )
+            except (KeyError, ValueError):
+                pass
+        return self.page_size
+
+    def get_ordering(self, queryset):
+        """
+        Returns the ordering of the model with `id` appended, so that every
+        position is unique.
+        """
+        ordering = list(queryset.model._meta.ordering)
+        if not any(field.lstrip("-") in ("id", "pk") for field in ordering):
+            ordering.append("id")
+        return ordering
+
+    def get_order_by(self, reverse):
+        if not reverse:
+            return self.ordering
+        return [
+            field[1:] if field.startswith("-") else f"-{field}"
+            for field in self.ordering
+        ]
+
+    def get_keyset_filter(self, cursor):
+        """
+        Builds `(a, b, c) > (x, y, z)` as
+        `a >= x AND (a > x OR (a = x AND (b > y OR (b = y AND c > z))))`.
+        The leading `a >= x` lets SQLite seek into the ordering index.
+        """
+        conditions = []
+        for field, value in zip(self.ordering, cursor["position"]):
+            descending = field.startswith("-") != cursor["reverse"]
+            conditions.append(
+                (field.lstrip("-"), "lt" if descending else "gt", value)
+            )
+
+        def seek(accumulated, condition):
+            name, lookup, value = condition
+            return Q(**{f"{name}__{lookup}": value}) | (
+                Q(**{name: value}) & accumulated
+            )
+
+        name, lookup, value = conditions[-1]
+        keyset = reduce(
+            seek, reversed(conditions[:-1]), Q(**{f"{name}__{lookup}": value})
+        )
+        name, lookup, value = conditions[0]
+        return Q(**{f"{name}__{lookup}e": value}) & keyset
+
+    def get_position(self, instance):
+        return [getattr(instance, field.lstrip("-")) for field in self.ordering]
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(self.last_position, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(self.first_position, reverse=True)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            cursor = json.loads(urlsafe_b64decode(encoded.encode("ascii")))
+            position = cursor["p"]
+            reverse = bool(cursor.get("r", False))
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return {"position": self.clean_position(position), "reverse": reverse}
+
+    def clean_position(self, position):
+        """
+        Converts the values of a decoded position with their fields, so that a
+        tampered cursor is a 404 rather than an error in the query.
+        """
+        cleaned = []
+        for field, value in zip(self.fields, position):
+            if value is None or isinstance(value, (list, dict)):
+                raise NotFound(self.invalid_cursor_message)
+            try:
+                cleaned.append(field.to_python(value))
+            except ValidationError:
+                raise NotFound(self.invalid_cursor_message)
+        return cleaned
+
+    def encode_cursor(self, position, reverse):
+        url = self.request.build_absolute_uri()
+        if position is None:
+            return remove_query_param(url, self.cursor_query_param)
+        cursor = {"p": position}
+        if reverse:
+            cursor["r"] = 1
+        encoded = urlsafe_b64encode(
+            json.dumps(cursor, separators=(",", ":")).encode("utf-8")
+        ).decode("ascii")
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+
+def get_field(model, name):
+    return model._meta.pk if name == "pk" else model._meta.get_field(name)
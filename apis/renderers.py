@@ -0,0 +1,39 @@
+import csv
+import io
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+
+class NDJSONRenderer(JSONRenderer):
+    """
+    Newline delimited JSON. Exports stream their rows themselves, this only
+    renders error responses, as a single line.
+    """
+
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        content = super().render(data, accepted_media_type, renderer_context)
+        return content + b"\n" if content else content
+
+
+class CSVRenderer(BaseRenderer):
+    """
+    CSV. Exports stream their rows themselves, this only renders error
+    responses, as a header line and a value line.
+    """
+
+    media_type = "text/csv"
+    format = "csv"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if not isinstance(data, dict):
+            data = {"detail": data}
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(data.keys())
+        writer.writerow(data.values())
+        return buffer.getvalue().encode(self.charset)
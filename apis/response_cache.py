@@ -0,0 +1,59 @@
+"""
+Opt-in cache of rendered list and detail responses, see
+apis.views.v1.cache.ResponseCacheMixin.
+
+Entries are keyed by the versions of the models a response is built from
+(apis.versioning), so the save/delete/m2m signals bumping those versions
+invalidate every entry that may have changed: stale entries are never
+looked up again and expire on their own. This only needs `get`, `set`,
+`add` and `incr`, which the local-memory and file-based backends provide.
+
+The versions are per table, not per row, so any write to a model
+invalidates all the entries built from it, details of other rows included.
+Keying details by row would take a version per row of every table they
+read, kept by every write path including the bulk ones. The cache is meant
+for read-heavy traffic, where whole-table invalidation costs little.
+
+Enabled by naming a cache alias in the `API_RESPONSE_CACHE` setting.
+"""
+
+from django.conf import settings
+from django.core.cache import caches
+
+KEY_PREFIX = "apis:response"
+HITS_KEY = "apis:response-cache:hits"
+MISSES_KEY = "apis:response-cache:misses"
+
+
+def get_cache():
+    """Returns the configured response cache, or None when disabled."""
+    alias = getattr(settings, "API_RESPONSE_CACHE", None)
+    return caches[alias] if alias else None
+
+
+def get_timeout():
+    return getattr(settings, "API_RESPONSE_CACHE_TIMEOUT", 300)
+
+
+def record(cache, hit):
+    key = HITS_KEY if hit else MISSES_KEY
+    # `incr` raises on a missing key, `add` is a no-op on an existing one
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Evicted in between, losing one count is fine
+        pass
+
+
+def get_stats(cache):
+    """Returns `{"hits", "misses"}` counted since the last reset."""
+    counts = cache.get_many([HITS_KEY, MISSES_KEY])
+    return {
+        "hits": counts.get(HITS_KEY, 0),
+        "misses": counts.get(MISSES_KEY, 0),
+    }
+
+
+def reset_stats(cache):
+    cache.delete_many([HITS_KEY, MISSES_KEY])
@@ -0,0 +1,314 @@
+"""
+Import of ministry roster CSV files, see the `import_roster` command.
+
+A roster has the columns `role` ("student" or "teacher"), `first_name`,
+`last_name`, `gender`, `school` (the school alias), `grade` and `room`.
+Students need a classroom. Teachers need a school, and a classroom they
+teach when `grade` and `room` are given.
+
+The file is read row by row. Schools and classrooms are resolved through
+maps loaded once, and valid rows are upserted on their full name, one
+transaction per chunk. Memory therefore depends on the number of
+schools and classrooms and on the chunk size, never on the size of the
+file.
+"""
+
+import csv
+from dataclasses import asdict, dataclass, field
+
+from django.db import connection, transaction
+from apis import counters, jobs, versioning
+from apis.models import GENDER_CHOICES, School, Classroom, Student, Teacher
+from apis.utils import batched, max_query_params
+
+COLUMNS = ("role", "first_name", "last_name", "gender", "school", "grade", "room")
+ROLES = ("student", "teacher")
+GENDERS = {gender for gender, _ in GENDER_CHOICES}
+NAME_MAX_LENGTH = Student._meta.get_field("first_name").max_length
+
+# Row errors kept in the result of an import job
+JOB_ERRORS = 100
+
+
+class RosterError(Exception):
+    """The file cannot be imported at all, e.g. a missing column."""
+
+
+@dataclass
+class Result:
+    rows: int = 0
+    # Distinct students and teachers per chunk
+    students: int = 0
+    teachers: int = 0
+    errors: int = 0
+
+
+@dataclass
+class Chunk:
+    # Keyed by full name, the last row of a name wins, except for the
+    # classrooms of a teacher, who teaches those of all their rows
+    students: dict = field(default_factory=dict)
+    teachers: dict = field(default_factory=dict)
+    # Valid rows read, duplicated names included
+    rows: int = 0
+
+
+class Lookups:
+    """Schools by alias and classrooms by (school, grade, room), loaded once."""
+
+    def __init__(self):
+        self.schools = dict(School.objects.values_list("alias", "pk"))
+        self.classrooms = {}
+        self.classroom_schools = {}
+        for pk, school_id, grade, room in Classroom.objects.values_list(
+            "pk", "school_id", "grade", "room"
+        ):
+            self.classrooms[school_id, grade, room] = pk
+            self.classroom_schools[pk] = school_id
+
+
+def read(file, lookups, chunk_size=5_000, on_error=None):
+    """
+    Yields the chunks of valid rows of the CSV `file`, each holding at most
+    `chunk_size` rows. Invalid rows are passed to `on_error(line, message)`.
+    """
+    reader = csv.DictReader(file)
+    missing = [column for column in COLUMNS if column not in (reader.fieldnames or ())]
+    if missing:
+        raise RosterError(f"Missing column(s): {', '.join(missing)}.")
+    chunk = Chunk()
+    for row in reader:
+        try:
+            role, full_name, values = parse(row, lookups)
+        except ValueError as error:
+            if on_error is not None:
+                on_error(reader.line_num, str(error))
+            continue
+        if role == "teacher":
+            add_teacher(chunk.teachers, full_name, values)
+        else:
+            chunk.students[full_name] = values
+        chunk.rows += 1
+        if chunk.rows >= chunk_size:
+            yield chunk
+            chunk = Chunk()
+    if chunk.rows:
+        yield chunk
+
+
+def add_teacher(teachers, full_name, values):
+    """
+    Merges a teacher row into `teachers`, where each teacher has the set of
+    `classroom_ids` of their rows in the last school given.
+    """
+    classroom_id = values.pop("classroom_id")
+    previous = teachers.get(full_name)
+    if previous is None or previous["school_id"] != values["school_id"]:
+        values["classroom_ids"] = set()
+    else:
+        values["classroom_ids"] = previous["classroom_ids"]
+    if classroom_id is not None:
+        values["classroom_ids"].add(classroom_id)
+    teachers[full_name] = values
+
+
+def parse(row, lookups):
+    """Returns `(role, full name, values)` of a row, or raises ValueError."""
+    role = (row["role"] or "").strip().lower()
+    if role not in ROLES:
+        raise ValueError(f"Unknown role {row['role']!r}.")
+    first_name = (row["first_name"] or "").strip()
+    last_name = (row["last_name"] or "").strip()
+    for name in (first_name, last_name):
+        if not name or len(name) > NAME_MAX_LENGTH:
+            raise ValueError(
+                f"Names must have between 1 and {NAME_MAX_LENGTH} characters."
+            )
+    gender = (row["gender"] or "").strip().upper()
+    if gender not in GENDERS:
+        raise ValueError(f"Unknown gender {row['gender']!r}.")
+    alias = (row["school"] or "").strip()
+    school_id = lookups.schools.get(alias)
+    if school_id is None:
+        raise ValueError(f"No school with the alias {alias!r}.")
+
+    grade, room = (row["grade"] or "").strip(), (row["room"] or "").strip()
+    classroom_id = None
+    if grade or room or role == "student":
+        try:
+            key = (school_id, int(grade), int(room))
+        except ValueError:
+            raise ValueError("Grade and room must be integers.")
+        if key not in lookups.classrooms:
+            raise ValueError(f"No classroom {grade}/{room} in school {alias!r}.")
+        classroom_id = lookups.classrooms[key]
+
+    values = {"gender": gender, "classroom_id": classroom_id}
+    if role == "teacher":
+        values["school_id"] = school_id
+    return role, (first_name, last_name), values
+
+
+def existing(model, names, *fields):
+    """Returns `{full name: (fields...)}` of the rows of `model` named `names`."""
+    found = {}
+    for chunk in batched(list(names), max_query_params() // 2):
+        first_names, last_names = zip(*chunk)
+        rows = model.objects.filter(
+            first_name__in=set(first_names), last_name__in=set(last_names)
+        ).values_list("first_name", "last_name", *fields)
+        for first_name, last_name, *values in rows:
+            found[first_name, last_name] = tuple(values)
+    # Both name lists match more pairs than asked for
+    return {name: values for name, values in found.items() if name in names}
+
+
+def upsert_students(students):
+    """
+    Creates or updates the students of a chunk, returns the classrooms whose
+    students changed.
+
+    Students are most of a roster and their primary keys are not needed back,
+    so they are upserted with one `executemany` instead of `bulk_create`.
+    """
+    old = existing(Student, students, "classroom_id")
+    opts = Student._meta
+    quote_name = connection.ops.quote_name
+    first_name, last_name, gender, classroom = (
+        quote_name(opts.get_field(name).column)
+        for name in ("first_name", "last_name", "gender", "classroom")
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"INSERT INTO {quote_name(opts.db_table)} "
+            f"({first_name}, {last_name}, {gender}, {classroom}) "
+            "VALUES (%s, %s, %s, %s) "
+            f"ON CONFLICT ({first_name}, {last_name}) DO UPDATE SET "
+            f"{gender} = excluded.{gender}, {classroom} = excluded.{classroom}",
+            [
+                (*name, values["gender"], values["classroom_id"])
+                for name, values in students.items()
+            ],
+        )
+    return {values["classroom_id"] for values in students.values()} | {
+        classroom_id for (classroom_id,) in old.values()
+    }
+
+
+def upsert_teachers(teachers):
+    """
+    Creates or updates the teachers of a chunk and links them to their
+    classrooms. A teacher moving to another school leaves the classrooms of
+    the previous one. Returns the schools and classrooms whose teachers
+    changed.
+    """
+    old = existing(Teacher, teachers, "pk", "school_id")
+    moved = [
+        pk
+        for name, (pk, school_id) in old.items()
+        if school_id != teachers[name]["school_id"]
+    ]
+    through = Teacher.classrooms.through
+    classroom_ids = set()
+    for pks in batched(moved, max_query_params()):
+        links = through.objects.filter(teacher_id__in=pks)
+        classroom_ids.update(links.values_list("classroom_id", flat=True))
+        links.delete()
+
+    rows = Teacher.objects.bulk_create(
+        [
+            Teacher(
+                first_name=first_name,
+                last_name=last_name,
+                gender=values["gender"],
+                school_id=values["school_id"],
+            )
+            for (first_name, last_name), values in teachers.items()
+        ],
+        batch_size=max_query_params() // 4,
+        update_conflicts=True,
+        unique_fields=["first_name", "last_name"],
+        update_fields=["gender", "school_id"],
+    )
+    links = [
+        through(teacher_id=teacher.pk, classroom_id=classroom_id)
+        for teacher, values in zip(rows, teachers.values())
+        for classroom_id in values["classroom_ids"]
+    ]
+    through.objects.bulk_create(links, ignore_conflicts=True)
+    classroom_ids.update(link.classroom_id for link in links)
+    school_ids = {values["school_id"] for values in teachers.values()} | {
+        school_id for _, school_id in old.values()
+    }
+    return school_ids, classroom_ids
+
+
+def write(chunk, lookups):
+    """Upserts a chunk in one transaction and recounts what it changed."""
+    with transaction.atomic():
+        classroom_ids = set()
+        school_ids = set()
+        if chunk.students:
+            classroom_ids |= upsert_students(chunk.students)
+        if chunk.teachers:
+            schools, classrooms = upsert_teachers(chunk.teachers)
+            school_ids |= schools
+            classroom_ids |= classrooms
+        school_ids |= {lookups.classroom_schools[pk] for pk in classroom_ids}
+        for ids in batched(list(classroom_ids), max_query_params()):
+            counters.recount_classrooms(ids)
+        for ids in batched(list(school_ids), max_query_params()):
+            counters.recount_schools(ids)
+        versioning.bump(School, Classroom, Teacher, Student)
+
+
+def import_roster(
+    file, chunk_size=5_000, dry_run=False, on_error=None, on_progress=None
+):
+    """
+    Imports the CSV `file`, or only validates it with `dry_run`. Row errors
+    are passed to `on_error(line, message)` and the rows skipped, and
+    `on_progress(result)` is called after each chunk.
+    """
+    lookups = Lookups()
+    result = Result()
+
+    def error(line, message):
+        result.errors += 1
+        if on_error is not None:
+            on_error(line, message)
+
+    valid_rows = 0
+    for chunk in read(file, lookups, chunk_size, error):
+        if not dry_run:
+            write(chunk, lookups)
+        valid_rows += chunk.rows
+        result.students += len(chunk.students)
+        result.teachers += len(chunk.teachers)
+        result.rows = valid_rows + result.errors
+        if on_progress is not None:
+            on_progress(result)
+    result.rows = valid_rows + result.errors
+    return result
+
+
+def import_roster_job(job, path, chunk_size=5_000, dry_run=False):
+    """
+    Handler of the "import_roster" job, importing the file at `path`.
+    Returns the counts of the Result and the first row errors.
+    """
+    messages = []
+
+    def on_error(line, message):
+        if len(messages) < JOB_ERRORS:
+            messages.append(f"line {line}: {message}")
+
+    with open(path, newline="", encoding="utf-8-sig") as file:
+        result = import_roster(
+            file,
+            chunk_size=chunk_size,
+            dry_run=dry_run,
+            on_error=on_error,
+            on_progress=lambda result: jobs.report(job, result.rows),
+        )
+    return {**asdict(result), "messages": messages}
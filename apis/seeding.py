@@ -0,0 +1,181 @@
+"""
+Deterministic synthetic data for load tests, see the `seed` command.
+
+Rows are generated from a `random.Random(seed)` and inserted in a single
+transaction, with `bulk_create` or, for students, `executemany`. Counters are known from the
+generation and inserted with the rows, so no recount is needed, and the
+generated rows satisfy every constraint:
+
+- classrooms of a school take distinct (grade, room) pairs
+  (`unique_classroom`);
+- teachers only teach classrooms of their own school (the same-school
+  triggers of migration 0008);
+- full names carry a sequence number unique over the table
+  (`teacher_full_name`, `student_full_name`).
+"""
+
+import random
+from itertools import product
+
+from django.db import connection, transaction
+from django.db.models import Max
+from apis import versioning
+from apis.models import GENDER_CHOICES, School, Classroom, Student, Teacher
+
+FIRST_NAMES = (
+    "Anan", "Busaba", "Chai", "Dao", "Ekachai", "Fah", "Kanya", "Krit",
+    "Lamai", "Malee", "Niran", "Pim", "Rattana", "Somchai", "Suda", "Thida",
+)  # fmt: skip
+
+LAST_NAMES = (
+    "Boonmee", "Chaiyaporn", "Jaidee", "Kaewmanee", "Pongsak", "Rattanakorn",
+    "Saetang", "Srisuk", "Thongdee", "Wongsawat",
+)  # fmt: skip
+
+SCHOOL_WORDS = ("Wat", "Ban", "Anuban", "Mathayom", "Prachasan", "Wittaya")
+
+GRADES = range(1, 13)
+ROOMS = range(1, 101)
+GENDERS = [gender for gender, _ in GENDER_CHOICES]
+CLASSROOM_PAIRS = list(product(GRADES, ROOMS))
+
+# Student rows generated before each insert
+STUDENT_CHUNK = 50_000
+
+
+def seed(
+    schools,
+    classrooms=12,
+    teachers=10,
+    students=30,
+    classrooms_per_teacher=2,
+    seed=0,
+    progress=None,
+):
+    """
+    Inserts `schools` schools with `classrooms` classrooms and `teachers`
+    teachers each, every teacher teaching `classrooms_per_teacher` classrooms
+    of their school, and `students` students per classroom.
+
+    The same arguments on the same database produce the same rows.
+    `progress` is called with the number of students inserted so far.
+    Returns the number of rows inserted per model.
+    """
+    if classrooms > len(CLASSROOM_PAIRS):
+        raise ValueError(f"A school has at most {len(CLASSROOM_PAIRS)} classrooms.")
+    rng = random.Random(seed)
+    with transaction.atomic():
+        # Sequence numbers keeping names unique over existing rows
+        start = {
+            model: (model.objects.aggregate(last=Max("pk"))["last"] or 0) + 1
+            for model in (School, Teacher, Student)
+        }
+        school_rows = School.objects.bulk_create(
+            make_school(rng, start[School] + n, classrooms, teachers, students)
+            for n in range(schools)
+        )
+
+        # Classrooms taught by each teacher, as indexes into the classrooms
+        taught = []
+        teachers_count = [0] * (schools * classrooms)
+        for n in range(schools * teachers):
+            first = n // teachers * classrooms
+            indexes = rng.sample(
+                range(first, first + classrooms),
+                min(classrooms_per_teacher, classrooms),
+            )
+            for index in indexes:
+                teachers_count[index] += 1
+            taught.append(indexes)
+
+        classroom_rows = Classroom.objects.bulk_create(
+            Classroom(
+                school_id=school_rows[index // classrooms].pk,
+                grade=grade,
+                room=room,
+                students_count=students,
+                teachers_count=teachers_count[index],
+            )
+            for index, (grade, room) in enumerate(
+                pair
+                for _ in school_rows
+                for pair in sorted(rng.sample(CLASSROOM_PAIRS, classrooms))
+            )
+        )
+        teacher_rows = Teacher.objects.bulk_create(
+            Teacher(
+                first_name=rng.choice(FIRST_NAMES),
+                last_name=f"{rng.choice(LAST_NAMES)}-T{start[Teacher] + n}",
+                gender=rng.choice(GENDERS),
+                school_id=school_rows[n // teachers].pk,
+            )
+            for n in range(schools * teachers)
+        )
+        links = Teacher.classrooms.through.objects.bulk_create(
+            Teacher.classrooms.through(
+                teacher_id=teacher.pk, classroom_id=classroom_rows[index].pk
+            )
+            for teacher, indexes in zip(teacher_rows, taught)
+            for index in indexes
+        )
+
+        inserted = 0
+        chunk = []
+        for classroom in classroom_rows:
+            for _ in range(students):
+                number = start[Student] + inserted + len(chunk)
+                chunk.append(
+                    (
+                        rng.choice(FIRST_NAMES),
+                        f"{rng.choice(LAST_NAMES)}-S{number}",
+                        rng.choice(GENDERS),
+                        classroom.pk,
+                    )
+                )
+            if len(chunk) >= STUDENT_CHUNK:
+                inserted += insert_students(chunk, progress, inserted)
+                chunk = []
+        inserted += insert_students(chunk, progress, inserted)
+        versioning.bump(School, Classroom, Teacher, Student)
+    return {
+        "schools": len(school_rows),
+        "classrooms": len(classroom_rows),
+        "teachers": len(teacher_rows),
+        "links": len(links),
+        "students": inserted,
+    }
+
+
+def make_school(rng, number, classrooms, teachers, students):
+    word = rng.choice(SCHOOL_WORDS)
+    return School(
+        name=f"{word} {rng.choice(LAST_NAMES)} School {number}",
+        alias=f"SCH{number}",
+        address=f"{rng.randint(1, 999)} Moo {rng.randint(1, 20)}",
+        classrooms_count=classrooms,
+        teachers_count=teachers,
+        students_count=classrooms * students,
+    )
+
+
+def insert_students(rows, progress, inserted):
+    """
+    Inserts `(first_name, last_name, gender, classroom_id)` rows with one
+    `executemany`. Students are most of the rows and their primary keys are
+    not needed back, so they skip the per-field work of `bulk_create`.
+    """
+    opts = Student._meta
+    quote_name = connection.ops.quote_name
+    columns = ", ".join(
+        quote_name(opts.get_field(name).column)
+        for name in ("first_name", "last_name", "gender", "classroom")
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"INSERT INTO {quote_name(opts.db_table)} ({columns}) "
+            "VALUES (%s, %s, %s, %s)",
+            rows,
+        )
+    if progress is not None:
+        progress(inserted + len(rows))
+    return len(rows)
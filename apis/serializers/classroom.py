@@ -29,6 +29,26 @@ class ClassroomSerializer(serializers.ModelSerializer):
     students = SimpleStudentSerializer(many=True, read_only=True)
 
 
+class ClassroomListSerializer(ClassroomSerializer):
+    """
+    List rows, with the counters of the classroom. `teachers` and `students`
+    are only embedded on `?expand=`, see ClassroomViewSet.
+    """
+
+    class Meta(ClassroomSerializer.Meta):
+        fields = [
+            "id",
+            "grade",
+            "room",
+            "school",
+            "school_id",
+            "students_count",
+            "teachers_count",
+            "teachers",
+            "students",
+        ]
+
+
 class CreateClassroomSerializer(serializers.ModelSerializer):
     school_id = serializers.ModelField(model_field=Classroom._meta.get_field("school"))
 
@@ -84,4 +104,4 @@ def throw_unique_error(fields: list[str], error: IntegrityError, message: str):
             if field in error_string and field != "id":
                 error_output[field] = [message]
         raise serializers.ValidationError(error_output)
-    raise IntegrityError
+    raise error
@@ -0,0 +1,313 @@
+"""
+Row builders producing serializer output from `.values_list()` rows.
+
+A `RowBuilder` is compiled once from the field declarations of a read
+serializer. Plain fields become column lookups, nested serializers become
+nested dicts over joined columns and `many=True` serializers become one
+extra query per page grouped by parent. The output has the same keys, in the
+same order and with the same values as the serializer's `.data`, without
+building a field tree or a model instance per row.
+"""
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import ManyToManyField, ManyToManyRel, ManyToOneRel
+from rest_framework import serializers
+from apis.utils import batched, max_query_params
+
+# Fields whose to_representation returns database values unchanged
+PASSTHROUGH_FIELDS = (
+    serializers.CharField,
+    serializers.IntegerField,
+    serializers.BooleanField,
+    serializers.ChoiceField,
+    serializers.ModelField,
+)
+
+
+class RowBuilder:
+    """
+    `fields` and `omit` are fieldset trees as returned by `parse_fieldset`,
+    restricting the output to (or removing) the given fields. Only the
+    columns and relations of the remaining fields are selected.
+    """
+
+    # Distinct projections kept by `project`
+    max_projections = 256
+
+    def __init__(self, serializer_class, model=None, prefix="", fields=None, omit=None):
+        self.serializer_class = serializer_class
+        self.model = model or serializer_class.Meta.model
+        self.columns = []
+        self.getters = []
+        self.relations = []
+        # select_related() lookups of the nested serializers
+        self.joins = []
+        # Every readable field, as a fieldset tree
+        self.tree = {}
+        self.projections = {}
+        self.compile(serializer_class(), prefix, fields, omit)
+
+    def compile(self, serializer, prefix, fields, omit):
+        for name, field in readable_fields(serializer):
+            if field.source == "*" or isinstance(
+                field, serializers.SerializerMethodField
+            ):
+                raise ImproperlyConfigured(
+                    f"{self.serializer_class.__name__}.{name} cannot be built from rows."
+                )
+            lookup = prefix + field.source.replace(".", "__")
+            if isinstance(field, serializers.ListSerializer):
+                self.tree[name] = dict.fromkeys(
+                    name for name, _ in readable_fields(field.child)
+                )
+            elif isinstance(field, serializers.BaseSerializer):
+                self.tree[name] = dict.fromkeys(
+                    name for name, _ in readable_fields(field)
+                )
+            else:
+                self.tree[name] = None
+
+            included, sub_fields, sub_omit = select(name, fields, omit)
+            if not included:
+                continue
+            if isinstance(field, serializers.ListSerializer):
+                getter = self.compile_many(field, lookup, sub_fields, sub_omit)
+            elif isinstance(field, serializers.BaseSerializer):
+                getter = self.compile_nested(field, lookup, sub_fields, sub_omit)
+            else:
+                getter = self.compile_value(field, lookup)
+            self.getters.append((name, getter))
+
+    def add_column(self, lookup):
+        if lookup not in self.columns:
+            self.columns.append(lookup)
+        return self.columns.index(lookup)
+
+    def compile_value(self, field, lookup):
+        index = self.add_column(lookup)
+        if type(field) in PASSTHROUGH_FIELDS:
+            return lambda row, children: row[index]
+        to_representation = field.to_representation
+
+        def get(row, children):
+            value = row[index]
+            return None if value is None else to_representation(value)
+
+        return get
+
+    def compile_nested(self, serializer, lookup, fields, omit):
+        getters = []
+        # Compiled into this builder's columns so the relation is joined
+        for name, field in readable_fields(serializer):
+            if isinstance(field, serializers.BaseSerializer):
+                raise ImproperlyConfigured(
+                    f"{self.serializer_class.__name__}: nested serializers "
+                    "are only supported one level deep."
+                )
+            if select(name, fields, omit)[0]:
+                getters.append(
+                    (name, self.compile_value(field, f"{lookup}__{field.source}"))
+                )
+        self.joins.append(lookup)
+        # A null foreign key is serialized as None
+        pk_name = serializer.Meta.model._meta.pk.name
+        null_index = self.add_column(f"{lookup}__{pk_name}")
+
+        def get(row, children):
+            if row[null_index] is None:
+                return None
+            return {name: getter(row, children) for name, getter in getters}
+
+        return get
+
+    def compile_many(self, serializer, lookup, fields, omit):
+        relation = Relation(
+            self.model, lookup, serializer.child.__class__, fields, omit
+        )
+        self.relations.append(relation)
+        pk_index = self.add_column(self.model._meta.pk.name)
+
+        def get(row, children):
+            return children[relation].get(row[pk_index], [])
+
+        return get
+
+    def build(self, row, children=None):
+        return {name: getter(row, children) for name, getter in self.getters}
+
+    def build_many(self, rows):
+        """Builds every row of a page, fetching `many=True` relations once."""
+        rows = list(rows)
+        children = {}
+        if self.relations:
+            pk_index = self.columns.index(self.model._meta.pk.name)
+            pks = [row[pk_index] for row in rows]
+            for relation in self.relations:
+                children[relation] = relation.fetch(pks)
+        return [self.build(row, children) for row in rows]
+
+    async def abuild_many(self, rows):
+        """`build_many` for async views."""
+        children = {}
+        if self.relations:
+            pk_index = self.columns.index(self.model._meta.pk.name)
+            pks = [row[pk_index] for row in rows]
+            for relation in self.relations:
+                children[relation] = await relation.afetch(pks)
+        return [self.build(row, children) for row in rows]
+
+    def get_columns(self, ordering=()):
+        """Columns to select, with the ordering ones the paginator reads."""
+        columns = list(self.columns)
+        for field in ordering:
+            if field.lstrip("-") not in columns:
+                columns.append(field.lstrip("-"))
+        return columns
+
+    def unknown_fields(self, tree, known=None, prefix=""):
+        """Returns the dotted paths of `tree` naming no readable field."""
+        known = self.tree if known is None else known
+        unknown = []
+        for name, subtree in tree.items():
+            if name not in known:
+                unknown.append(prefix + name)
+            elif subtree is not None and known[name] is None:
+                unknown.extend(f"{prefix}{name}.{nested}" for nested in subtree)
+            elif subtree is not None:
+                unknown.extend(
+                    self.unknown_fields(subtree, known[name], f"{prefix}{name}.")
+                )
+        return unknown
+
+    def project(self, fields=None, omit=None):
+        """
+        Returns the builder restricted by the `fields` and `omit` trees,
+        compiled on first use and kept for the next requests.
+        """
+        if fields is None and omit is None:
+            return self
+        key = (freeze(fields), freeze(omit))
+        if key not in self.projections:
+            if len(self.projections) >= self.max_projections:
+                self.projections.clear()
+            self.projections[key] = RowBuilder(
+                self.serializer_class, self.model, fields=fields, omit=omit
+            )
+        return self.projections[key]
+
+
+class Relation:
+    """A `many=True` relation, fetched from the related or through table."""
+
+    def __init__(self, model, lookup, child_serializer_class, fields, omit):
+        field = model._meta.get_field(lookup)
+        related_model = field.related_model
+        if isinstance(field, ManyToManyField):
+            self.model = field.remote_field.through
+            self.parent = field.m2m_field_name()
+            child = field.m2m_reverse_field_name() + "__"
+        elif isinstance(field, ManyToManyRel):
+            self.model = field.through
+            self.parent = field.field.m2m_reverse_field_name()
+            child = field.field.m2m_field_name() + "__"
+        elif isinstance(field, ManyToOneRel):
+            self.model = related_model
+            self.parent = field.field.name
+            child = ""
+        else:
+            raise ImproperlyConfigured(f"{model.__name__}.{lookup} is not a to-many.")
+        self.lookup = lookup
+        self.builder = RowBuilder(
+            child_serializer_class,
+            model=self.model,
+            prefix=child,
+            fields=fields,
+            omit=omit,
+        )
+        # Same order as prefetch_related(), the related model's default one
+        self.ordering = [
+            f"-{child}{field[1:]}" if field.startswith("-") else f"{child}{field}"
+            for field in related_model._meta.ordering
+        ]
+
+    def get_rows(self, pks):
+        return (
+            self.model._default_manager.filter(**{f"{self.parent}__in": pks})
+            .order_by(*self.ordering)
+            .values_list(f"{self.parent}_id", *self.builder.columns)
+        )
+
+    def fetch(self, pks):
+        """Returns `{parent pk: [child data]}` for the given parents."""
+        grouped = {}
+        for chunk in batched(pks, max_query_params()):
+            for parent_pk, *row in self.get_rows(chunk):
+                grouped.setdefault(parent_pk, []).append(self.builder.build(row))
+        return grouped
+
+    async def afetch(self, pks):
+        """`fetch` for async views."""
+        grouped = {}
+        for chunk in batched(pks, max_query_params()):
+            async for parent_pk, *row in self.get_rows(chunk):
+                grouped.setdefault(parent_pk, []).append(self.builder.build(row))
+        return grouped
+
+
+def readable_fields(serializer):
+    return [
+        (name, field)
+        for name, field in serializer.fields.items()
+        if not field.write_only
+    ]
+
+
+def parse_fieldset(value):
+    """
+    Parses `"id,school.name"` into the tree `{"id": None, "school": {"name":
+    None}}`, None standing for a whole field. Returns None for no value.
+    """
+    if value is None:
+        return None
+    tree = {}
+    for path in filter(None, (path.strip() for path in value.split(","))):
+        name, _, nested = path.partition(".")
+        if not nested:
+            tree[name] = None
+        elif name not in tree or tree[name] is not None:
+            tree.setdefault(name, {})[nested] = None
+    return tree
+
+
+def select(name, fields, omit):
+    """
+    Returns whether `name` is kept by the `fields` and `omit` trees, with
+    the trees applying to its own fields.
+    """
+    if fields is not None and name not in fields:
+        return False, None, None
+    if omit is not None and name in omit and omit[name] is None:
+        return False, None, None
+    sub_fields = fields[name] if fields is not None else None
+    sub_omit = omit.get(name) if omit is not None else None
+    return True, sub_fields, sub_omit
+
+
+def freeze(tree):
+    if tree is None:
+        return None
+    return tuple(sorted((name, freeze(subtree)) for name, subtree in tree.items()))
+
+
+def prune(serializer, fields, omit):
+    """Removes the fields left out by the `fields` and `omit` trees in place."""
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+    for name, field in readable_fields(serializer):
+        included, sub_fields, sub_omit = select(name, fields, omit)
+        if not included:
+            serializer.fields.pop(name)
+        elif isinstance(field, serializers.BaseSerializer) and (
+            sub_fields is not None or sub_omit is not None
+        ):
+            prune(field, sub_fields, sub_omit)
@@ -1,5 +1,9 @@
+from collections import Counter
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
-from apis.models import Student, Classroom
+from apis import counters, versioning
+from apis.models import Student, Classroom, School
+from apis.utils import batched, max_query_params
 from .simple import SimpleSchoolSerializer, SimpleClassroomSerializer
 
 
@@ -50,3 +54,114 @@ class UpdateStudentSerializer(CreateStudentSerializer):
             "gender",
             "classroom_id",
         ]
+
+
+class BulkCreateStudentListSerializer(serializers.ListSerializer):
+    """
+    Creates a batch of students.
+
+    Items are first validated field by field, then the classroom ids and the
+    full names of the whole batch are checked with set-based queries instead
+    of one query per item. Valid batches are inserted with bulk_create, one
+    transaction per chunk.
+
+    A full name created by another request after the validation fails its
+    chunk, while the chunks before it stay created. The errors then say
+    which items were created, with an empty dict, like validation errors.
+    """
+
+    chunk_size = 1000
+    full_name_message = "Student with the same first name and last name already exists."
+    not_created_message = "Not created, as another student of the batch failed."
+
+    def to_internal_value(self, data):
+        students = super().to_internal_value(data)
+        errors = [{} for _ in students]
+
+        classroom_ids = {student["classroom_id"] for student in students}
+        found_classroom_ids = set()
+        for ids in batched(list(classroom_ids), max_query_params()):
+            found_classroom_ids.update(
+                Classroom.objects.filter(pk__in=ids).values_list("pk", flat=True)
+            )
+
+        taken_names = self.get_taken_names(students)
+        for index, student in enumerate(students):
+            if student["classroom_id"] not in found_classroom_ids:
+                errors[index]["classroom_id"] = [
+                    "No classroom with the given ID was found."
+                ]
+            full_name = (student["first_name"], student["last_name"])
+            if full_name in taken_names:
+                errors[index]["first_name"] = [self.full_name_message]
+                errors[index]["last_name"] = [self.full_name_message]
+            taken_names.add(full_name)
+
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return students
+
+    def get_taken_names(self, students):
+        """
+        Returns the full names of the batch that already exist, with one
+        query per bound-parameter limit worth of names.
+        """
+        taken_names = set()
+        full_names = list({(s["first_name"], s["last_name"]) for s in students})
+        for names in batched(full_names, max_query_params() // 2):
+            first_names, last_names = zip(*names)
+            candidates = Student.objects.filter(
+                first_name__in=set(first_names), last_name__in=set(last_names)
+            ).values_list("first_name", "last_name")
+            taken_names.update(set(candidates).intersection(names))
+        return taken_names
+
+    def create(self, validated_data):
+        created = []
+        for chunk in batched(validated_data, self.chunk_size):
+            try:
+                with transaction.atomic():
+                    students = Student.objects.bulk_create(
+                        [Student(**attrs) for attrs in chunk]
+                    )
+                    counters.add_students(
+                        Counter(student.classroom_id for student in students)
+                    )
+                    versioning.bump(Student, Classroom, School)
+            except IntegrityError as e:
+                self.throw_race_error(validated_data, len(created), e)
+            created.extend(students)
+        return created
+
+    def throw_race_error(self, students, created, error):
+        """
+        Raises the per-item errors of a batch whose first `created` items
+        were created before `error`, a full name taken meanwhile.
+        """
+        if "UNIQUE constraint" not in str(error):
+            raise error
+        remaining = students[created:]
+        taken_names = self.get_taken_names(remaining)
+        errors = [{} for _ in range(created)]
+        for student in remaining:
+            if (student["first_name"], student["last_name"]) in taken_names:
+                errors.append(
+                    {
+                        "first_name": [self.full_name_message],
+                        "last_name": [self.full_name_message],
+                    }
+                )
+            else:
+                errors.append({"non_field_errors": [self.not_created_message]})
+        raise serializers.ValidationError(errors)
+
+
+class BulkCreateStudentSerializer(CreateStudentSerializer):
+    class Meta(CreateStudentSerializer.Meta):
+        list_serializer_class = BulkCreateStudentListSerializer
+        # Full names are checked for the whole batch by the list serializer
+        validators = []
+
+    def validate_classroom_id(self, value):
+        # Checked for the whole batch by the list serializer
+        return value
@@ -1,9 +1,18 @@
-from django.db import transaction
-from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import FilteredRelation, Q
 from rest_framework import serializers
+from apis import counters, versioning
 from apis.models import Teacher, Classroom, School
+from apis.utils import batched, max_query_params
 from .simple import SimpleClassroomSerializer, SimpleSchoolSerializer
 
+# Message of the same-school triggers created by migration 0008
+SAME_SCHOOL_VIOLATION = "teacher_classroom_same_school"
+SAME_SCHOOL_MESSAGES = {
+    "classrooms_id": "The school of the classroom must be the same as the school of the teacher.",
+    "school_id": "To update school, teacher must not registered in any classroom.",
+}
+
 
 class TeacherSerializer(serializers.ModelSerializer):
     school = SimpleSchoolSerializer()
@@ -46,22 +55,6 @@ class CreateTeacherSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("No school with the given ID was found.")
         return value
 
-    def validate(self, attrs, school_id=None):
-        if "classrooms" in attrs:
-            if school_id is None:
-                school_id = attrs["school_id"]
-            school_classrooms = list(School.objects.get(pk=school_id).classrooms.all())
-            for classroom_id in attrs["classrooms"]:
-                if classroom_id not in school_classrooms:
-                    raise serializers.ValidationError(
-                        {
-                            "classrooms_id": [
-                                "The school of the classroom must be the same as the school of the teacher."
-                            ],
-                        }
-                    )
-        return super().validate(attrs)
-
     def create(self, validated_data):
         with transaction.atomic():
             # Get classroom
@@ -70,12 +63,12 @@ class CreateTeacherSerializer(serializers.ModelSerializer):
                 classrooms = validated_data.pop("classrooms")
             # Create new teacher first
             created_teacher = Teacher.objects.create(**validated_data)
-            # Then add classrooms
+            # Then add classrooms, the database rejects other schools' ones
             if classrooms is not None:
                 try:
                     created_teacher.classrooms.add(*classrooms)
-                except ValidationError as e:
-                    raise serializers.ValidationError({"classrooms_id": list(e)})
+                except IntegrityError as e:
+                    throw_same_school_error("classrooms_id", e)
             return created_teacher
 
 
@@ -89,18 +82,6 @@ class UpdateTeacherSerializer(CreateTeacherSerializer):
             "classrooms_id",
         ]
 
-    def validate(self, attrs):
-        if "school_id" in attrs:
-            teacher = Teacher.objects.get(pk=self.context["teacher_id"])
-            if teacher.school_id != attrs["school_id"]:
-                if teacher.classrooms.count() > 0:
-                    raise serializers.ValidationError(
-                        {
-                            "school_id": "To update school, teacher must not registered in any classroom."
-                        }
-                    )
-        return super().validate(attrs, school_id=self.context["teacher_id"])
-
     def update(self, instance, validated_data):
         with transaction.atomic():
             # Get classroom
@@ -113,14 +94,158 @@ class UpdateTeacherSerializer(CreateTeacherSerializer):
             instance.last_name = validated_data.get("last_name", instance.last_name)
             instance.gender = validated_data.get("gender", instance.gender)
             if "school_id" in validated_data:
-                school_id = validated_data.get("school_id")
-                instance.school = School.objects.get(pk=school_id)
-            instance.save()
+                instance.school_id = validated_data.get("school_id")
+            try:
+                instance.save()
+            except IntegrityError as e:
+                throw_same_school_error("school_id", e)
             # Then update classrooms
             if classrooms_data is not None:
                 try:
                     classrooms.set(classrooms_data)
-                except ValidationError as e:
-                    raise serializers.ValidationError({"classrooms_id": list(e)})
+                except IntegrityError as e:
+                    throw_same_school_error("classrooms_id", e)
 
             return instance
+
+
+def throw_same_school_error(field: str, error: IntegrityError):
+    """
+    Maps the abort raised by the teacher/classroom same-school triggers
+    (see migration 0008) to a validation error on `field`.
+    """
+    if SAME_SCHOOL_VIOLATION in str(error):
+        raise serializers.ValidationError({field: [SAME_SCHOOL_MESSAGES[field]]})
+    raise error
+
+
+class AssignClassroomsListSerializer(serializers.ListSerializer):
+    """
+    Replaces the classrooms of many teachers at once.
+
+    Same-school membership of the whole batch is validated with one join, and
+    the teacher/classroom through table is updated with one bulk delete and
+    one bulk insert, instead of going through `classrooms.set()` per teacher.
+    """
+
+    mismatch_message = SAME_SCHOOL_MESSAGES["classrooms_id"]
+
+    def to_internal_value(self, data):
+        assignments = super().to_internal_value(data)
+        errors = [{} for _ in assignments]
+
+        found_teacher_ids = set()
+        valid_pairs = set()
+        for chunk in self.batched_by_params(assignments):
+            for teacher_id, classroom_id in self.get_same_school_pairs(chunk):
+                found_teacher_ids.add(teacher_id)
+                valid_pairs.add((teacher_id, classroom_id))
+
+        seen_teacher_ids = set()
+        for index, assignment in enumerate(assignments):
+            teacher_id = assignment["teacher_id"]
+            if teacher_id not in found_teacher_ids:
+                errors[index]["teacher_id"] = [
+                    "No teacher with the given ID was found."
+                ]
+            elif teacher_id in seen_teacher_ids:
+                errors[index]["teacher_id"] = ["Teacher is assigned more than once."]
+            elif any(
+                (teacher_id, classroom_id) not in valid_pairs
+                for classroom_id in assignment["classrooms_id"]
+            ):
+                errors[index]["classrooms_id"] = [self.mismatch_message]
+            seen_teacher_ids.add(teacher_id)
+
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return assignments
+
+    def get_same_school_pairs(self, assignments):
+        """
+        Returns (teacher_id, classroom_id) for every requested classroom in
+        the school of the teacher, and (teacher_id, None) for teachers with
+        none, in a single LEFT JOIN of the teachers to their school classrooms.
+        """
+        classroom_ids = {
+            classroom_id
+            for assignment in assignments
+            for classroom_id in assignment["classrooms_id"]
+        }
+        teachers = Teacher.objects.filter(
+            pk__in=[assignment["teacher_id"] for assignment in assignments]
+        ).order_by()
+        if not classroom_ids:
+            # An empty IN () would drop the teachers from the join as well
+            return [(pk, None) for pk in teachers.values_list("pk", flat=True)]
+        return teachers.annotate(
+            requested=FilteredRelation(
+                "school__classrooms",
+                condition=Q(school__classrooms__pk__in=classroom_ids),
+            )
+        ).values_list("pk", "requested__pk")
+
+    @staticmethod
+    def batched_by_params(assignments):
+        """Splits assignments so each validation join fits the parameter limit."""
+        chunk, params = [], 0
+        for assignment in assignments:
+            cost = 1 + len(assignment["classrooms_id"])
+            if chunk and params + cost > max_query_params():
+                yield chunk
+                chunk, params = [], 0
+            chunk.append(assignment)
+            params += cost
+        if chunk:
+            yield chunk
+
+    def create(self, validated_data):
+        through = Teacher.classrooms.through
+        wanted = {
+            (assignment["teacher_id"], classroom_id)
+            for assignment in validated_data
+            for classroom_id in assignment["classrooms_id"]
+        }
+        with transaction.atomic():
+            existing = {}
+            teacher_ids = [assignment["teacher_id"] for assignment in validated_data]
+            for ids in batched(teacher_ids, max_query_params()):
+                rows = through.objects.filter(teacher_id__in=ids).values_list(
+                    "pk", "teacher_id", "classroom_id"
+                )
+                existing.update(
+                    {
+                        (teacher_id, classroom_id): pk
+                        for pk, teacher_id, classroom_id in rows
+                    }
+                )
+            removed = existing.keys() - wanted
+            added = wanted - existing.keys()
+
+            for ids in batched(
+                [existing[pair] for pair in removed], max_query_params()
+            ):
+                through.objects.filter(pk__in=ids).delete()
+            through.objects.bulk_create(
+                [
+                    through(teacher_id=teacher_id, classroom_id=classroom_id)
+                    for teacher_id, classroom_id in added
+                ]
+            )
+
+            touched = list({classroom_id for _, classroom_id in removed | added})
+            for ids in batched(touched, max_query_params()):
+                counters.recount_classrooms(ids)
+            versioning.bump(Teacher, Classroom)
+        return validated_data
+
+
+class AssignClassroomsSerializer(serializers.Serializer):
+    teacher_id = serializers.IntegerField()
+    classrooms_id = serializers.ListField(child=serializers.IntegerField())
+
+    class Meta:
+        list_serializer_class = AssignClassroomsListSerializer
+
+    def validate_classrooms_id(self, value):
+        return list(dict.fromkeys(value))
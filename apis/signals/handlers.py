@@ -1,41 +1,202 @@
-from django.core.exceptions import ValidationError
-from django.db.models.signals import m2m_changed
+from django.db.models import F, QuerySet
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.contrib.auth import get_user_model
 from django.dispatch import receiver
-from apis.models import Classroom
+from apis import counters, tokens, versioning
+from apis.backends import auth
+from apis.models import ApiToken, School, Classroom, Student, Teacher
 
+# Foreign keys whose moves shift the counters, per counted model
+COUNTED_FOREIGN_KEYS = {
+    Student: "classroom_id",
+    Classroom: "school_id",
+    Teacher: "school_id",
+}
 
-@receiver(m2m_changed, sender=Classroom.teachers.through)
-def classroom_teacher_validator(sender, **kwargs):
-    """
-    Validates that the classrooms being added to a teacher belong to the same
-    school as the teacher. This function is triggered on the 'pre_add' action
-    of the ManyToMany relationship between teachers and classrooms.
-
-    Args:
-        sender (Model): The model class that triggered the signal.
-        **kwargs: Arbitrary keyword arguments containing 'instance', 'pk_set',
-                  and 'action'.
-
-    Raises:
-        ValidationError: If any classroom being added does not belong to the
-                         same school as the teacher.
-    """
-    # Teacher instace
-    instance = kwargs["instance"]
-    # Classroom pk_set
-    pk_set = kwargs["pk_set"]
-    action = kwargs["action"]
-    # School pk of the incoming classroom
-    classrooms_school_pk = list(
-        sender.objects.filter(classroom_id__in=pk_set).values_list(
-            "classroom__school__pk", flat=True
+
+@receiver(pre_save, sender=Student)
+@receiver(pre_save, sender=Classroom)
+@receiver(pre_save, sender=Teacher)
+def counted_model_saving(sender, instance, **kwargs):
+    """
+    Reads the stored foreign key of instances that were not loaded from the
+    database, e.g. `Student(pk=1, ...).save()`, so a move can still be told
+    apart from a plain update.
+    """
+    attname = COUNTED_FOREIGN_KEYS[sender]
+    if instance.pk is None or instance.get_loaded_value(attname) is not None:
+        return
+    previous = sender.objects.filter(pk=instance.pk).values_list(attname).first()
+    if previous is not None:
+        instance.set_loaded_value(attname, previous[0])
+
+
+@receiver(post_save, sender=Student)
+def student_saved(sender, instance, created, **kwargs):
+    """
+    Keeps the students counters of the classroom and school current when a
+    student is created or moved to another classroom.
+    """
+    if created:
+        counters.shift_students(instance.classroom_id, 1)
+        return
+    previous_classroom_id = instance.get_loaded_value("classroom_id")
+    if previous_classroom_id is not None and (
+        previous_classroom_id != instance.classroom_id
+    ):
+        counters.shift_students(previous_classroom_id, -1)
+        counters.shift_students(instance.classroom_id, 1)
+
+
+def cascaded(origin, sender):
+    """
+    Whether a deletion of `sender` rows is the cascade of deleting another
+    model, `origin` being the instance or queryset `delete()` was called on.
+    """
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return origin is not None and model is not sender
+
+
+@receiver(post_delete, sender=Student)
+def student_deleted(sender, instance, origin=None, **kwargs):
+    # Students deleted with their classroom were subtracted from the school
+    # once by classroom_deleting.
+    if not cascaded(origin, sender):
+        counters.shift_students(instance.classroom_id, -1)
+
+
+@receiver(post_save, sender=Classroom)
+def classroom_saved(sender, instance, created, **kwargs):
+    """
+    Keeps the classrooms and students counters of the school current when a
+    classroom is created or moved to another school.
+    """
+    if created:
+        counters.shift_school(instance.school_id, classrooms_count=1)
+        return
+    previous_school_id = instance.get_loaded_value("school_id")
+    if previous_school_id is not None and previous_school_id != instance.school_id:
+        students_count = Student.objects.filter(classroom=instance).count()
+        counters.shift_school(
+            previous_school_id, classrooms_count=-1, students_count=-students_count
+        )
+        counters.shift_school(
+            instance.school_id, classrooms_count=1, students_count=students_count
         )
+
+
+@receiver(pre_delete, sender=Classroom)
+def classroom_deleting(sender, instance, origin=None, **kwargs):
+    """
+    Subtracts the classroom and its students from the school in one UPDATE,
+    while the students still exist. Nothing is left to keep current when
+    the school itself is being deleted.
+    """
+    if cascaded(origin, sender):
+        return
+    counters.shift_school(
+        instance.school_id,
+        classrooms_count=-1,
+        students_count=-counters.count_subquery(
+            Student.objects.filter(classroom=instance.pk).values("classroom")
+        ),
     )
-    if action == "pre_add":
-        # Check if all classrooms belong to the same school as the teacher
-        if not all(
-            instance.school.pk == school_pk for school_pk in classrooms_school_pk
-        ):
-            raise ValidationError(
-                "The school of the classroom must be the same as the school of the teacher"
+
+
+@receiver(post_save, sender=Teacher)
+def teacher_saved(sender, instance, created, **kwargs):
+    """
+    Keeps the teachers counter of the school current when a teacher is
+    created or moved to another school.
+    """
+    if created:
+        counters.shift_school(instance.school_id, teachers_count=1)
+        return
+    previous_school_id = instance.get_loaded_value("school_id")
+    if previous_school_id is not None and previous_school_id != instance.school_id:
+        counters.shift_school(previous_school_id, teachers_count=-1)
+        counters.shift_school(instance.school_id, teachers_count=1)
+
+
+@receiver(pre_delete, sender=Teacher)
+def teacher_deleting(sender, instance, **kwargs):
+    # The cascade removes the through rows without sending m2m_changed, so
+    # the classrooms are released while the rows still exist.
+    Classroom.objects.filter(teachers=instance).update(
+        teachers_count=F("teachers_count") - 1
+    )
+
+
+@receiver(post_delete, sender=Teacher)
+def teacher_deleted(sender, instance, **kwargs):
+    counters.shift_school(instance.school_id, teachers_count=-1)
+
+
+@receiver(m2m_changed, sender=Classroom.teachers.through)
+def classroom_teacher_counter(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Recounts the teachers of the classrooms touched by a change to the
+    teacher/classroom relation.
+    """
+    if action not in ("pre_clear", "post_clear", "post_add", "post_remove"):
+        return
+    if reverse:
+        # Instance is a classroom, pk_set holds teacher ids
+        counters.recount_classrooms([instance.pk])
+    elif action == "pre_clear":
+        # Remember the classrooms before the through rows go away
+        instance._cleared_classroom_ids = list(
+            sender.objects.filter(teacher=instance).values_list(
+                "classroom_id", flat=True
             )
+        )
+    elif action == "post_clear":
+        counters.recount_classrooms(instance.__dict__.pop("_cleared_classroom_ids"))
+    else:
+        counters.recount_classrooms(pk_set)
+
+
+@receiver(post_save, sender=School)
+@receiver(post_save, sender=Classroom)
+@receiver(post_save, sender=Teacher)
+@receiver(post_save, sender=Student)
+@receiver(post_delete, sender=School)
+@receiver(post_delete, sender=Classroom)
+@receiver(post_delete, sender=Teacher)
+@receiver(post_delete, sender=Student)
+def model_changed(sender, **kwargs):
+    """Bumps the version of the changed model, see apis.versioning."""
+    versioning.bump_on_commit(sender)
+
+
+@receiver(m2m_changed, sender=Classroom.teachers.through)
+def classroom_teacher_changed(sender, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        versioning.bump_on_commit(Teacher, Classroom)
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def user_changed(sender, instance, **kwargs):
+    """
+    Drops the cached tokens and session user of the user, who may have been
+    deactivated.
+    """
+    tokens.forget_user(instance.pk)
+    auth.forget_user(instance.pk)
+
+
+@receiver(post_save, sender=ApiToken)
+@receiver(post_delete, sender=ApiToken)
+def api_token_changed(sender, instance, created=False, **kwargs):
+    """
+    Drops the cached token, which may have been revoked. A new token cannot
+    be cached anywhere yet.
+    """
+    tokens.cache.evict(token_ids={instance.pk}, shared=not created)
@@ -14,3 +14,9 @@ def authenticate(api_client):
         return api_client.force_authenticate(user=User(is_staff=is_staff))
 
     return do_authenticate
+
+
+@pytest.fixture
+def write_retry(settings):
+    settings.MIDDLEWARE = [*settings.MIDDLEWARE, "apis.middleware.WriteRetryMiddleware"]
+    settings.API_WRITE_BACKOFF = 0
@@ -0,0 +1,207 @@
+from apis import tokens
+from apis.models import ApiToken, School, Classroom, Student, Teacher
+from apis.authentication import TokenAuthentication
+from apis.urls import async_read_urls, router
+from apis.views.v1.student import StudentViewSet
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.test import AsyncClient, override_settings
+from django.urls import include, path
+from rest_framework import status
+from rest_framework.test import APIClient
+from model_bakery import baker
+import asyncio
+import base64
+import pytest
+import time
+
+# The API as routed with API_ASYNC_READS enabled
+urlpatterns = [
+    path("api/v1/", include((async_read_urls(router) + router.urls, "v1"))),
+]
+
+pytestmark = pytest.mark.urls(__name__)
+
+
+@pytest.fixture
+def user(settings):
+    # Keeps Basic authentication from dominating the timings
+    settings.PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+    return User.objects.create_user("reader", password="secret")
+
+
+@pytest.fixture
+def aget(user):
+    credentials = base64.b64encode(b"reader:secret").decode("ascii")
+
+    def do_aget(url, authenticated=True, extra_headers={}, **params):
+        headers = {"Accept": "application/json", **extra_headers}
+        if authenticated:
+            headers["Authorization"] = f"Basic {credentials}"
+        return async_to_sync(AsyncClient().get)(url, params, headers=headers)
+
+    return do_aget
+
+
+@pytest.fixture
+def sget(user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+
+    def do_sget(url, **params):
+        return client.get(url, params, HTTP_ACCEPT="application/json")
+
+    return do_sget
+
+
+@pytest.fixture
+def roster():
+    school = baker.make(School)
+    classrooms = baker.make(Classroom, school=school, _quantity=3)
+    for classroom in classrooms:
+        baker.make(Student, classroom=classroom, _quantity=3)
+    baker.make(Teacher, school=school, classrooms=classrooms[:2])
+    return school
+
+
+@pytest.mark.django_db(transaction=True)
+class TestAsyncRead:
+    def test_if_user_is_anonymous_return_401(self, aget):
+        response = aget("/api/v1/students/", authenticated=False)
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_if_password_is_wrong_return_401(self, aget, user):
+        user.set_password("other")
+        user.save()
+
+        response = aget("/api/v1/students/")
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_if_token_is_valid_return_200(self, aget, user):
+        token, key = tokens.issue(user)
+        headers = {"Authorization": f"Token {key}"}
+
+        response = aget("/api/v1/students/", authenticated=False, extra_headers=headers)
+        tokens.revoke(ApiToken.objects.filter(pk=token.pk))
+        revoked = aget("/api/v1/students/", authenticated=False, extra_headers=headers)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert revoked.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_if_session_is_authenticated_return_200(self, user):
+        client = AsyncClient(headers={"Accept": "application/json"})
+        client.force_login(user)
+
+        response = async_to_sync(client.get)("/api/v1/students/")
+
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_if_viewset_does_not_accept_credentials_return_401(self, aget, monkeypatch):
+        monkeypatch.setattr(
+            StudentViewSet, "authentication_classes", [TokenAuthentication]
+        )
+
+        response = aget("/api/v1/students/")
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    @pytest.mark.parametrize(
+        "url", ["/api/v1/schools/", "/api/v1/classrooms/", "/api/v1/teachers/"]
+    )
+    def test_list_matches_sync_path(self, aget, sget, roster, url):
+        response = aget(url, page_size=2)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.content == sget(url, page_size=2).content
+
+    def test_pages_match_sync_path(self, aget, sget, roster):
+        url = "/api/v1/students/?page_size=4"
+
+        while url is not None:
+            response = aget(url)
+            assert response.content == sget(url).content
+            url = response.json()["next"]
+
+    def test_detail_matches_sync_path(self, aget, sget, roster):
+        teacher = Teacher.objects.get()
+
+        response = aget(f"/api/v1/teachers/{teacher.id}/")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.content == sget(f"/api/v1/teachers/{teacher.id}/").content
+
+    def test_if_detail_is_missing_return_404(self, aget):
+        response = aget("/api/v1/schools/1/")
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_filters_and_fieldsets_are_applied(self, aget, roster):
+        other = baker.make(Teacher)
+
+        response = aget("/api/v1/teachers/", school=other.school_id, fields="id")
+
+        assert response.json()["results"] == [{"id": other.id}]
+
+    def test_if_filter_is_invalid_return_400(self, aget):
+        response = aget("/api/v1/students/", school=999)
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "school" in response.json()
+
+    def test_if_etag_matches_return_304(self, aget, roster):
+        etag = aget("/api/v1/classrooms/")["ETag"]
+
+        response = aget("/api/v1/classrooms/", extra_headers={"If-None-Match": etag})
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_writes_and_actions_reach_the_viewset(self, user, roster):
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        response = client.post(
+            "/api/v1/classrooms/",
+            {"grade": 12, "room": 9, "school_id": roster.id},
+            format="json",
+        )
+        export = client.get("/api/v1/students/export/", {"format": "ndjson"})
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert export.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.benchmark
+@pytest.mark.django_db(transaction=True)
+def test_benchmark_async_against_sync(user):
+    classrooms = baker.make(Classroom, _quantity=10)
+    for classroom in classrooms:
+        baker.make(Student, classroom=classroom, _quantity=50)
+    credentials = base64.b64encode(b"reader:secret").decode("ascii")
+    requests = 50
+
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Basic {credentials}")
+    with override_settings(ROOT_URLCONF="app.urls"):
+        start = time.perf_counter()
+        for _ in range(requests):
+            client.get("/api/v1/students/", HTTP_ACCEPT="application/json")
+        wsgi = time.perf_counter() - start
+
+    async def concurrently():
+        client = AsyncClient()
+        headers = {
+            "Accept": "application/json",
+            "Authorization": f"Basic {credentials}",
+        }
+        return await asyncio.gather(
+            *(client.get("/api/v1/students/", headers=headers) for _ in range(requests))
+        )
+
+    start = time.perf_counter()
+    responses = async_to_sync(concurrently)()
+    asgi = time.perf_counter() - start
+
+    print(f"\n{requests} student pages: WSGI {wsgi:.3f}s, ASGI {asgi:.3f}s")
+    assert all(response.status_code == 200 for response in responses)
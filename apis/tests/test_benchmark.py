@@ -0,0 +1,262 @@
+"""
+End-to-end benchmarks of the list, retrieve, create and patch endpoints on a
+seeded dataset, run with `pytest -m benchmark -s`.
+
+Environment variables:
+
+- `BENCH_TIER`: dataset size, one of TIERS (default "small").
+- `BENCH_ITERATIONS`: timed requests per endpoint (default 30).
+- `BENCH_RESULTS`: where to write the results (default
+  "benchmark-results.json").
+- `BENCH_BASELINE`: results to compare against (default
+  apis/tests/benchmark_baseline.json). An endpoint fails when it runs more
+  queries than its baseline, when its peak memory exceeds the baseline
+  times `BENCH_MEMORY_TOLERANCE` (default 1.5), or when it has no baseline.
+- `BENCH_LATENCY_TOLERANCE`: also fail when the p95 latency exceeds the
+  baseline times this factor. Off by default, as wall-clock baselines only
+  hold on the machine that recorded them.
+- `BENCH_UPDATE_BASELINE=1`: write the results of the tier to the baseline
+  instead of comparing.
+"""
+
+from apis import seeding
+from apis.models import School, Classroom, Student, Teacher
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+from itertools import count
+from pathlib import Path
+import django
+import json
+import os
+import platform
+import statistics
+import time
+import tracemalloc
+import pytest
+
+pytestmark = pytest.mark.benchmark
+
+# Number of schools of each dataset
+TIERS = {"small": 10, "medium": 1_000, "large": 10_000}
+CLASSROOMS_PER_SCHOOL = 12
+TEACHERS_PER_SCHOOL = 12
+STUDENTS_PER_CLASSROOM = 25
+
+BASELINE = Path(__file__).with_name("benchmark_baseline.json")
+
+# Requests whose peak memory is measured
+MEMORY_SAMPLES = 5
+
+RESOURCES = ["schools", "classrooms", "teachers", "students"]
+ACTIONS = ["list", "retrieve", "create", "patch"]
+
+# Unique names across the requests of a session
+sequence = count(1)
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+@pytest.fixture(scope="module")
+def tier():
+    return os.environ.get("BENCH_TIER", "small")
+
+
+@pytest.fixture(scope="module")
+def dataset(tier, django_db_setup, django_db_blocker):
+    with django_db_blocker.unblock():
+        start = time.perf_counter()
+        seeding.seed(
+            TIERS[tier],
+            classrooms=CLASSROOMS_PER_SCHOOL,
+            teachers=TEACHERS_PER_SCHOOL,
+            students=STUDENTS_PER_CLASSROOM,
+        )
+        print(f"\nseeded {tier} in {time.perf_counter() - start:.1f}s")
+        # Sample of the primary keys to retrieve and patch
+        dataset = {
+            resource: list(
+                model.objects.order_by("?").values_list("pk", flat=True)[:1_000]
+            )
+            for resource, model in zip(RESOURCES, (School, Classroom, Teacher, Student))
+        }
+        dataset["classroom_places"] = {
+            pk: (grade, room)
+            for pk, grade, room in Classroom.objects.filter(
+                pk__in=dataset["classrooms"][:500]
+            ).values_list("pk", "grade", "room")
+        }
+        # (school, grade, room) of classrooms that can still be created
+        taken = set(
+            Classroom.objects.filter(school__in=dataset["schools"][:10]).values_list(
+                "school", "grade", "room"
+            )
+        )
+        dataset["free_places"] = [
+            (school, grade, room)
+            for school in dataset["schools"][:10]
+            for grade, room in seeding.CLASSROOM_PAIRS
+            if (school, grade, room) not in taken
+        ]
+        yield dataset
+        call_command("flush", interactive=False, verbosity=0)
+
+
+@pytest.fixture(scope="module")
+def results(tier, dataset):
+    results = {}
+    yield results
+    path = os.environ.get("BENCH_RESULTS", "benchmark-results.json")
+    Path(path).write_text(
+        json.dumps(
+            {
+                "tier": tier,
+                "schools": TIERS[tier],
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "results": results,
+            },
+            indent=2,
+        )
+    )
+    if os.environ.get("BENCH_UPDATE_BASELINE"):
+        baseline = json.loads(BASELINE.read_text()) if BASELINE.exists() else {}
+        baseline[tier] = results
+        BASELINE.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+
+
+@pytest.fixture(scope="module")
+def baseline(tier):
+    """The baseline of the tier, None when recording it."""
+    if os.environ.get("BENCH_UPDATE_BASELINE"):
+        return None
+    path = Path(os.environ.get("BENCH_BASELINE", BASELINE))
+    baselines = json.loads(path.read_text()) if path.exists() else {}
+    if tier not in baselines:
+        pytest.fail(
+            f"No {tier} baseline in {path}, record one with BENCH_UPDATE_BASELINE=1."
+        )
+    return baselines[tier]
+
+
+@pytest.fixture
+def api_client():
+    client = APIClient(HTTP_ACCEPT="application/json")
+    client.force_authenticate(user=User(is_staff=True))
+    return client
+
+
+def make_request(api_client, dataset, resource, action):
+    """Returns a function doing the `action` request on `resource`."""
+    ids = dataset[resource]
+    schools = dataset["schools"]
+    classrooms = dataset["classrooms"]
+    free_places = list(dataset["free_places"])
+    url = f"/api/v1/{resource}/"
+
+    def create_payload(n):
+        if resource == "schools":
+            return {"name": f"Bench {n}", "alias": f"B{n}", "address": "Road"}
+        if resource == "classrooms":
+            school, grade, room = free_places.pop()
+            return {"grade": grade, "room": room, "school_id": school}
+        if resource == "teachers":
+            return {
+                "first_name": f"Bench{n}",
+                "last_name": "Teacher",
+                "gender": "F",
+                "school_id": schools[n % len(schools)],
+            }
+        return {
+            "first_name": f"Bench{n}",
+            "last_name": "Student",
+            "gender": "M",
+            "classroom_id": classrooms[n % len(classrooms)],
+        }
+
+    def patch_payload(pk):
+        # Leaves unique constraints satisfied
+        if resource == "schools":
+            return {"address": "Patched Road"}
+        if resource == "classrooms":
+            grade, room = dataset["classroom_places"][pk]
+            return {"grade": grade, "room": room}
+        return {"gender": "O"}
+
+    if resource == "classrooms":
+        ids = list(dataset["classroom_places"])
+
+    def do_request():
+        n = next(sequence)
+        if action == "list":
+            return api_client.get(url)
+        if action == "retrieve":
+            return api_client.get(f"{url}{ids[n % len(ids)]}/")
+        if action == "create":
+            return api_client.post(url, create_payload(n), format="json")
+        pk = ids[n % len(ids)]
+        return api_client.patch(f"{url}{pk}/", patch_payload(pk), format="json")
+
+    return do_request
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("action", ACTIONS)
+@pytest.mark.parametrize("resource", RESOURCES)
+def test_endpoint(api_client, dataset, results, baseline, resource, action):
+    do_request = make_request(api_client, dataset, resource, action)
+    iterations = int(os.environ.get("BENCH_ITERATIONS", 30))
+    expected = status.HTTP_201_CREATED if action == "create" else status.HTTP_200_OK
+    for _ in range(3):
+        assert do_request().status_code == expected
+
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        response = do_request()
+        latencies.append(time.perf_counter() - start)
+        assert response.status_code == expected, response.content
+    with CaptureQueriesContext(connection) as queries:
+        do_request()
+    # Counted now, the next request clears the query log
+    query_count = len(queries)
+    # Median of a few requests, one-off allocations make single peaks noisy
+    peaks = []
+    for _ in range(MEMORY_SAMPLES):
+        tracemalloc.start()
+        try:
+            do_request()
+            peaks.append(tracemalloc.get_traced_memory()[1])
+        finally:
+            tracemalloc.stop()
+    peak = statistics.median(peaks)
+
+    name = f"{resource}-{action}"
+    result = results[name] = {
+        "p50_ms": round(statistics.median(latencies) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "queries": query_count,
+        "peak_memory_kb": round(peak / 1024, 1),
+    }
+    print(
+        f"\n{name}: p50={result['p50_ms']}ms p95={result['p95_ms']}ms "
+        f"queries={result['queries']} peak={result['peak_memory_kb']}KB"
+    )
+
+    if baseline is None:
+        return
+    if name not in baseline:
+        pytest.fail(f"No baseline for {name}, record one with BENCH_UPDATE_BASELINE=1.")
+    reference = baseline[name]
+    memory_tolerance = float(os.environ.get("BENCH_MEMORY_TOLERANCE", 1.5))
+    assert result["queries"] <= reference["queries"]
+    assert result["peak_memory_kb"] <= reference["peak_memory_kb"] * memory_tolerance
+    latency_tolerance = os.environ.get("BENCH_LATENCY_TOLERANCE")
+    if latency_tolerance:
+        assert result["p95_ms"] <= reference["p95_ms"] * float(latency_tolerance)
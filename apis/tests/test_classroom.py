@@ -6,8 +6,8 @@ import pytest
 
 @pytest.fixture
 def list_classrooms(api_client):
-    def do_list_classrooms():
-        return api_client.get("/api/v1/classrooms/")
+    def do_list_classrooms(**params):
+        return api_client.get("/api/v1/classrooms/", params)
 
     return do_list_classrooms
 
@@ -20,6 +20,14 @@ def get_classroom(api_client):
     return do_get_classroom
 
 
+@pytest.fixture
+def list_classroom_students(api_client):
+    def do_list_classroom_students(id=1, **params):
+        return api_client.get(f"/api/v1/classrooms/{id}/students/", params)
+
+    return do_list_classroom_students
+
+
 @pytest.fixture
 def create_classroom(api_client):
     def do_create_classroom(classroom):
@@ -70,7 +78,7 @@ class TestListClassrooms:
         response = list_classrooms()
 
         assert response.status_code == status.HTTP_200_OK
-        assert response.data[0] == {
+        assert response.data["results"][0] == {
             "id": classroom.id,
             "grade": classroom.grade,
             "room": classroom.room,
@@ -80,10 +88,34 @@ class TestListClassrooms:
                 "alias": school.alias,
                 "address": school.address,
             },
-            "students": [],
-            "teachers": [],
+            "students_count": 0,
+            "teachers_count": 0,
         }
 
+    def test_if_students_registered_in_classroom_return_counts(
+        self, authenticate, list_classrooms
+    ):
+        authenticate()
+        school = baker.make(School)
+        classroom = baker.make(Classroom, school=school)
+        baker.make(Student, classroom=classroom, _quantity=3)
+        baker.make(Teacher, school=school, classrooms=[classroom])
+
+        response = list_classrooms()
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["results"][0]["students_count"] == 3
+        assert response.data["results"][0]["teachers_count"] == 1
+        assert "students" not in response.data["results"][0]
+        assert "teachers" not in response.data["results"][0]
+
+    def test_if_expand_is_unknown_return_400(self, authenticate, list_classrooms):
+        authenticate()
+
+        response = list_classrooms(expand="school")
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
     def test_if_teachers_registered_in_classroom_return_teachers_details(
         self, authenticate, list_classrooms
     ):
@@ -93,9 +125,9 @@ class TestListClassrooms:
         teacher1 = baker.make(Teacher, school=school, classrooms=[classroom])
         teacher2 = baker.make(Teacher, school=school, classrooms=[classroom])
 
-        response = list_classrooms()
+        response = list_classrooms(expand="teachers")
 
-        response_teachers = response.data[0]["teachers"]
+        response_teachers = response.data["results"][0]["teachers"]
         assert_teachers = [
             {
                 "id": teacher1.id,
@@ -111,7 +143,7 @@ class TestListClassrooms:
             },
         ]
         assert response.status_code == status.HTTP_200_OK
-        assert isinstance(response.data[0]["teachers"], list)
+        assert isinstance(response.data["results"][0]["teachers"], list)
         assert {frozenset(item.items()) for item in response_teachers} == {
             frozenset(item.items()) for item in assert_teachers
         }
@@ -125,9 +157,9 @@ class TestListClassrooms:
         student1 = baker.make(Student, classroom=classroom)
         student2 = baker.make(Student, classroom=classroom)
 
-        response = list_classrooms()
+        response = list_classrooms(expand="students")
 
-        response_students = response.data[0]["students"]
+        response_students = response.data["results"][0]["students"]
         assert_students = [
             {
                 "id": student1.id,
@@ -143,12 +175,64 @@ class TestListClassrooms:
             },
         ]
         assert response.status_code == status.HTTP_200_OK
-        assert isinstance(response.data[0]["students"], list)
+        assert isinstance(response.data["results"][0]["students"], list)
         assert {frozenset(item.items()) for item in response_students} == {
             frozenset(item.items()) for item in assert_students
         }
 
 
+@pytest.mark.django_db
+class TestListClassroomStudents:
+    def test_if_user_is_anonymous_return_401(self, list_classroom_students):
+        response = list_classroom_students()
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_if_classroom_not_found_return_404(
+        self, authenticate, list_classroom_students
+    ):
+        authenticate()
+
+        response = list_classroom_students()
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_if_pk_is_not_a_number_return_404(
+        self, authenticate, list_classroom_students
+    ):
+        authenticate()
+
+        response = list_classroom_students("abc")
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    @pytest.mark.parametrize("fast_read", [True, False])
+    def test_if_students_exist_return_pages(
+        self, authenticate, list_classroom_students, settings, fast_read
+    ):
+        authenticate()
+        settings.API_FAST_READ = fast_read
+        classroom = baker.make(Classroom)
+        students = baker.make(Student, classroom=classroom, _quantity=3)
+        baker.make(Student)
+
+        response = list_classroom_students(classroom.id, page_size=2)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data["results"]) == 2
+        assert response.data["next"] is not None
+        assert set(response.data["results"][0]) == {
+            "id",
+            "first_name",
+            "last_name",
+            "gender",
+        }
+        response = list_classroom_students(classroom.id, page_size=10)
+        assert sorted(row["id"] for row in response.data["results"]) == sorted(
+            student.id for student in students
+        )
+
+
 @pytest.mark.django_db
 class TestRetrieveClassroom:
     def test_if_user_is_anonymous_return_401(self, get_classroom):
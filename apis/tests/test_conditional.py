@@ -0,0 +1,176 @@
+from apis import versioning
+from apis.models import School, Classroom, Student, Teacher
+from apis.serializers.classroom import ClassroomSerializer
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from model_bakery import baker
+import pytest
+
+
+@pytest.fixture
+def get(api_client):
+    def do_get(url, etag=None, **params):
+        headers = {"HTTP_ACCEPT": "application/json"}
+        if etag:
+            headers["HTTP_IF_NONE_MATCH"] = etag
+        return api_client.get(url, params, **headers)
+
+    return do_get
+
+
+@pytest.mark.django_db
+class TestConditionalGet:
+    def test_if_list_is_fetched_return_etag(self, authenticate, get):
+        authenticate()
+
+        response = get("/api/v1/classrooms/")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response["ETag"].startswith('"')
+
+    def test_if_etag_matches_return_304(self, authenticate, get):
+        authenticate()
+        baker.make(Classroom)
+        etag = get("/api/v1/classrooms/")["ETag"]
+
+        response = get("/api/v1/classrooms/", etag=etag)
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response["ETag"] == etag
+        assert not response.content
+
+    def test_if_etag_matches_skip_query_and_serializer(
+        self, authenticate, get, django_assert_num_queries, monkeypatch
+    ):
+        authenticate()
+        baker.make(Classroom)
+        etag = get("/api/v1/classrooms/")["ETag"]
+
+        def fail(*args, **kwargs):
+            raise AssertionError("serializer built for a 304")
+
+        monkeypatch.setattr(ClassroomSerializer, "__init__", fail)
+        with django_assert_num_queries(1):
+            response = get("/api/v1/classrooms/", etag=etag)
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_if_detail_etag_matches_return_304(self, authenticate, get):
+        authenticate()
+        teacher = baker.make(Teacher)
+        etag = get(f"/api/v1/teachers/{teacher.id}/")["ETag"]
+
+        response = get(f"/api/v1/teachers/{teacher.id}/", etag=etag)
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_if_query_differs_etag_differs(self, authenticate, get):
+        authenticate()
+
+        response1 = get("/api/v1/teachers/", page_size=1)
+        response2 = get("/api/v1/teachers/", page_size=2)
+
+        assert response1["ETag"] != response2["ETag"]
+
+    def test_if_row_is_saved_etag_changes(
+        self, authenticate, get, django_capture_on_commit_callbacks
+    ):
+        authenticate()
+        classroom = baker.make(Classroom)
+        etag = get("/api/v1/classrooms/")["ETag"]
+
+        with django_capture_on_commit_callbacks(execute=True):
+            classroom.room += 1
+            classroom.save()
+        response = get("/api/v1/classrooms/", etag=etag)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response["ETag"] != etag
+
+    def test_if_counted_row_changes_parent_etag_changes(
+        self, authenticate, get, django_capture_on_commit_callbacks
+    ):
+        authenticate()
+        school = baker.make(School)
+        etag = get(f"/api/v1/schools/{school.id}/")["ETag"]
+
+        with django_capture_on_commit_callbacks(execute=True):
+            baker.make(Student, classroom=baker.make(Classroom, school=school))
+        response = get(f"/api/v1/schools/{school.id}/", etag=etag)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["students_count"] == 1
+
+    def test_if_classrooms_are_assigned_etag_changes(
+        self, authenticate, get, django_capture_on_commit_callbacks
+    ):
+        authenticate()
+        school = baker.make(School)
+        classroom = baker.make(Classroom, school=school)
+        teacher = baker.make(Teacher, school=school)
+        etag = get("/api/v1/teachers/")["ETag"]
+
+        with django_capture_on_commit_callbacks(execute=True):
+            teacher.classrooms.add(classroom)
+        response = get("/api/v1/teachers/", etag=etag)
+
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_if_students_are_bulk_created_etag_changes(
+        self, authenticate, get, api_client
+    ):
+        authenticate(is_staff=True)
+        classroom = baker.make(Classroom)
+        etag = get("/api/v1/students/")["ETag"]
+
+        api_client.post(
+            "/api/v1/students/bulk/",
+            [
+                {
+                    "first_name": "a",
+                    "last_name": "b",
+                    "gender": "M",
+                    "classroom_id": classroom.id,
+                }
+            ],
+            format="json",
+        )
+        response = get("/api/v1/students/", etag=etag)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data["results"]) == 1
+
+    def test_browsable_api_is_not_tagged(self, authenticate, api_client):
+        authenticate()
+
+        response = api_client.get("/api/v1/classrooms/", HTTP_ACCEPT="text/html")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert not response.has_header("ETag")
+
+    def test_if_user_is_anonymous_return_401(self, get):
+        response = get("/api/v1/classrooms/", etag="*")
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+class TestVersions:
+    def test_if_cascade_commits_each_version_is_bumped_once(
+        self, django_capture_on_commit_callbacks
+    ):
+        classroom = baker.make(Classroom)
+        baker.make(Student, classroom=classroom, _quantity=60)
+        with django_capture_on_commit_callbacks(execute=True):
+            pass
+        before = versioning.get_versions(Classroom, Student)
+
+        with CaptureQueriesContext(connection) as queries:
+            with django_capture_on_commit_callbacks(execute=True):
+                classroom.delete()
+
+        version_queries = [q for q in queries if "apis_tableversion" in q["sql"]]
+        assert len(version_queries) == 1
+        after = versioning.get_versions(Classroom, Student)
+        assert after == {name: version + 1 for name, version in before.items()}
@@ -0,0 +1,202 @@
+from apis.models import School, Classroom, Student, Teacher
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from model_bakery import baker
+import pytest
+
+
+def counts(obj):
+    obj.refresh_from_db()
+    if isinstance(obj, School):
+        return (obj.classrooms_count, obj.students_count, obj.teachers_count)
+    return (obj.students_count, obj.teachers_count)
+
+
+@pytest.mark.django_db
+class TestStudentCounters:
+    def test_if_student_is_created_counters_increase(self):
+        classroom = baker.make(Classroom)
+
+        baker.make(Student, classroom=classroom, _quantity=2)
+
+        assert counts(classroom) == (2, 0)
+        assert counts(classroom.school) == (1, 2, 0)
+
+    def test_if_student_is_deleted_counters_decrease(self):
+        classroom = baker.make(Classroom)
+        student = baker.make(Student, classroom=classroom)
+
+        student.delete()
+
+        assert counts(classroom) == (0, 0)
+        assert counts(classroom.school) == (1, 0, 0)
+
+    def test_if_student_moves_classroom_counters_follow(self):
+        classroom1 = baker.make(Classroom)
+        classroom2 = baker.make(Classroom)
+        student = baker.make(Student, classroom=classroom1)
+
+        student = Student.objects.get(pk=student.pk)
+        student.classroom = classroom2
+        student.save()
+
+        assert counts(classroom1) == (0, 0)
+        assert counts(classroom2) == (1, 0)
+        assert counts(classroom1.school) == (1, 0, 0)
+        assert counts(classroom2.school) == (1, 1, 0)
+
+    def test_if_unloaded_student_moves_classroom_counters_follow(self):
+        classroom1 = baker.make(Classroom)
+        classroom2 = baker.make(Classroom)
+        student = baker.make(Student, classroom=classroom1)
+
+        Student(
+            pk=student.pk,
+            first_name=student.first_name,
+            last_name=student.last_name,
+            gender=student.gender,
+            classroom=classroom2,
+        ).save()
+
+        assert counts(classroom1) == (0, 0)
+        assert counts(classroom2) == (1, 0)
+
+
+@pytest.mark.django_db
+class TestTeacherCounters:
+    def test_if_teacher_is_created_school_counter_increases(self):
+        school = baker.make(School)
+
+        baker.make(Teacher, school=school)
+
+        assert counts(school) == (0, 0, 1)
+
+    def test_if_teacher_moves_school_counters_follow(self):
+        school1 = baker.make(School)
+        school2 = baker.make(School)
+        teacher = baker.make(Teacher, school=school1)
+
+        teacher.school = school2
+        teacher.save()
+
+        assert counts(school1) == (0, 0, 0)
+        assert counts(school2) == (0, 0, 1)
+
+    def test_if_classrooms_are_added_and_removed_counters_follow(self):
+        school = baker.make(School)
+        classroom1, classroom2 = baker.make(Classroom, school=school, _quantity=2)
+        teacher = baker.make(Teacher, school=school)
+
+        teacher.classrooms.add(classroom1, classroom2)
+        teacher.classrooms.add(classroom1)
+        assert counts(classroom1) == (0, 1)
+        assert counts(classroom2) == (0, 1)
+
+        teacher.classrooms.remove(classroom1)
+        assert counts(classroom1) == (0, 0)
+        assert counts(classroom2) == (0, 1)
+
+        teacher.classrooms.clear()
+        assert counts(classroom2) == (0, 0)
+
+    def test_if_teachers_are_added_from_classroom_counter_follows(self):
+        school = baker.make(School)
+        classroom = baker.make(Classroom, school=school)
+        teachers = baker.make(Teacher, school=school, _quantity=3)
+
+        classroom.teachers.add(*teachers)
+        assert counts(classroom) == (0, 3)
+
+        classroom.teachers.clear()
+        assert counts(classroom) == (0, 0)
+
+    def test_if_teacher_is_deleted_counters_decrease(self):
+        school = baker.make(School)
+        classroom = baker.make(Classroom, school=school)
+        teacher = baker.make(Teacher, school=school, classrooms=[classroom])
+
+        teacher.delete()
+
+        assert counts(classroom) == (0, 0)
+        assert counts(school) == (1, 0, 0)
+
+
+@pytest.mark.django_db
+class TestClassroomCounters:
+    def test_if_classroom_is_deleted_school_counters_decrease(self):
+        school = baker.make(School)
+        classroom = baker.make(Classroom, school=school)
+        baker.make(Classroom, school=school)
+        baker.make(Student, classroom=classroom, _quantity=3)
+
+        classroom.delete()
+
+        assert counts(school) == (1, 0, 0)
+
+    def test_if_classroom_is_deleted_counters_are_updated_once(self):
+        school = baker.make(School)
+        classroom = baker.make(Classroom, school=school)
+        baker.make(Student, classroom=classroom, _quantity=60)
+
+        with CaptureQueriesContext(connection) as queries:
+            classroom.delete()
+
+        counter_updates = [
+            query
+            for query in queries
+            if query["sql"].startswith(
+                ('UPDATE "apis_school"', 'UPDATE "apis_classroom"')
+            )
+        ]
+        assert len(counter_updates) == 1
+        assert counts(school) == (0, 0, 0)
+
+    def test_if_classrooms_are_deleted_in_bulk_school_counters_decrease(self):
+        school = baker.make(School)
+        classrooms = baker.make(Classroom, school=school, _quantity=2)
+        baker.make(Classroom, school=school)
+        for classroom in classrooms:
+            baker.make(Student, classroom=classroom, _quantity=2)
+
+        Classroom.objects.filter(pk__in=[c.pk for c in classrooms]).delete()
+
+        assert counts(school) == (1, 0, 0)
+
+    def test_if_classroom_moves_school_counters_follow(self):
+        school1 = baker.make(School)
+        school2 = baker.make(School)
+        classroom = baker.make(Classroom, school=school1)
+        baker.make(Student, classroom=classroom, _quantity=2)
+
+        classroom.school = school2
+        classroom.save()
+
+        assert counts(school1) == (0, 0, 0)
+        assert counts(school2) == (1, 2, 0)
+
+
+@pytest.mark.django_db
+class TestReconcileCounters:
+    def test_if_counters_drifted_command_recomputes_them(self):
+        school = baker.make(School)
+        classroom = baker.make(Classroom, school=school)
+        baker.make(Student, classroom=classroom, _quantity=2)
+        baker.make(Teacher, school=school, classrooms=[classroom])
+        School.objects.update(classrooms_count=7, students_count=7, teachers_count=7)
+        Classroom.objects.update(students_count=7, teachers_count=7)
+
+        call_command("reconcile_counters")
+
+        assert counts(school) == (1, 2, 1)
+        assert counts(classroom) == (2, 1)
+
+    def test_if_school_is_given_only_that_school_is_recomputed(self):
+        school1 = baker.make(School)
+        school2 = baker.make(School)
+        School.objects.update(classrooms_count=7)
+
+        call_command("reconcile_counters", "--school", str(school1.pk))
+
+        assert counts(school1) == (0, 0, 0)
+        assert counts(school2) == (7, 0, 0)
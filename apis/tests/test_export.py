@@ -0,0 +1,110 @@
+from apis.models import School, Classroom, Student, Teacher
+from apis.serializers.student import StudentSerializer
+from django.http import StreamingHttpResponse
+from rest_framework import status
+from model_bakery import baker
+import csv
+import io
+import json
+import pytest
+
+
+@pytest.fixture
+def export(api_client):
+    def do_export(resource, export_format, **params):
+        return api_client.get(
+            f"/api/v1/{resource}/export/", {"format": export_format, **params}
+        )
+
+    return do_export
+
+
+def read(response):
+    return b"".join(response.streaming_content).decode("utf-8")
+
+
+@pytest.mark.django_db
+class TestExport:
+    def test_if_user_is_anonymous_return_401(self, export):
+        response = export("students", "csv")
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_if_format_is_unknown_return_404(self, authenticate, export):
+        authenticate()
+
+        response = export("students", "xml")
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_if_students_are_exported_as_csv_return_rows(self, authenticate, export):
+        authenticate()
+        classroom = baker.make(Classroom)
+        student = baker.make(Student, classroom=classroom)
+
+        response = export("students", "csv")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert isinstance(response, StreamingHttpResponse)
+        assert response["Content-Type"] == "text/csv"
+        assert list(csv.DictReader(io.StringIO(read(response)))) == [
+            {
+                "id": str(student.id),
+                "first_name": student.first_name,
+                "last_name": student.last_name,
+                "gender": student.gender,
+                "classroom_id": str(classroom.id),
+                "classroom_grade": str(classroom.grade),
+                "classroom_room": str(classroom.room),
+                "school_id": str(classroom.school.id),
+                "school_name": classroom.school.name,
+            }
+        ]
+
+    def test_if_students_are_exported_as_ndjson_return_lines(
+        self, authenticate, export
+    ):
+        authenticate()
+        students = baker.make(Student, _quantity=3)
+
+        response = export("students", "ndjson")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response["Content-Type"] == "application/x-ndjson"
+        lines = [json.loads(line) for line in read(response).splitlines()]
+        assert sorted(line["id"] for line in lines) == sorted(s.id for s in students)
+
+    def test_export_honors_filters(self, authenticate, export):
+        authenticate()
+        school = baker.make(School)
+        teacher = baker.make(Teacher, school=school)
+        baker.make(Teacher)
+
+        response = export("teachers", "ndjson", school=school.id)
+
+        lines = [json.loads(line) for line in read(response).splitlines()]
+        assert [line["id"] for line in lines] == [teacher.id]
+
+    def test_export_does_not_build_serializers(self, authenticate, export, monkeypatch):
+        authenticate()
+        baker.make(Student, _quantity=3)
+
+        def fail(*args, **kwargs):
+            raise AssertionError("serializer built during export")
+
+        monkeypatch.setattr(StudentSerializer, "__init__", fail)
+        response = export("students", "csv")
+
+        assert len(read(response).splitlines()) == 4
+
+    def test_if_classrooms_are_exported_return_counters(self, authenticate, export):
+        authenticate()
+        classroom = baker.make(Classroom)
+        baker.make(Student, classroom=classroom, _quantity=2)
+
+        response = export("classrooms", "ndjson")
+
+        line = json.loads(read(response))
+        assert line["id"] == classroom.id
+        assert line["students_count"] == 2
+        assert line["teachers_count"] == 0
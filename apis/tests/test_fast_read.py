@@ -0,0 +1,151 @@
+from apis.models import School, Classroom, Student, Teacher
+from apis.serializers.rows import RowBuilder
+from apis.serializers.student import StudentSerializer
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from model_bakery import baker
+import pytest
+import time
+
+
+@pytest.fixture
+def roster():
+    schools = baker.make(School, _quantity=2)
+    for school in schools:
+        classrooms = [
+            baker.make(Classroom, school=school, grade=grade, room=room)
+            for grade in (1, 2)
+            for room in (1, 2)
+        ]
+        for index, classroom in enumerate(classrooms):
+            baker.make(Student, classroom=classroom, _quantity=index + 1)
+        teachers = baker.make(Teacher, school=school, _quantity=3)
+        teachers[0].classrooms.add(*classrooms)
+        teachers[1].classrooms.add(classrooms[0])
+    baker.make(Classroom, school=schools[0], grade=3, room=1)
+
+
+@pytest.fixture
+def compare(api_client, settings):
+    def do_compare(url, **params):
+        """Returns the (serializer, fast path) responses of the same request."""
+        responses = []
+        for fast_read in (False, True):
+            settings.API_FAST_READ = fast_read
+            responses.append(
+                api_client.get(url, params, HTTP_ACCEPT="application/json")
+            )
+        return responses
+
+    return do_compare
+
+
+@pytest.mark.django_db
+class TestFastReadParity:
+    @pytest.mark.parametrize(
+        "resource", ["schools", "classrooms", "teachers", "students"]
+    )
+    def test_list_is_byte_identical(self, authenticate, roster, compare, resource):
+        authenticate()
+
+        slow, fast = compare(f"/api/v1/{resource}/")
+
+        assert fast.status_code == status.HTTP_200_OK
+        assert len(fast.data["results"]) > 1
+        assert fast.content == slow.content
+
+    @pytest.mark.parametrize(
+        "resource", ["schools", "classrooms", "teachers", "students"]
+    )
+    def test_pages_are_byte_identical(self, authenticate, roster, compare, resource):
+        authenticate()
+        url = f"/api/v1/{resource}/?page_size=2"
+
+        while url is not None:
+            slow, fast = compare(url)
+            assert fast.content == slow.content
+            url = fast.data["next"]
+
+    @pytest.mark.parametrize(
+        "model, resource",
+        [
+            (School, "schools"),
+            (Classroom, "classrooms"),
+            (Teacher, "teachers"),
+            (Student, "students"),
+        ],
+    )
+    def test_detail_is_byte_identical(
+        self, authenticate, roster, compare, model, resource
+    ):
+        authenticate()
+
+        for pk in model.objects.values_list("pk", flat=True):
+            slow, fast = compare(f"/api/v1/{resource}/{pk}/")
+            assert fast.content == slow.content
+
+    def test_filtered_list_is_byte_identical(self, authenticate, roster, compare):
+        authenticate()
+        school = School.objects.first()
+
+        slow, fast = compare("/api/v1/teachers/", school=school.id)
+
+        assert fast.content == slow.content
+
+    def test_if_detail_is_missing_return_404(self, authenticate, compare):
+        authenticate()
+
+        slow, fast = compare("/api/v1/teachers/1/")
+
+        assert fast.status_code == slow.status_code == status.HTTP_404_NOT_FOUND
+
+    @pytest.mark.parametrize(
+        "resource", ["schools", "classrooms", "teachers", "students"]
+    )
+    def test_if_pk_is_not_a_number_return_404(self, authenticate, compare, resource):
+        authenticate()
+
+        slow, fast = compare(f"/api/v1/{resource}/abc/")
+
+        assert fast.status_code == slow.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_list_does_not_build_serializers(
+        self, authenticate, roster, api_client, monkeypatch
+    ):
+        authenticate()
+        # Row builders are compiled when the URLconf is first loaded
+        api_client.get("/api/v1/students/", HTTP_ACCEPT="application/json")
+
+        def fail(*args, **kwargs):
+            raise AssertionError("serializer built on the fast path")
+
+        monkeypatch.setattr(StudentSerializer, "__init__", fail)
+        response = api_client.get("/api/v1/students/", HTTP_ACCEPT="application/json")
+
+        assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.benchmark
+@pytest.mark.django_db
+def test_benchmark_row_builder_against_serializer():
+    classrooms = baker.make(Classroom, _quantity=20)
+    for classroom in classrooms:
+        baker.make(Student, classroom=classroom, _quantity=100)
+    queryset = Student.objects.select_related("classroom", "classroom__school")
+    builder = RowBuilder(StudentSerializer)
+    renderer = JSONRenderer()
+
+    def timed(build):
+        start = time.perf_counter()
+        content = renderer.render(build())
+        return time.perf_counter() - start, content
+
+    slow, slow_content = timed(lambda: StudentSerializer(queryset, many=True).data)
+    fast, fast_content = timed(
+        lambda: builder.build_many(queryset.values_list(*builder.columns))
+    )
+
+    print(f"\n2000 students: serializer {slow:.3f}s, row builder {fast:.3f}s")
+    print(f"speedup x{slow / fast:.1f}")
+    assert fast_content == slow_content
+    assert fast < slow
@@ -0,0 +1,115 @@
+from apis.models import Classroom
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from model_bakery import baker
+import pytest
+
+# (query string, table filtered, index expected to serve it). None only asks
+# for an index, e.g. the full name constraint walked in list order.
+FILTERS = [
+    ("schools/?name__iexact=thai", "apis_school", "school_name_ci"),
+    ("classrooms/?school={school}", "apis_classroom", "apis_classroom_school_id"),
+    ("students/?first_name__iexact=pim", "apis_student", "student_first_name_ci"),
+    ("students/?last_name__iexact=srisuk", "apis_student", "student_last_name_ci"),
+    ("students/?gender__iexact=m", "apis_student", None),
+    ("students/?classroom={classroom}", "apis_student", "apis_student_classroom_id"),
+    ("students/?school={school}", "apis_student", "apis_student_classroom_id"),
+    (
+        "students/?classroom={classroom}&last_name__iexact=srisuk",
+        "apis_student",
+        "student_classroom_last_ci",
+    ),
+    (
+        "students/?classroom={classroom}&gender__iexact=f",
+        "apis_student",
+        "student_classroom_gender_ci",
+    ),
+    (
+        "students/?school={school}&gender__iexact=f",
+        "apis_student",
+        "student_classroom_gender_ci",
+    ),
+    ("teachers/?first_name__iexact=suda", "apis_teacher", "teacher_first_name_ci"),
+    ("teachers/?last_name__iexact=boonmee", "apis_teacher", "teacher_last_name_ci"),
+    ("teachers/?gender__iexact=m", "apis_teacher", None),
+    ("teachers/?school={school}", "apis_teacher", "apis_teacher_school_id"),
+    (
+        "teachers/?school={school}&gender__iexact=m",
+        "apis_teacher",
+        "teacher_school_gender_ci",
+    ),
+    (
+        "teachers/?classrooms={classroom}",
+        "apis_teacher_classrooms",
+        "apis_teacher_classrooms",
+    ),
+]
+
+
+# Table of the page query of each resource
+TABLES = {
+    "schools": "apis_school",
+    "classrooms": "apis_classroom",
+    "students": "apis_student",
+    "teachers": "apis_teacher",
+}
+
+
+def query_plan(sql):
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+        return [row[-1] for row in cursor.fetchall()]
+
+
+@pytest.mark.django_db
+class TestFilterIndexes:
+    """
+    `icontains` filters are left out: a LIKE pattern starting with `%`
+    cannot use a B-tree index.
+    """
+
+    @pytest.mark.parametrize("query, table, index", FILTERS)
+    def test_list_filter_uses_index(
+        self, authenticate, api_client, query, table, index
+    ):
+        authenticate()
+        classroom = baker.make(Classroom)
+        query = query.format(school=classroom.school_id, classroom=classroom.pk)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.get(
+                f"/api/v1/{query}", HTTP_ACCEPT="application/json"
+            )
+
+        assert response.status_code == status.HTTP_200_OK
+        # The page query
+        page_table = TABLES[query.split("/")[0]]
+        (sql,) = [
+            captured["sql"]
+            for captured in queries
+            if f'FROM "{page_table}"' in captured["sql"] and "LIMIT" in captured["sql"]
+        ]
+        steps = [step for step in query_plan(sql) if step.split()[1:2] == [table]]
+        assert steps, query_plan(sql)
+        for step in steps:
+            assert "USING INDEX" in step or "USING COVERING INDEX" in step, step
+            if index is not None:
+                assert index in step, step
+
+    def test_iexact_is_case_insensitive(self, authenticate, api_client):
+        authenticate()
+        api_client.post(
+            "/api/v1/schools/",
+            {"name": "Thai School", "alias": "TS", "address": "Bangkok"},
+            format="json",
+        )
+
+        response = api_client.get(
+            "/api/v1/schools/?name__iexact=tHAI school",
+            HTTP_ACCEPT="application/json",
+        )
+
+        assert [school["name"] for school in response.data["results"]] == [
+            "Thai School"
+        ]
@@ -0,0 +1,168 @@
+from apis import counters
+from apis.models import School, Classroom, Student, Teacher
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from model_bakery import baker
+import io
+import pytest
+
+HEADER = "role,first_name,last_name,gender,school,grade,room\n"
+
+
+@pytest.fixture
+def import_roster(tmp_path):
+    def do_import_roster(content, *args):
+        path = tmp_path / "roster.csv"
+        path.write_text(content, encoding="utf-8")
+        stdout, stderr = io.StringIO(), io.StringIO()
+        call_command("import_roster", str(path), *args, stdout=stdout, stderr=stderr)
+        return stdout.getvalue(), stderr.getvalue()
+
+    return do_import_roster
+
+
+@pytest.fixture
+def school():
+    school = baker.make(School, alias="WAT1")
+    baker.make(Classroom, school=school, grade=1, room=1)
+    baker.make(Classroom, school=school, grade=1, room=2)
+    return school
+
+
+def assert_counters_are_consistent():
+    counts = lambda: (  # noqa: E731
+        list(School.objects.values_list("pk", "students_count", "teachers_count")),
+        list(Classroom.objects.values_list("pk", "students_count", "teachers_count")),
+    )
+    before = counts()
+    counters.recount_classrooms()
+    counters.recount_schools()
+    assert counts() == before
+
+
+@pytest.mark.django_db
+class TestImportRoster:
+    def test_students_and_teachers_are_created(self, school, import_roster):
+        stdout, stderr = import_roster(
+            HEADER
+            + "student,Anan,Jaidee,M,WAT1,1,1\n"
+            + "student,Pim,Srisuk,f,WAT1,1,2\n"
+            + "teacher,Suda,Boonmee,F,WAT1,1,1\n"
+            + "teacher,Krit,Saetang,M,WAT1,,\n"
+        )
+
+        assert stderr == ""
+        assert "4 row(s): 2 student(s) and 2 teacher(s) imported, 0 error(s)" in stdout
+        student = Student.objects.get(first_name="Pim")
+        assert (student.gender, student.classroom.room) == ("F", 2)
+        teacher = Teacher.objects.get(first_name="Suda")
+        assert [c.room for c in teacher.classrooms.all()] == [1]
+        assert not Teacher.objects.get(first_name="Krit").classrooms.exists()
+        school.refresh_from_db()
+        assert (school.students_count, school.teachers_count) == (2, 2)
+        assert_counters_are_consistent()
+
+    def test_existing_rows_are_updated(self, school, import_roster):
+        classroom = Classroom.objects.get(room=1)
+        baker.make(Student, first_name="Anan", last_name="Jaidee", classroom=classroom)
+        other_school = baker.make(School, alias="BAN2")
+        other_classroom = baker.make(Classroom, school=other_school, grade=3, room=1)
+        teacher = baker.make(
+            Teacher, first_name="Suda", last_name="Boonmee", school=school
+        )
+        teacher.classrooms.add(classroom)
+
+        import_roster(
+            HEADER
+            + "student,Anan,Jaidee,O,BAN2,3,1\n"
+            + "teacher,Suda,Boonmee,F,BAN2,3,1\n"
+        )
+
+        student = Student.objects.get()
+        assert (student.gender, student.classroom_id) == ("O", other_classroom.pk)
+        teacher.refresh_from_db()
+        assert teacher.school_id == other_school.pk
+        # Moving school left the classrooms of the previous one
+        assert list(teacher.classrooms.all()) == [other_classroom]
+        school.refresh_from_db()
+        assert (school.students_count, school.teachers_count) == (0, 0)
+        assert_counters_are_consistent()
+
+    @pytest.mark.parametrize("chunk_size", ["5000", "1"])
+    def test_teacher_rows_link_every_classroom(self, school, import_roster, chunk_size):
+        stdout, _ = import_roster(
+            HEADER
+            + "teacher,Suda,Boonmee,F,WAT1,1,1\n"
+            + "teacher,Suda,Boonmee,F,WAT1,1,2\n",
+            "--chunk-size",
+            chunk_size,
+        )
+
+        assert "2 row(s)" in stdout
+        teacher = Teacher.objects.get()
+        assert sorted(c.room for c in teacher.classrooms.all()) == [1, 2]
+        assert_counters_are_consistent()
+
+    def test_invalid_rows_are_reported_and_skipped(self, school, import_roster):
+        stdout, stderr = import_roster(
+            HEADER
+            + "student,Anan,Jaidee,M,WAT1,1,1\n"
+            + "parent,Dao,Jaidee,M,WAT1,1,1\n"
+            + "student,,Jaidee,M,WAT1,1,1\n"
+            + "student,Fah,Jaidee,X,WAT1,1,1\n"
+            + "student,Lamai,Jaidee,F,NOPE,1,1\n"
+            + "student,Malee,Jaidee,F,WAT1,1,9\n"
+            + "student,Niran,Jaidee,F,WAT1,one,1\n"
+        )
+
+        assert stderr.splitlines() == [
+            "line 3: Unknown role 'parent'.",
+            "line 4: Names must have between 1 and 100 characters.",
+            "line 5: Unknown gender 'X'.",
+            "line 6: No school with the alias 'NOPE'.",
+            "line 7: No classroom 1/9 in school 'WAT1'.",
+            "line 8: Grade and room must be integers.",
+        ]
+        assert "7 row(s): 1 student(s) and 0 teacher(s) imported, 6 error(s)" in stdout
+        assert list(Student.objects.values_list("first_name", flat=True)) == ["Anan"]
+
+    def test_dry_run_writes_nothing(self, school, import_roster):
+        stdout, stderr = import_roster(
+            HEADER
+            + "student,Anan,Jaidee,M,WAT1,1,1\n"
+            + "teacher,Suda,Boonmee,F,WAT1,4,4\n",
+            "--dry-run",
+        )
+
+        assert stderr == "line 3: No classroom 4/4 in school 'WAT1'.\n"
+        assert "Dry run, nothing written. 2 row(s):" in stdout
+        assert not Student.objects.exists()
+        assert not Teacher.objects.exists()
+
+    def test_rows_are_imported_in_chunks(self, school, import_roster):
+        rows = "".join(f"student,S{n},Jaidee,M,WAT1,1,1\n" for n in range(5))
+
+        stdout, _ = import_roster(HEADER + rows, "--chunk-size", "2")
+
+        progress = [line for line in stdout.splitlines() if "rows/s)" in line]
+        assert [line.split(",")[0] for line in progress[:3]] == [
+            "2 row(s)",
+            "4 row(s)",
+            "5 row(s)",
+        ]
+        assert Student.objects.count() == 5
+        assert Classroom.objects.get(room=1).students_count == 5
+
+    def test_last_row_of_a_name_wins(self, school, import_roster):
+        import_roster(
+            HEADER
+            + "student,Anan,Jaidee,M,WAT1,1,1\n"
+            + "student,Anan,Jaidee,F,WAT1,1,2\n"
+        )
+
+        student = Student.objects.get()
+        assert (student.gender, student.classroom.room) == ("F", 2)
+
+    def test_if_a_column_is_missing_raise_error(self, import_roster):
+        with pytest.raises(CommandError, match="Missing column"):
+            import_roster("role,first_name,last_name\nstudent,Anan,Jaidee\n")
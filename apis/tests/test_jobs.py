@@ -0,0 +1,337 @@
+from apis import jobs
+from apis.models import (
+    JOB_FAILED,
+    JOB_QUEUED,
+    JOB_RUNNING,
+    JOB_SUCCEEDED,
+    School,
+    Classroom,
+    Job,
+)
+from django.conf import settings
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework import status
+from model_bakery import baker
+from datetime import timedelta
+from pathlib import Path
+import io
+import json
+import os
+import subprocess
+import sys
+import pytest
+
+
+@pytest.fixture
+def get_job(api_client):
+    def do_get_job(id):
+        return api_client.get(f"/api/v1/jobs/{id}/", HTTP_ACCEPT="application/json")
+
+    return do_get_job
+
+
+@pytest.mark.django_db
+class TestGetJob:
+    def test_if_user_is_anonymous_return_401(self, get_job):
+        response = get_job(1)
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_if_job_does_not_exist_return_404(self, authenticate, get_job):
+        authenticate()
+
+        response = get_job(1)
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_if_job_exists_return_200(self, authenticate, get_job):
+        authenticate()
+        job = baker.make(Job, kind="delete_school", progress=3, total=10)
+
+        response = get_job(job.id)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["kind"] == "delete_school"
+        assert response.data["status"] == "queued"
+        assert response.data["progress"] == 3
+        assert response.data["total"] == 10
+
+
+@pytest.fixture
+def make_job():
+    def do_make_job(**fields):
+        fields.setdefault("kind", "reconcile_counters")
+        return Job.objects.create(**fields)
+
+    return do_make_job
+
+
+@pytest.fixture
+def expired(make_job):
+    """A job running on a worker whose lease expired."""
+
+    def do_expired(attempts=1, max_attempts=3):
+        return make_job(
+            status=JOB_RUNNING,
+            attempts=attempts,
+            max_attempts=max_attempts,
+            leased_by="dead:1",
+            lease_expires_at=timezone.now() - timedelta(seconds=1),
+        )
+
+    return do_expired
+
+
+@pytest.mark.django_db
+class TestClaimJob:
+    def test_oldest_ready_job_is_leased(self, make_job):
+        make_job()
+        oldest = make_job(run_after=timezone.now() - timedelta(hours=1))
+        make_job(run_after=timezone.now() + timedelta(hours=1))
+
+        job = jobs.claim("worker:1")
+
+        assert job.pk == oldest.pk
+        assert job.status == JOB_RUNNING
+        assert job.attempts == 1
+        assert job.leased_by == "worker:1"
+        assert job.lease_expires_at > timezone.now()
+
+    def test_if_no_job_is_due_return_none(self, make_job):
+        make_job(run_after=timezone.now() + timedelta(hours=1))
+        make_job(status=JOB_SUCCEEDED)
+
+        assert jobs.claim("worker:1") is None
+
+    def test_if_lease_expired_job_is_taken_over(self, expired):
+        job = expired()
+
+        claimed = jobs.claim("worker:1")
+
+        assert claimed.pk == job.pk
+        assert claimed.attempts == 2
+        assert claimed.leased_by == "worker:1"
+
+    def test_if_lease_expired_on_last_attempt_job_fails(self, expired):
+        job = expired(attempts=3, max_attempts=3)
+
+        assert jobs.claim("worker:1") is None
+
+        job.refresh_from_db()
+        assert job.status == JOB_FAILED
+        assert job.error == "Lease of dead:1 expired."
+
+    def test_if_job_is_running_it_is_not_claimed(self, make_job):
+        job = make_job()
+        jobs.claim("worker:1")
+
+        assert jobs.claim("worker:2", job.pk) is None
+
+
+@pytest.mark.django_db
+class TestRunJob:
+    def test_if_handler_succeeds_result_is_recorded(self, make_job):
+        school = baker.make(School, classrooms_count=7)
+        job = make_job(payload={"school_ids": [school.pk]})
+
+        assert jobs.run(job.pk) is True
+
+        job.refresh_from_db()
+        assert job.status == JOB_SUCCEEDED
+        assert job.result == {"schools": 1, "classrooms": 0}
+        assert job.leased_by == ""
+        assert job.finished_at is not None
+
+    def test_if_handler_raises_job_is_retried_after_backoff(self, make_job, settings):
+        settings.API_JOB_RETRY_BACKOFF = 10
+        job = make_job(payload={"unknown": True}, max_attempts=2)
+
+        jobs.run(job.pk)
+
+        job.refresh_from_db()
+        assert job.status == JOB_QUEUED
+        assert "unexpected keyword argument" in job.error
+        assert job.run_after > timezone.now() + timedelta(seconds=5)
+        assert jobs.run(job.pk) is False
+
+        Job.objects.update(run_after=timezone.now())
+        jobs.run(job.pk)
+
+        job.refresh_from_db()
+        assert job.status == JOB_FAILED
+        assert job.attempts == 2
+        assert job.finished_at is not None
+
+    def test_if_lease_was_lost_outcome_is_not_recorded(self, make_job):
+        make_job()
+        job = jobs.claim("worker:1")
+        Job.objects.update(leased_by="worker:2", attempts=2)
+
+        jobs.execute(job, "worker:1")
+
+        job.refresh_from_db()
+        assert job.status == JOB_RUNNING
+        assert job.leased_by == "worker:2"
+
+    def test_renew_extends_own_leases_only(self, make_job):
+        mine, theirs = make_job(), make_job()
+        jobs.claim("worker:1", mine.pk)
+        jobs.claim("worker:2", theirs.pk)
+        Job.objects.update(lease_expires_at=timezone.now())
+
+        assert jobs.renew("worker:1", [mine.pk, theirs.pk]) == 1
+
+        mine.refresh_from_db()
+        theirs.refresh_from_db()
+        assert mine.lease_expires_at > timezone.now()
+        assert theirs.lease_expires_at <= timezone.now()
+
+    def test_if_kind_is_unknown_raise_value_error(self):
+        with pytest.raises(ValueError):
+            jobs.enqueue("unknown", {})
+
+    def test_if_threads_are_off_job_waits_for_workers(
+        self, settings, django_capture_on_commit_callbacks
+    ):
+        settings.API_JOB_THREADS = False
+
+        with django_capture_on_commit_callbacks() as callbacks:
+            jobs.enqueue("reconcile_counters", {})
+
+        assert callbacks == []
+
+
+@pytest.mark.django_db
+class TestBackgroundCommands:
+    def test_import_roster_queues_job(self, tmp_path):
+        path = tmp_path / "roster.csv"
+        path.write_text("role,first_name,last_name,gender,school,grade,room\n")
+        stdout = io.StringIO()
+
+        call_command("import_roster", str(path), "--background", stdout=stdout)
+
+        job = Job.objects.get()
+        assert stdout.getvalue() == f"Queued job {job.pk}.\n"
+        assert job.kind == "import_roster"
+        assert job.payload == {"path": str(path), "chunk_size": 5000, "dry_run": False}
+
+    def test_import_roster_job_imports_file(self, tmp_path):
+        school = baker.make(School, alias="WAT1")
+        baker.make(Classroom, school=school, grade=1, room=1)
+        path = tmp_path / "roster.csv"
+        path.write_text(
+            "role,first_name,last_name,gender,school,grade,room\n"
+            "student,Anan,Jaidee,M,WAT1,1,1\n"
+            "student,Pim,Srisuk,X,WAT1,1,1\n"
+        )
+        call_command("import_roster", str(path), "--background", stdout=io.StringIO())
+
+        jobs.run(Job.objects.get().pk)
+
+        job = Job.objects.get()
+        assert job.status == JOB_SUCCEEDED
+        assert job.progress == 2
+        assert job.result == {
+            "rows": 2,
+            "students": 1,
+            "teachers": 0,
+            "errors": 1,
+            "messages": ["line 3: Unknown gender 'X'."],
+        }
+
+    def test_reconcile_counters_queues_job(self):
+        call_command(
+            "reconcile_counters", "--school", "3", "--background", stdout=io.StringIO()
+        )
+
+        job = Job.objects.get()
+        assert (job.kind, job.payload) == ("reconcile_counters", {"school_ids": [3]})
+
+
+def sleep_job(job, seconds):
+    import time
+
+    time.sleep(seconds)
+
+
+def crash_job(job):
+    os._exit(3)
+
+
+def run_pool():
+    """
+    Runs `run_workers --burst` over a few jobs on a file database set up with
+    the production settings. Run in its own process.
+    """
+    from django.core.management import call_command
+    from django.test.utils import override_settings
+    from apis import seeding
+
+    call_command("migrate", verbosity=0)
+    seeding.seed(1, classrooms=2, students=3)
+    school = School.objects.get()
+    jobs.HANDLERS.update(sleep="test_jobs.sleep_job", crash="test_jobs.crash_job")
+    ids = {
+        "delete": jobs.enqueue("delete_school", {"school_id": school.pk}).pk,
+        "reconcile": jobs.enqueue("reconcile_counters", {}).pk,
+        "sleep": Job.objects.create(
+            kind="sleep", payload={"seconds": 30}, max_attempts=1
+        ).pk,
+        "crash": Job.objects.create(kind="crash", max_attempts=2).pk,
+    }
+    output = io.StringIO()
+    with override_settings(API_JOB_TIMEOUT=1, API_JOB_RETRY_BACKOFF=0):
+        call_command(
+            "run_workers",
+            "--burst",
+            "--processes=2",
+            "--poll-interval=0.05",
+            stdout=output,
+        )
+    return {
+        "jobs": {
+            name: Job.objects.values("status", "attempts", "error").get(pk=pk)
+            for name, pk in ids.items()
+        },
+        "schools": School.objects.count(),
+        "output": output.getvalue(),
+    }
+
+
+def test_run_workers_runs_retries_and_times_out_jobs(tmp_path):
+    script = (
+        "import django, json, sys; django.setup(); sys.path.insert(0, 'apis/tests');"
+        "from test_jobs import run_pool;"
+        "print(json.dumps(run_pool()))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        env={
+            **os.environ,
+            "DJANGO_SETTINGS_MODULE": "app.settings_production",
+            "SQLITE_PATH": str(tmp_path / "db.sqlite3"),
+            "API_METRICS_FILE": str(tmp_path / "metrics.sqlite3"),
+            "SESSION_CACHE_DIR": str(tmp_path / "sessions"),
+        },
+        cwd=Path(settings.BASE_DIR),
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    assert result.returncode == 0, result.stderr
+    outcome = json.loads(result.stdout.splitlines()[-1])
+    statuses = {
+        name: (job["status"], job["attempts"]) for name, job in outcome["jobs"].items()
+    }
+
+    assert statuses == {
+        "delete": (JOB_SUCCEEDED, 1),
+        "reconcile": (JOB_SUCCEEDED, 1),
+        "sleep": (JOB_FAILED, 1),
+        "crash": (JOB_FAILED, 2),
+    }
+    assert outcome["jobs"]["sleep"]["error"] == "Timed out after 1 second(s)."
+    assert outcome["jobs"]["crash"]["error"] == "Worker process exited with 3."
+    assert outcome["schools"] == 0
+    assert "Worker stopped." in outcome["output"]
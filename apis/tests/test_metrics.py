@@ -0,0 +1,180 @@
+from apis import metrics
+from apis.models import Student
+from rest_framework import status
+from model_bakery import baker
+import pytest
+import threading
+
+
+@pytest.fixture
+def registry(settings, tmp_path, monkeypatch):
+    settings.API_METRICS_FILE = str(tmp_path / "metrics.sqlite3")
+    settings.API_METRICS_FLUSH_SECONDS = 60
+    registry = metrics.Registry()
+    monkeypatch.setattr(metrics, "registry", registry)
+    return registry
+
+
+@pytest.fixture
+def get_metrics(client, django_user_model):
+    def do_get_metrics(is_staff=True, **extra):
+        if is_staff is not None:
+            client.force_login(
+                django_user_model.objects.create_user("scraper", is_staff=is_staff)
+            )
+        return client.get("/metrics", **extra)
+
+    return do_get_metrics
+
+
+def parse(response):
+    """Returns `{series: value}` of a Prometheus text response."""
+    samples = {}
+    for line in response.content.decode().splitlines():
+        if not line.startswith("#"):
+            series, value = line.rsplit(" ", 1)
+            samples[series] = float(value)
+    return samples
+
+
+def labels(route, method="GET"):
+    return f'route="{route}",method="{method}"'
+
+
+@pytest.mark.django_db
+class TestMetrics:
+    def test_if_metrics_are_disabled_return_404(self, get_metrics):
+        response = get_metrics()
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_if_user_is_anonymous_return_404(self, registry, get_metrics):
+        response = get_metrics(is_staff=None)
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_if_user_is_not_staff_return_404(self, registry, get_metrics):
+        response = get_metrics(is_staff=False)
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_if_token_is_valid_return_200(self, settings, registry, get_metrics):
+        settings.API_METRICS_TOKEN = "secret"
+
+        response = get_metrics(is_staff=None, HTTP_AUTHORIZATION="Bearer secret")
+
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_if_token_is_invalid_return_404(self, settings, registry, get_metrics):
+        settings.API_METRICS_TOKEN = "secret"
+
+        response = get_metrics(is_staff=None, HTTP_AUTHORIZATION="Bearer guess")
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_requests_are_recorded_per_route_and_method(
+        self, authenticate, api_client, registry, get_metrics
+    ):
+        authenticate()
+        baker.make(Student, _quantity=3)
+        sizes = [len(api_client.get("/api/v1/students/").content) for _ in range(2)]
+        api_client.get("/api/v1/students/1/")
+
+        response = get_metrics()
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response["Content-Type"].startswith("text/plain; version=0.0.4")
+        samples = parse(response)
+        route = labels("v1:student-list")
+        assert samples[f"api_request_duration_seconds_count{{{route}}}"] == 2
+        assert samples[f'api_request_duration_seconds_bucket{{{route},le="+Inf"}}'] == 2
+        assert samples[f"api_request_duration_seconds_sum{{{route}}}"] > 0
+        assert samples[f"api_request_queries_total{{{route}}}"] >= 2
+        assert samples[f"api_request_sql_seconds_total{{{route}}}"] > 0
+        assert samples[f"api_response_bytes_total{{{route}}}"] == sum(sizes)
+        route = labels("v1:student-detail")
+        assert samples[f"api_request_duration_seconds_count{{{route}}}"] == 1
+
+    def test_histogram_buckets_are_cumulative(self, registry, get_metrics):
+        registry.observe("v1:student-list", "GET", 0.003, 1, 0.001, 10)
+        registry.observe("v1:student-list", "GET", 0.2, 1, 0.001, 10)
+        registry.observe("v1:student-list", "GET", 60, 1, 0.001, 10)
+
+        samples = parse(get_metrics())
+
+        route = labels("v1:student-list")
+        bucket = "api_request_duration_seconds_bucket{{" + route + ',le="{}"}}'
+        assert samples[bucket.format(0.005)] == 1
+        assert samples[bucket.format(0.1)] == 1
+        assert samples[bucket.format(0.25)] == 2
+        assert samples[bucket.format(10.0)] == 2
+        assert samples[bucket.format("+Inf")] == 3
+
+    def test_if_route_is_unknown_it_is_recorded_as_unresolved(
+        self, client, registry, get_metrics
+    ):
+        client.get("/nowhere/")
+
+        samples = parse(get_metrics())
+
+        route = labels(metrics.UNRESOLVED)
+        assert samples[f"api_request_duration_seconds_count{{{route}}}"] == 1
+
+    def test_streaming_responses_are_recorded_when_consumed(
+        self, authenticate, api_client, registry
+    ):
+        authenticate()
+        baker.make(Student, _quantity=3)
+
+        response = api_client.get("/api/v1/students/export/", {"format": "ndjson"})
+        assert registry.pending == {}
+        size = len(b"".join(response.streaming_content))
+
+        series = registry.pending["v1:student-export", "GET"]
+        assert series[registry.COUNT] == 1
+        assert series[registry.QUERIES] >= 1
+        assert series[registry.RESPONSE_BYTES] == size
+
+    def test_processes_are_summed_in_the_metrics_file(self, registry, get_metrics):
+        other_process = metrics.Registry()
+        registry.observe("v1:school-list", "GET", 0.01, 2, 0.001, 100)
+        other_process.observe("v1:school-list", "GET", 0.01, 3, 0.001, 50)
+        other_process.flush()
+
+        samples = parse(get_metrics())
+
+        route = labels("v1:school-list")
+        assert samples[f"api_request_duration_seconds_count{{{route}}}"] == 2
+        assert samples[f"api_request_queries_total{{{route}}}"] == 5
+        assert samples[f"api_response_bytes_total{{{route}}}"] == 150
+
+    def test_requests_are_flushed_outside_of_the_request_thread(
+        self, settings, registry, monkeypatch
+    ):
+        settings.API_METRICS_FLUSH_SECONDS = 0.01
+        flush = registry.flush
+        threads = []
+        flushed = threading.Event()
+
+        def record():
+            threads.append(threading.current_thread())
+            flush()
+            flushed.set()
+
+        monkeypatch.setattr(registry, "flush", record)
+        registry.observe("v1:school-list", "GET", 0.01, 2, 0.001, 100)
+
+        assert flushed.wait(5)
+        assert threading.current_thread() not in threads
+        samples = metrics.Registry().collect()
+        assert samples["v1:school-list", "GET"]["count"] == 1
+
+    def test_if_response_cache_is_enabled_return_its_counters(
+        self, settings, registry, get_metrics
+    ):
+        settings.API_RESPONSE_CACHE = "default"
+
+        samples = parse(get_metrics())
+
+        assert samples["api_response_cache_hits_total"] == 0
+        assert samples["api_response_cache_misses_total"] == 0
@@ -0,0 +1,137 @@
+from apis.models import School, Classroom, Student
+from rest_framework import status
+from model_bakery import baker
+from base64 import urlsafe_b64encode
+import json
+import pytest
+
+
+@pytest.fixture
+def list_students(api_client):
+    def do_list_students(url="/api/v1/students/", **params):
+        return api_client.get(url, params)
+
+    return do_list_students
+
+
+def encode(cursor):
+    return urlsafe_b64encode(json.dumps(cursor).encode()).decode()
+
+
+def walk(list_students, direction="next", **params):
+    """Follows the pagination links until the end and returns all rows."""
+    rows = []
+    response = list_students(**params)
+    while True:
+        assert response.status_code == status.HTTP_200_OK
+        rows.extend(response.data["results"])
+        if response.data[direction] is None:
+            return rows
+        response = list_students(response.data[direction])
+
+
+@pytest.mark.django_db
+class TestKeysetPagination:
+    def test_if_table_is_empty_return_empty_page(self, authenticate, list_students):
+        authenticate()
+
+        response = list_students()
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data == {"next": None, "previous": None, "results": []}
+
+    def test_pages_follow_model_ordering(self, authenticate, list_students):
+        authenticate()
+        classroom = baker.make(Classroom)
+        for first_name in ["b", "a", "c"]:
+            for last_name in ["z", "x", "y"]:
+                baker.make(
+                    Student,
+                    first_name=first_name,
+                    last_name=last_name,
+                    classroom=classroom,
+                )
+
+        rows = walk(list_students, page_size=2)
+
+        assert [(row["first_name"], row["last_name"]) for row in rows] == [
+            (first_name, last_name)
+            for first_name in ["a", "b", "c"]
+            for last_name in ["x", "y", "z"]
+        ]
+
+    def test_previous_links_walk_back_to_first_page(self, authenticate, list_students):
+        authenticate()
+        classroom = baker.make(Classroom)
+        baker.make(Student, classroom=classroom, _quantity=7)
+        forward = walk(list_students, page_size=3)
+        response = list_students(page_size=3)
+        while response.data["next"] is not None:
+            response = list_students(response.data["next"])
+
+        backward = response.data["results"]
+        while response.data["previous"] is not None:
+            response = list_students(response.data["previous"])
+            backward = response.data["results"] + backward
+
+        assert backward == forward
+
+    def test_pagination_is_applied_after_filters(self, authenticate, list_students):
+        authenticate()
+        school = baker.make(School)
+        classroom = baker.make(Classroom, school=school)
+        other_classroom = baker.make(Classroom, school=school)
+        expected = baker.make(Student, classroom=classroom, _quantity=5)
+        baker.make(Student, classroom=other_classroom, _quantity=5)
+
+        rows = walk(list_students, page_size=2, classroom=classroom.id)
+
+        assert sorted(row["id"] for row in rows) == sorted(s.id for s in expected)
+
+    def test_page_size_query_param_limits_results(self, authenticate, list_students):
+        authenticate()
+        baker.make(Student, _quantity=3)
+
+        response = list_students(page_size=1)
+
+        assert len(response.data["results"]) == 1
+        assert response.data["next"] is not None
+        assert response.data["previous"] is None
+
+    @pytest.mark.parametrize(
+        "url, cursor",
+        [
+            ("/api/v1/schools/", {"p": ["x"]}),
+            ("/api/v1/schools/", {"p": [None]}),
+            ("/api/v1/schools/", {"p": [[1]]}),
+            ("/api/v1/students/", {"p": ["a", "b", None]}),
+            ("/api/v1/students/", {"p": ["a", "b", "c"]}),
+            ("/api/v1/students/", {"p": [{"a": 1}, "b", 1]}),
+        ],
+    )
+    def test_if_cursor_is_tampered_return_404(
+        self, authenticate, list_students, url, cursor
+    ):
+        authenticate()
+        baker.make(Student)
+
+        response = list_students(url, cursor=encode(cursor))
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    @pytest.mark.parametrize("cursor", [["p"], "p", 1, None])
+    def test_if_cursor_is_not_an_object_return_404(
+        self, authenticate, list_students, cursor
+    ):
+        authenticate()
+
+        response = list_students(cursor=encode(cursor))
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_if_cursor_is_invalid_return_404(self, authenticate, list_students):
+        authenticate()
+
+        response = list_students(cursor="not-a-cursor")
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,169 @@
+from apis.db_routers import ReplicaRouter, read_alias
+from apis.management.commands.sync_replica import sync
+from apis.models import School, Student
+from django.core.management import CommandError, call_command
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from model_bakery import baker
+import os
+import pytest
+import sqlite3
+
+
+@pytest.fixture
+def replica_queries():
+    def do_replica_queries(request):
+        with CaptureQueriesContext(connections["replica"]) as context:
+            response = request()
+        return response, len(context.captured_queries)
+
+    return do_replica_queries
+
+
+class TestReplicaRouter:
+    def test_reads_follow_the_request_alias(self):
+        router = ReplicaRouter()
+        token = read_alias.set("replica")
+        try:
+            assert router.db_for_read(Student) == "replica"
+        finally:
+            read_alias.reset(token)
+
+        assert router.db_for_read(Student) is None
+
+    def test_write_pins_reads_to_default(self):
+        router = ReplicaRouter()
+        token = read_alias.set("replica")
+        try:
+            assert router.db_for_write(Student) is None
+            assert router.db_for_read(Student) is None
+        finally:
+            read_alias.reset(token)
+
+    def test_replica_is_never_migrated(self):
+        assert ReplicaRouter().allow_migrate("replica", "apis") is False
+        assert ReplicaRouter().allow_migrate("default", "apis") is None
+
+
+@pytest.mark.django_db(transaction=True, databases=["default", "replica"])
+class TestReplicaMiddleware:
+    def test_if_replica_is_disabled_read_default(
+        self, authenticate, api_client, replica_queries
+    ):
+        authenticate()
+
+        response, queries = replica_queries(lambda: api_client.get("/api/v1/schools/"))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert queries == 0
+
+    def test_if_replica_is_enabled_read_replica(
+        self, authenticate, api_client, replica_queries, settings
+    ):
+        authenticate()
+        settings.API_READ_REPLICA = True
+        school = baker.make(School)
+
+        response, queries = replica_queries(
+            lambda: api_client.get(f"/api/v1/schools/{school.id}/")
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert queries > 0
+
+    def test_if_export_streams_read_replica(
+        self, authenticate, api_client, replica_queries, settings
+    ):
+        authenticate()
+        settings.API_READ_REPLICA = True
+
+        def export():
+            response = api_client.get("/api/v1/students/export/")
+            b"".join(response.streaming_content)
+            return response
+
+        response, queries = replica_queries(export)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert queries > 0
+
+    def test_after_write_client_reads_default(
+        self, authenticate, api_client, replica_queries, settings
+    ):
+        authenticate(is_staff=True)
+        settings.API_READ_REPLICA = True
+
+        response, queries = replica_queries(
+            lambda: api_client.post(
+                "/api/v1/schools/",
+                {"name": "a", "alias": "a", "address": "a"},
+                format="json",
+            )
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+        assert queries == 0
+        assert settings.API_REPLICA_COOKIE in response.cookies
+
+        response, queries = replica_queries(lambda: api_client.get("/api/v1/schools/"))
+        assert response.status_code == status.HTTP_200_OK
+        assert queries == 0
+
+    def test_failed_write_does_not_pin(self, authenticate, api_client, settings):
+        authenticate(is_staff=True)
+        settings.API_READ_REPLICA = True
+
+        response = api_client.post("/api/v1/schools/", {}, format="json")
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert settings.API_REPLICA_COOKIE not in response.cookies
+
+
+class TestSyncReplica:
+    def test_sync_copies_database(self, tmp_path):
+        source, target = tmp_path / "source.sqlite3", tmp_path / "target.sqlite3"
+        connection = sqlite3.connect(source)
+        connection.execute("CREATE TABLE item (id INTEGER PRIMARY KEY)")
+        connection.executemany(
+            "INSERT INTO item VALUES (?)", [(i,) for i in range(500)]
+        )
+        connection.commit()
+        connection.close()
+
+        sync(str(source), str(target))
+
+        copy = sqlite3.connect(target)
+        assert copy.execute("SELECT COUNT(*) FROM item").fetchone() == (500,)
+        copy.close()
+        assert not os.path.exists(f"{target}.partial")
+
+    def test_sync_replaces_wal_copy_with_rollback_journal_copy(self, tmp_path):
+        source, target = tmp_path / "source.sqlite3", tmp_path / "target.sqlite3"
+        connection = sqlite3.connect(source)
+        connection.execute("PRAGMA journal_mode = WAL")
+        connection.execute("CREATE TABLE item (id INTEGER PRIMARY KEY)")
+        connection.commit()
+        # A previous copy in WAL mode, with its -wal and -shm files
+        stale = sqlite3.connect(target)
+        stale.execute("PRAGMA journal_mode = WAL")
+        stale.execute("CREATE TABLE stale (id INTEGER PRIMARY KEY)")
+        stale.commit()
+        assert os.path.exists(f"{target}-wal")
+
+        sync(str(source), str(target))
+
+        assert not os.path.exists(f"{target}-wal")
+        assert not os.path.exists(f"{target}-shm")
+        stale.close()
+        connection.close()
+        copy = sqlite3.connect(target)
+        assert copy.execute("PRAGMA journal_mode").fetchone() == ("delete",)
+        assert copy.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table'"
+        ).fetchall() == [("item",)]
+        copy.close()
+
+    def test_if_replica_is_default_raise_error(self):
+        # The test replica mirrors the test default database
+        with pytest.raises(CommandError):
+            call_command("sync_replica")
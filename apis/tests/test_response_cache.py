@@ -0,0 +1,185 @@
+from apis import response_cache
+from apis.models import School, Classroom, Student, Teacher
+from apis.serializers.school import SchoolSerializer
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
+from rest_framework import status
+from model_bakery import baker
+import io
+import pytest
+
+
+@pytest.fixture
+def enable_cache(settings, tmp_path):
+    def do_enable_cache(backend="django.core.cache.backends.locmem.LocMemCache"):
+        settings.CACHES = {
+            "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+            "responses": {"BACKEND": backend, "LOCATION": str(tmp_path)},
+        }
+        settings.API_RESPONSE_CACHE = "responses"
+        caches["responses"].clear()
+        return caches["responses"]
+
+    return do_enable_cache
+
+
+@pytest.fixture
+def get(api_client):
+    def do_get(url, **params):
+        return api_client.get(url, params, HTTP_ACCEPT="application/json")
+
+    return do_get
+
+
+@pytest.mark.django_db
+class TestResponseCache:
+    def test_if_cache_is_disabled_return_no_header(self, authenticate, get):
+        authenticate()
+
+        response = get("/api/v1/schools/")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert not response.has_header("X-Cache")
+
+    def test_if_request_repeats_return_hit(self, authenticate, enable_cache, get):
+        authenticate()
+        cache = enable_cache()
+        school = baker.make(School)
+
+        response1 = get("/api/v1/schools/")
+        response2 = get("/api/v1/schools/")
+
+        assert response1["X-Cache"] == "MISS"
+        assert response2["X-Cache"] == "HIT"
+        assert response2.json() == response1.json()
+        assert response2.json()["results"][0]["id"] == school.id
+        assert response_cache.get_stats(cache) == {"hits": 1, "misses": 1}
+
+    def test_hit_skips_query_and_serializer(
+        self, authenticate, enable_cache, get, django_assert_num_queries, monkeypatch
+    ):
+        authenticate()
+        enable_cache()
+        baker.make(School)
+        get("/api/v1/schools/")
+
+        def fail(*args, **kwargs):
+            raise AssertionError("serializer built for a cache hit")
+
+        monkeypatch.setattr(SchoolSerializer, "__init__", fail)
+        with django_assert_num_queries(1):
+            response = get("/api/v1/schools/")
+
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_equivalent_filters_share_an_entry(self, authenticate, enable_cache, get):
+        authenticate()
+        enable_cache()
+        school = baker.make(School)
+        baker.make(Teacher, school=school)
+
+        get("/api/v1/teachers/", school=school.id, page_size=10)
+        response = get(
+            "/api/v1/teachers/",
+            page_size=10,
+            first_name__iexact="",
+            school=f"0{school.id}",
+        )
+
+        assert response["X-Cache"] == "HIT"
+
+    def test_different_filters_do_not_share_an_entry(
+        self, authenticate, enable_cache, get
+    ):
+        authenticate()
+        enable_cache()
+        school1, school2 = baker.make(School, _quantity=2)
+        baker.make(Classroom, school=school1)
+
+        get("/api/v1/classrooms/", school=school1.id)
+        response = get("/api/v1/classrooms/", school=school2.id)
+
+        assert response["X-Cache"] == "MISS"
+        assert response.json()["results"] == []
+
+    def test_if_filters_are_invalid_bypass_cache(self, authenticate, enable_cache, get):
+        authenticate()
+        enable_cache()
+
+        response = get("/api/v1/classrooms/", school="x")
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert not response.has_header("X-Cache")
+
+    @pytest.mark.parametrize(
+        "change",
+        [
+            lambda classroom: classroom.save(),
+            lambda classroom: baker.make(Student, classroom=classroom),
+            lambda classroom: baker.make(
+                Teacher, school=classroom.school, classrooms=[classroom]
+            ),
+            lambda classroom: classroom.school.save(),
+            lambda classroom: classroom.delete(),
+        ],
+    )
+    def test_if_dependency_changes_return_miss(
+        self,
+        authenticate,
+        enable_cache,
+        get,
+        change,
+        django_capture_on_commit_callbacks,
+    ):
+        authenticate()
+        enable_cache()
+        classroom = baker.make(Classroom)
+        get("/api/v1/classrooms/")
+
+        with django_capture_on_commit_callbacks(execute=True):
+            change(classroom)
+        response = get("/api/v1/classrooms/")
+
+        assert response["X-Cache"] == "MISS"
+
+    def test_unrelated_change_keeps_entry(self, authenticate, enable_cache, get):
+        authenticate()
+        enable_cache()
+        baker.make(Teacher)
+        classroom = baker.make(Classroom)
+        get("/api/v1/teachers/")
+
+        baker.make(Student, classroom=classroom)
+        response = get("/api/v1/teachers/")
+
+        assert response["X-Cache"] == "HIT"
+
+    def test_file_based_backend_is_supported(self, authenticate, enable_cache, get):
+        authenticate()
+        enable_cache("django.core.cache.backends.filebased.FileBasedCache")
+        student = baker.make(Student)
+
+        get(f"/api/v1/students/{student.id}/")
+        response = get(f"/api/v1/students/{student.id}/")
+
+        assert response["X-Cache"] == "HIT"
+        assert response.json()["id"] == student.id
+
+
+@pytest.mark.django_db
+class TestResponseCacheStats:
+    def test_if_cache_is_disabled_raise_error(self):
+        with pytest.raises(CommandError):
+            call_command("response_cache_stats")
+
+    def test_command_prints_and_resets_counters(self, enable_cache):
+        cache = enable_cache()
+        response_cache.record(cache, hit=True)
+        response_cache.record(cache, hit=False)
+        response_cache.record(cache, hit=False)
+        out = io.StringIO()
+
+        call_command("response_cache_stats", "--reset", stdout=out)
+
+        assert out.getvalue().strip() == "hits=1 misses=2 hit_ratio=33.33%"
+        assert response_cache.get_stats(cache) == {"hits": 0, "misses": 0}
@@ -1,4 +1,7 @@
-from apis.models import School, Classroom, Student, Teacher
+from apis import jobs, versioning
+from apis.models import JOB_SUCCEEDED, School, Classroom, Student, Teacher, Job
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 from model_bakery import baker
 import pytest
@@ -70,7 +73,7 @@ class TestListSchool:
         response = list_schools()
 
         assert response.status_code == status.HTTP_200_OK
-        assert response.data[0] == {
+        assert response.data["results"][0] == {
             "id": school.id,
             "name": school.name,
             "alias": school.alias,
@@ -91,7 +94,7 @@ class TestListSchool:
         response = list_schools()
 
         assert response.status_code == status.HTTP_200_OK
-        assert response.data[0]["classrooms_count"] == 2
+        assert response.data["results"][0]["classrooms_count"] == 2
 
     def test_if_school_has_teachers_return_teachers_count(
         self, authenticate, list_schools
@@ -104,7 +107,7 @@ class TestListSchool:
         response = list_schools()
 
         assert response.status_code == status.HTTP_200_OK
-        assert response.data[0]["teachers_count"] == 2
+        assert response.data["results"][0]["teachers_count"] == 2
 
     def test_if_school_has_students_return_students_count(
         self, authenticate, list_schools
@@ -118,7 +121,41 @@ class TestListSchool:
         response = list_schools()
 
         assert response.status_code == status.HTTP_200_OK
-        assert response.data[0]["students_count"] == 2
+        assert response.data["results"][0]["students_count"] == 2
+
+    def test_if_school_has_everything_return_unmultiplied_counts(
+        self, authenticate, list_schools
+    ):
+        authenticate()
+        school = baker.make(School)
+        classrooms = baker.make(Classroom, school=school, _quantity=2)
+        baker.make(Teacher, school=school, classrooms=classrooms, _quantity=3)
+        baker.make(Student, classroom=classrooms[0], _quantity=4)
+        baker.make(Student, classroom=classrooms[1], _quantity=1)
+
+        response = list_schools()
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["results"][0]["classrooms_count"] == 2
+        assert response.data["results"][0]["students_count"] == 5
+        assert response.data["results"][0]["teachers_count"] == 3
+
+    def test_query_count_does_not_grow_with_schools(self, authenticate, list_schools):
+        authenticate()
+
+        def count_queries(quantity):
+            School.objects.all().delete()
+            schools = baker.make(School, _quantity=quantity)
+            classroom = baker.make(Classroom, school=schools[0])
+            baker.make(Student, classroom=classroom)
+            baker.make(Teacher, school=schools[-1])
+            with CaptureQueriesContext(connection) as context:
+                response = list_schools()
+            assert response.status_code == status.HTTP_200_OK
+            assert len(response.data["results"]) == min(quantity, 50)
+            return len(context.captured_queries)
+
+        assert count_queries(10) == count_queries(1000) == 1
 
 
 @pytest.mark.django_db
@@ -368,3 +405,114 @@ class TestDeleteSchool:
         response = delete_school(school.id)
 
         assert response.status_code == status.HTTP_204_NO_CONTENT
+
+    @pytest.mark.django_db(transaction=True)
+    @pytest.mark.usefixtures("write_retry")
+    def test_if_writes_are_retried_each_chunk_commits(
+        self, authenticate, delete_school, monkeypatch
+    ):
+        authenticate()
+        school = baker.make(School)
+        baker.make(Student, classroom=baker.make(Classroom, school=school))
+        bump = versioning.bump
+        depths = []
+
+        def record(*models):
+            depths.append(len(connection.atomic_blocks))
+            bump(*models)
+
+        monkeypatch.setattr(versioning, "bump", record)
+        response = delete_school(school.id)
+
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        assert not School.objects.exists()
+        # Each chunk is its own transaction, not a savepoint of the request's
+        assert depths and set(depths) == {1}
+
+    def test_if_school_is_deleted_its_subtree_is_deleted(
+        self, authenticate, delete_school
+    ):
+        authenticate()
+        school, other_school = baker.make(School, _quantity=2)
+        classroom = baker.make(Classroom, school=school)
+        other_classroom = baker.make(Classroom, school=other_school)
+        baker.make(Student, classroom=classroom, _quantity=3)
+        baker.make(Student, classroom=other_classroom)
+        baker.make(Teacher, school=school, classrooms=[classroom])
+        baker.make(Teacher, school=other_school, classrooms=[other_classroom])
+
+        with CaptureQueriesContext(connection) as queries:
+            response = delete_school(school.id)
+
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        assert list(School.objects.values_list("pk", flat=True)) == [other_school.pk]
+        assert list(Classroom.objects.values_list("pk", flat=True)) == [
+            other_classroom.pk
+        ]
+        assert Student.objects.count() == 1
+        assert Teacher.objects.count() == 1
+        assert Teacher.classrooms.through.objects.count() == 1
+        # Set-based: no row of the subtree is loaded
+        selects = [
+            query["sql"]
+            for query in queries
+            if query["sql"].startswith("SELECT")
+            and 'FROM "apis_school"' not in query["sql"]
+        ]
+        assert selects == []
+
+    def test_if_school_is_big_return_202_with_job(
+        self, authenticate, delete_school, settings
+    ):
+        settings.API_SCHOOL_DELETE_JOB_THRESHOLD = 2
+        authenticate()
+        school = baker.make(School)
+        classroom = baker.make(Classroom, school=school)
+        baker.make(Student, classroom=classroom, _quantity=2)
+
+        response = delete_school(school.id)
+
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        job = Job.objects.get()
+        assert response.data["id"] == job.id
+        assert response.data["status"] == "queued"
+        assert response.data["total"] == 4
+        assert response["Location"] == f"http://testserver/api/v1/jobs/{job.id}/"
+        assert School.objects.filter(pk=school.pk).exists()
+
+    def test_if_school_is_being_deleted_return_same_job(
+        self, authenticate, delete_school, settings
+    ):
+        settings.API_SCHOOL_DELETE_JOB_THRESHOLD = 0
+        authenticate()
+        school = baker.make(School, classrooms_count=1)
+
+        first = delete_school(school.id)
+        second = delete_school(school.id)
+
+        assert second.status_code == status.HTTP_202_ACCEPTED
+        assert second.data["id"] == first.data["id"]
+        assert Job.objects.count() == 1
+
+    def test_if_job_runs_school_is_deleted(self, authenticate, delete_school, settings):
+        settings.API_SCHOOL_DELETE_JOB_THRESHOLD = 2
+        authenticate()
+        school = baker.make(School)
+        classroom = baker.make(Classroom, school=school)
+        baker.make(Student, classroom=classroom, _quantity=2)
+        job_id = delete_school(school.id).data["id"]
+
+        assert jobs.run(job_id) is True
+
+        job = Job.objects.get(pk=job_id)
+        assert job.status == JOB_SUCCEEDED
+        assert job.progress == job.total == 4
+        assert job.result == {
+            "links": 0,
+            "students": 2,
+            "classrooms": 1,
+            "teachers": 0,
+            "schools": 1,
+        }
+        assert not School.objects.exists()
+        assert not Student.objects.exists()
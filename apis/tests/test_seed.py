@@ -0,0 +1,83 @@
+from apis import counters
+from apis.models import School, Classroom, Student, Teacher
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import transaction
+from django.db.models import F
+import io
+import pytest
+
+
+def snapshot():
+    return {
+        "schools": list(
+            School.objects.values_list(
+                "pk", "name", "alias", "classrooms_count", "students_count"
+            )
+        ),
+        "classrooms": list(
+            Classroom.objects.values_list(
+                "pk", "school", "grade", "room", "students_count", "teachers_count"
+            )
+        ),
+        "teachers": list(
+            Teacher.objects.values_list("pk", "first_name", "last_name", "school")
+        ),
+        "links": list(
+            Teacher.classrooms.through.objects.values_list("teacher", "classroom")
+        ),
+        "students": list(
+            Student.objects.values_list("pk", "first_name", "last_name", "classroom")
+        ),
+    }
+
+
+def seed(*args):
+    output = io.StringIO()
+    call_command("seed", *args, stdout=output)
+    return output.getvalue()
+
+
+@pytest.mark.django_db
+class TestSeed:
+    def test_rows_are_inserted_with_their_counters(self):
+        output = seed("--schools", "3", "--classrooms", "4", "--students", "5")
+
+        assert "3 schools, 12 classrooms, 30 teachers, 60 links, 60 students" in output
+        assert School.objects.count() == 3
+        assert Student.objects.count() == 60
+        before = snapshot()
+        counters.recount_classrooms()
+        counters.recount_schools()
+        assert snapshot() == before
+
+    def test_teachers_teach_classrooms_of_their_school(self):
+        seed("--schools", "3", "--classrooms-per-teacher", "3")
+
+        links = Teacher.classrooms.through.objects.all()
+        assert links.count() == 3 * 10 * 3
+        assert not links.exclude(teacher__school=F("classroom__school")).exists()
+
+    def test_same_seed_inserts_same_rows(self):
+        snapshots = []
+        for _ in range(2):
+            with transaction.atomic():
+                seed("--schools", "2", "--seed", "7")
+                snapshots.append(snapshot())
+                transaction.set_rollback(True)
+
+        with transaction.atomic():
+            seed("--schools", "2", "--seed", "8")
+            other = snapshot()
+        assert snapshots[0] == snapshots[1]
+        assert other["students"] != snapshots[0]["students"]
+
+    def test_seeding_twice_keeps_names_unique(self):
+        seed("--schools", "2")
+        seed("--schools", "2")
+
+        assert Student.objects.count() == 2 * 2 * 12 * 30
+
+    def test_if_classrooms_do_not_fit_in_a_school_raise_error(self):
+        with pytest.raises(CommandError):
+            seed("--schools", "1", "--classrooms", "1201")
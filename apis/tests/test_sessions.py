@@ -0,0 +1,168 @@
+from apis.backends.auth import user_cache_key
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from model_bakery import baker
+from rest_framework import status
+from rest_framework.test import APIClient
+from app import settings_production
+import pytest
+
+PROFILE = (
+    "MIDDLEWARE",
+    "SESSION_ENGINE",
+    "SESSION_CACHE_ALIAS",
+    "AUTHENTICATION_BACKENDS",
+    "API_USER_CACHE",
+)
+
+
+def apply_profile(settings, cache_dir):
+    """Applies the session settings of the production profile."""
+    for name in PROFILE:
+        setattr(settings, name, getattr(settings_production, name))
+    caches_setting = {
+        alias: dict(cache) for alias, cache in settings_production.CACHES.items()
+    }
+    caches_setting["sessions"]["LOCATION"] = cache_dir
+    settings.CACHES = caches_setting
+
+
+@pytest.fixture
+def production_sessions(settings, tmp_path):
+    apply_profile(settings, tmp_path)
+
+
+@pytest.fixture
+def user():
+    return User.objects.create_user("client", is_staff=True)
+
+
+@pytest.fixture
+def login(user):
+    def do_login():
+        client = APIClient(HTTP_ACCEPT="application/json")
+        client.force_login(user)
+        return client
+
+    return do_login
+
+
+def table_queries(queries, table):
+    return [query for query in queries if f'"{table}"' in query["sql"]]
+
+
+@pytest.mark.django_db
+class TestProductionSessions:
+    def test_if_session_is_cached_return_200_without_session_queries(
+        self, production_sessions, login
+    ):
+        client = login()
+        client.get("/api/v1/schools/")
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get("/api/v1/schools/")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert table_queries(queries, "django_session") == []
+        assert table_queries(queries, "auth_user") == []
+
+    def test_if_user_is_deactivated_return_401(self, production_sessions, login, user):
+        client = login()
+        assert client.get("/api/v1/schools/").status_code == status.HTTP_200_OK
+        assert caches["sessions"].get(user_cache_key(user.pk)) is not None
+
+        user.is_active = False
+        user.save()
+        response = client.get("/api/v1/schools/")
+
+        assert caches["sessions"].get(user_cache_key(user.pk)) is None
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_if_user_is_deleted_return_401(self, production_sessions, login, user):
+        client = login()
+        client.get("/api/v1/schools/")
+
+        user.delete()
+        response = client.get("/api/v1/schools/")
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_if_v1_write_return_200_without_session_queries(
+        self, production_sessions, login
+    ):
+        school = baker.make("apis.School")
+        client = login()
+        client.get("/api/v1/schools/")
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.patch(
+                f"/api/v1/schools/{school.pk}/", {"address": "Road"}, format="json"
+            )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert table_queries(queries, "django_session") == []
+        assert table_queries(queries, "auth_user") == []
+
+    def test_if_session_is_unchanged_return_200_without_saving_session(
+        self, production_sessions, login
+    ):
+        client = login()
+        client.get("/admin/")
+        expire_date = Session.objects.get().expire_date
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get("/admin/")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert "sessionid" not in response.cookies
+        assert Session.objects.get().expire_date == expire_date
+        assert table_queries(queries, "django_session") == []
+
+
+@pytest.mark.benchmark
+@pytest.mark.django_db
+def test_session_queries(settings, tmp_path, user):
+    """
+    Prints the session and user queries of an authenticated read and write,
+    with the default session settings and with the production profile.
+    """
+    school = baker.make("apis.School")
+    url = f"/api/v1/schools/{school.pk}/"
+    requests = {
+        "read": lambda client: client.get("/api/v1/schools/"),
+        "write": lambda client: client.patch(url, {"address": "Road"}, format="json"),
+    }
+
+    def measure(do_request):
+        client = APIClient(HTTP_ACCEPT="application/json")
+        client.force_login(user)
+        do_request(client)
+        with CaptureQueriesContext(connection) as queries:
+            assert do_request(client).status_code == status.HTTP_200_OK
+        return (
+            len(table_queries(queries, "django_session")),
+            len(table_queries(queries, "auth_user")),
+            len(queries),
+        )
+
+    # Both with the write transactions of the production profile
+    settings.MIDDLEWARE = settings_production.MIDDLEWARE
+    default = {name: measure(do_request) for name, do_request in requests.items()}
+    apply_profile(settings, tmp_path)
+    profile = {name: measure(do_request) for name, do_request in requests.items()}
+    for name in requests:
+        for profile_name, (sessions, users, total) in (
+            ("default", default[name]),
+            ("production", profile[name]),
+        ):
+            print(
+                f"\n{name} {profile_name}: django_session={sessions} "
+                f"auth_user={users} queries={total}"
+            )
+        assert profile[name][0] + profile[name][1] == 0
+        assert (
+            profile[name][2] == default[name][2] - default[name][0] - default[name][1]
+        )
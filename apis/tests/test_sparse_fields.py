@@ -0,0 +1,116 @@
+from apis.models import School, Classroom, Student, Teacher
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from model_bakery import baker
+import pytest
+
+
+@pytest.fixture
+def get(api_client, settings):
+    def do_get(url, fast_read=True, **params):
+        settings.API_FAST_READ = fast_read
+        with CaptureQueriesContext(connection) as context:
+            response = api_client.get(url, params, HTTP_ACCEPT="application/json")
+        response.sql = " ".join(query["sql"] for query in context.captured_queries)
+        return response
+
+    return do_get
+
+
+@pytest.fixture
+def classroom():
+    school = baker.make(School)
+    classroom = baker.make(Classroom, school=school)
+    baker.make(Student, classroom=classroom, _quantity=2)
+    baker.make(Teacher, school=school, classrooms=[classroom])
+    return classroom
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("fast_read", [True, False])
+class TestSparseFields:
+    def test_fields_keep_only_requested_fields(
+        self, authenticate, get, classroom, fast_read
+    ):
+        authenticate()
+
+        response = get("/api/v1/schools/", fast_read, fields="id,name")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["results"] == [
+            {"id": classroom.school.id, "name": classroom.school.name}
+        ]
+        assert "address" not in response.sql
+        assert "students_count" not in response.sql
+
+    def test_omit_skips_relations(self, authenticate, get, classroom, fast_read):
+        authenticate()
+
+        response = get(
+            f"/api/v1/classrooms/{classroom.id}/", fast_read, omit="teachers,students"
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert list(response.json()) == ["id", "grade", "room", "school"]
+        assert "apis_student" not in response.sql
+        assert "apis_teacher" not in response.sql
+
+    def test_nested_fields_are_projected(self, authenticate, get, classroom, fast_read):
+        authenticate()
+
+        response = get(
+            "/api/v1/students/", fast_read, fields="id,school.name,classroom"
+        )
+
+        row = response.json()["results"][0]
+        assert list(row) == ["id", "school", "classroom"]
+        assert row["school"] == {"name": classroom.school.name}
+        assert row["classroom"] == {
+            "id": classroom.id,
+            "grade": classroom.grade,
+            "room": classroom.room,
+        }
+        assert "address" not in response.sql
+
+    def test_nested_omit_is_applied_to_many_relations(
+        self, authenticate, get, classroom, fast_read
+    ):
+        authenticate()
+
+        response = get(
+            "/api/v1/teachers/", fast_read, omit="school.address,classrooms.room"
+        )
+
+        row = response.json()["results"][0]
+        assert "address" not in row["school"]
+        assert row["classrooms"] == [{"id": classroom.id, "grade": classroom.grade}]
+
+    def test_pagination_works_without_ordering_fields(
+        self, authenticate, get, classroom, fast_read
+    ):
+        authenticate()
+
+        response = get("/api/v1/students/", fast_read, fields="id", page_size=1)
+        response = get(response.json()["next"].split("testserver")[1], fast_read)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.json()["results"]) == 1
+
+    @pytest.mark.parametrize(
+        "params, errors",
+        [
+            ({"fields": "id,nope"}, {"fields": ["Unknown field 'nope'."]}),
+            ({"omit": "id.x"}, {"omit": ["Unknown field 'id.x'."]}),
+            ({"omit": "school.nope"}, {"omit": ["Unknown field 'school.nope'."]}),
+        ],
+    )
+    def test_if_field_is_unknown_return_400(
+        self, authenticate, get, fast_read, params, errors
+    ):
+        authenticate()
+
+        response = get("/api/v1/teachers/", fast_read, **params)
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.json() == errors
@@ -1,6 +1,11 @@
+from apis import versioning
 from apis.models import School, Classroom, Student, Teacher
+from apis.serializers.student import BulkCreateStudentListSerializer
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 from model_bakery import baker
+import importlib
 import pytest
 
 
@@ -12,6 +17,14 @@ def list_students(api_client):
     return do_list_students
 
 
+@pytest.fixture
+def filter_students(api_client):
+    def do_filter_students(**params):
+        return api_client.get("/api/v1/students/", params)
+
+    return do_filter_students
+
+
 @pytest.fixture
 def get_student(api_client):
     def do_get_student(id=1):
@@ -28,6 +41,14 @@ def create_student(api_client):
     return do_create_student
 
 
+@pytest.fixture
+def bulk_create_students(api_client):
+    def do_bulk_create_students(students):
+        return api_client.post("/api/v1/students/bulk/", students, format="json")
+
+    return do_bulk_create_students
+
+
 @pytest.fixture
 def replace_student(api_client):
     def do_replace_student(id, student):
@@ -71,7 +92,7 @@ class TestListStudents:
         response = list_students()
 
         assert response.status_code == status.HTTP_200_OK
-        assert response.data[0] == {
+        assert response.data["results"][0] == {
             "id": student.id,
             "first_name": student.first_name,
             "last_name": student.last_name,
@@ -90,6 +111,48 @@ class TestListStudents:
         }
 
 
+@pytest.mark.django_db
+class TestFilterStudents:
+    def test_importing_filters_does_not_query_database(self):
+        import apis.filters
+
+        with CaptureQueriesContext(connection) as context:
+            importlib.reload(apis.filters)
+
+        assert context.captured_queries == []
+
+    def test_if_school_is_given_return_students_of_school(
+        self, authenticate, filter_students
+    ):
+        authenticate()
+        classroom = baker.make(Classroom)
+        student = baker.make(Student, classroom=classroom)
+        baker.make(Student)
+
+        response = filter_students(school=classroom.school.id)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [row["id"] for row in response.data["results"]] == [student.id]
+
+    def test_if_school_is_created_later_filter_accepts_it(
+        self, authenticate, filter_students
+    ):
+        authenticate()
+        filter_students(school=999)
+        school = baker.make(School, id=999)
+
+        response = filter_students(school=school.id)
+
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_if_school_does_not_exist_return_400(self, authenticate, filter_students):
+        authenticate()
+
+        response = filter_students(school=999)
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
 @pytest.mark.django_db
 class TestRetrieveStudent:
     def test_if_user_is_anonymous_return_401(self, get_student):
@@ -263,6 +326,216 @@ class TestCreateStudent:
         assert response.status_code == status.HTTP_400_BAD_REQUEST
 
 
+@pytest.mark.django_db
+class TestBulkCreateStudents:
+    def test_if_user_is_anonymous_return_401(self, bulk_create_students):
+        response = bulk_create_students([])
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_if_students_are_created_return_201(
+        self, authenticate, bulk_create_students
+    ):
+        authenticate()
+        classroom = baker.make(Classroom)
+
+        response = bulk_create_students(
+            [
+                {
+                    "first_name": "John",
+                    "last_name": "Doe",
+                    "gender": "M",
+                    "classroom_id": classroom.id,
+                },
+                {
+                    "first_name": "Jane",
+                    "last_name": "Doe",
+                    "gender": "F",
+                    "classroom_id": classroom.id,
+                },
+            ]
+        )
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert [student["first_name"] for student in response.data] == [
+            "John",
+            "Jane",
+        ]
+        assert all(student["id"] > 0 for student in response.data)
+        classroom.refresh_from_db()
+        assert classroom.students_count == 2
+        assert classroom.school.students_count == 2
+
+    def test_if_items_are_invalid_return_400_with_errors_per_item(
+        self, authenticate, bulk_create_students
+    ):
+        authenticate()
+        classroom = baker.make(Classroom)
+        baker.make(Student, first_name="John", last_name="Doe")
+        message = "Student with the same first name and last name already exists."
+
+        response = bulk_create_students(
+            [
+                {
+                    "first_name": "John",
+                    "last_name": "Doe",
+                    "gender": "M",
+                    "classroom_id": classroom.id,
+                },
+                {
+                    "first_name": "Jane",
+                    "last_name": "Doe",
+                    "gender": "F",
+                    "classroom_id": 999,
+                },
+                {
+                    "first_name": "Alice",
+                    "last_name": "Eve",
+                    "gender": "F",
+                    "classroom_id": classroom.id,
+                },
+                {
+                    "first_name": "Alice",
+                    "last_name": "Eve",
+                    "gender": "F",
+                    "classroom_id": classroom.id,
+                },
+            ]
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data == [
+            {"first_name": [message], "last_name": [message]},
+            {"classroom_id": ["No classroom with the given ID was found."]},
+            {},
+            {"first_name": [message], "last_name": [message]},
+        ]
+        assert not Student.objects.filter(first_name="Alice").exists()
+
+    def test_if_name_is_taken_after_validation_return_400_with_created_items(
+        self, authenticate, bulk_create_students, monkeypatch
+    ):
+        authenticate()
+        classroom = baker.make(Classroom)
+        message = "Student with the same first name and last name already exists."
+        get_taken_names = BulkCreateStudentListSerializer.get_taken_names
+        calls = []
+
+        def created_meanwhile(self, students):
+            calls.append(students)
+            if len(calls) == 1:
+                # Another request creates John Doe once the batch is validated
+                baker.make(
+                    Student, first_name="John", last_name="Doe", classroom=classroom
+                )
+                return set()
+            return get_taken_names(self, students)
+
+        monkeypatch.setattr(
+            BulkCreateStudentListSerializer, "get_taken_names", created_meanwhile
+        )
+        monkeypatch.setattr(BulkCreateStudentListSerializer, "chunk_size", 1)
+
+        response = bulk_create_students(
+            [
+                {
+                    "first_name": first_name,
+                    "last_name": "Doe",
+                    "gender": "M",
+                    "classroom_id": classroom.id,
+                }
+                for first_name in ["Jane", "John", "Jim"]
+            ]
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data == [
+            {},
+            {"first_name": [message], "last_name": [message]},
+            {
+                "non_field_errors": [
+                    "Not created, as another student of the batch failed."
+                ]
+            },
+        ]
+        # The chunk before the conflict stays created
+        assert sorted(Student.objects.values_list("first_name", flat=True)) == [
+            "Jane",
+            "John",
+        ]
+        classroom.refresh_from_db()
+        assert classroom.students_count == 2
+
+    @pytest.mark.django_db(transaction=True)
+    @pytest.mark.usefixtures("write_retry")
+    def test_if_writes_are_retried_each_chunk_commits(
+        self, authenticate, bulk_create_students, monkeypatch
+    ):
+        authenticate()
+        classroom = baker.make(Classroom)
+        bump = versioning.bump
+        depths = []
+
+        def record(*models):
+            depths.append(len(connection.atomic_blocks))
+            bump(*models)
+
+        monkeypatch.setattr(versioning, "bump", record)
+        monkeypatch.setattr(BulkCreateStudentListSerializer, "chunk_size", 1)
+        response = bulk_create_students(
+            [
+                {
+                    "first_name": first_name,
+                    "last_name": "Doe",
+                    "gender": "M",
+                    "classroom_id": classroom.id,
+                }
+                for first_name in ["Jane", "John"]
+            ]
+        )
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert Student.objects.count() == 2
+        # Each chunk is its own transaction, not a savepoint of the request's
+        assert depths == [1, 1]
+
+    def test_if_item_is_missing_field_return_400(
+        self, authenticate, bulk_create_students
+    ):
+        authenticate()
+        classroom = baker.make(Classroom)
+
+        response = bulk_create_students(
+            [{"first_name": "John", "last_name": "Doe", "classroom_id": classroom.id}]
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert list(response.data[0]) == ["gender"]
+
+    def test_query_count_does_not_grow_with_batch(
+        self, authenticate, bulk_create_students
+    ):
+        authenticate()
+        classroom = baker.make(Classroom)
+
+        def count_queries(quantity, offset):
+            students = [
+                {
+                    "first_name": f"First {offset + index}",
+                    "last_name": "Last",
+                    "gender": "O",
+                    "classroom_id": classroom.id,
+                }
+                for index in range(quantity)
+            ]
+            with CaptureQueriesContext(connection) as context:
+                response = bulk_create_students(students)
+            assert response.status_code == status.HTTP_201_CREATED
+            return len(context.captured_queries)
+
+        assert count_queries(10, 0) == count_queries(200, 10)
+
+
 class TestReplaceStudent:
     def test_if_user_is_anonymous_return_401(self, replace_student):
         response = replace_student(1, {})
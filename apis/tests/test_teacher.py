@@ -1,4 +1,5 @@
 from apis.models import School, Classroom, Teacher
+from django.db import IntegrityError, transaction
 from rest_framework import status
 from model_bakery import baker
 import pytest
@@ -28,6 +29,16 @@ def create_teacher(api_client):
     return do_create_teacher
 
 
+@pytest.fixture
+def assign_classrooms(api_client):
+    def do_assign_classrooms(assignments):
+        return api_client.post(
+            "/api/v1/teachers/assign-classrooms/", assignments, format="json"
+        )
+
+    return do_assign_classrooms
+
+
 @pytest.fixture
 def replace_teacher(api_client):
     def do_replace_teacher(id, teacher):
@@ -71,7 +82,7 @@ class TestListTeachers:
         response = list_teachers()
 
         assert response.status_code == status.HTTP_200_OK
-        assert response.data[0] == {
+        assert response.data["results"][0] == {
             "id": teacher.id,
             "first_name": teacher.first_name,
             "last_name": teacher.last_name,
@@ -102,7 +113,7 @@ class TestListTeachers:
 
         response = list_teachers()
 
-        response_classrooms = response.data[0]["classrooms"]
+        response_classrooms = response.data["results"][0]["classrooms"]
         assert_classrooms = [
             {
                 "id": classroom1.id,
@@ -394,6 +405,87 @@ class TestCreateTeacher:
 
 
 @pytest.mark.django_db
+@pytest.mark.django_db
+class TestAssignClassrooms:
+    def test_if_user_is_anonymous_return_401(self, assign_classrooms):
+        response = assign_classrooms([])
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_if_classrooms_are_assigned_return_200(
+        self, authenticate, assign_classrooms
+    ):
+        authenticate()
+        school = baker.make(School)
+        classroom1, classroom2, classroom3 = baker.make(
+            Classroom, school=school, _quantity=3
+        )
+        teacher1 = baker.make(Teacher, school=school, classrooms=[classroom1])
+        teacher2 = baker.make(Teacher, school=school, classrooms=[classroom3])
+
+        response = assign_classrooms(
+            [
+                {"teacher_id": teacher1.id, "classrooms_id": [classroom2.id]},
+                {
+                    "teacher_id": teacher2.id,
+                    "classrooms_id": [classroom2.id, classroom3.id],
+                },
+            ]
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert list(teacher1.classrooms.all()) == [classroom2]
+        assert set(teacher2.classrooms.all()) == {classroom2, classroom3}
+        for classroom, expected in [(classroom1, 0), (classroom2, 2), (classroom3, 1)]:
+            classroom.refresh_from_db()
+            assert classroom.teachers_count == expected
+
+    def test_if_classrooms_are_empty_teacher_is_unassigned(
+        self, authenticate, assign_classrooms
+    ):
+        authenticate()
+        school = baker.make(School)
+        classroom = baker.make(Classroom, school=school)
+        teacher = baker.make(Teacher, school=school, classrooms=[classroom])
+
+        response = assign_classrooms([{"teacher_id": teacher.id, "classrooms_id": []}])
+
+        assert response.status_code == status.HTTP_200_OK
+        assert teacher.classrooms.count() == 0
+
+    def test_if_items_are_invalid_return_400_with_errors_per_item(
+        self, authenticate, assign_classrooms
+    ):
+        authenticate()
+        school = baker.make(School)
+        classroom = baker.make(Classroom, school=school)
+        other_classroom = baker.make(Classroom)
+        teacher1 = baker.make(Teacher, school=school)
+        teacher2 = baker.make(Teacher, school=school)
+
+        response = assign_classrooms(
+            [
+                {"teacher_id": teacher1.id, "classrooms_id": [classroom.id]},
+                {"teacher_id": teacher2.id, "classrooms_id": [other_classroom.id]},
+                {"teacher_id": 999, "classrooms_id": []},
+                {"teacher_id": teacher1.id, "classrooms_id": []},
+            ]
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data == [
+            {},
+            {
+                "classrooms_id": [
+                    "The school of the classroom must be the same as the school of the teacher."
+                ]
+            },
+            {"teacher_id": ["No teacher with the given ID was found."]},
+            {"teacher_id": ["Teacher is assigned more than once."]},
+        ]
+        assert teacher1.classrooms.count() == 0
+
+
 class TestReplaceTeacher:
     def test_if_user_is_anonymous_return_401(self, replace_teacher):
         response = replace_teacher(1, {})
@@ -502,7 +594,11 @@ class TestUpdateTeacher:
         authenticate()
         classroom = baker.make(Classroom, id=100)
         teacher = baker.make(
-            Teacher, first_name="a", last_name="b", classrooms=[classroom]
+            Teacher,
+            first_name="a",
+            last_name="b",
+            school=classroom.school,
+            classrooms=[classroom],
         )
 
         response = update_teacher(teacher.id, {"classrooms_id": [classroom.id, 1]})
@@ -546,3 +642,55 @@ class TestDeleteTeacher:
         response = delete_teacher(teacher.id)
 
         assert response.status_code == status.HTTP_204_NO_CONTENT
+
+
+@pytest.mark.django_db
+class TestSameSchoolConstraint:
+    def test_if_through_rows_are_bulk_inserted_across_schools_raise(self):
+        teacher = baker.make(Teacher)
+        classroom = baker.make(Classroom)
+        through = Teacher.classrooms.through
+
+        with pytest.raises(IntegrityError), transaction.atomic():
+            through.objects.bulk_create(
+                [through(teacher_id=teacher.id, classroom_id=classroom.id)]
+            )
+
+    def test_if_teacher_with_classrooms_moves_school_raise(self):
+        classroom = baker.make(Classroom)
+        teacher = baker.make(Teacher, school=classroom.school, classrooms=[classroom])
+
+        with pytest.raises(IntegrityError), transaction.atomic():
+            Teacher.objects.filter(pk=teacher.pk).update(school=baker.make(School))
+
+    def test_if_classroom_with_teachers_moves_school_raise(self):
+        classroom = baker.make(Classroom)
+        baker.make(Teacher, school=classroom.school, classrooms=[classroom])
+
+        with pytest.raises(IntegrityError), transaction.atomic():
+            Classroom.objects.filter(pk=classroom.pk).update(school=baker.make(School))
+
+    def test_if_classrooms_of_other_school_are_added_return_400_message(
+        self, authenticate, create_teacher
+    ):
+        authenticate()
+        school = baker.make(School)
+        classroom = baker.make(Classroom)
+
+        response = create_teacher(
+            {
+                "first_name": "a",
+                "last_name": "b",
+                "gender": "M",
+                "school_id": school.id,
+                "classrooms_id": [classroom.id],
+            }
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data == {
+            "classrooms_id": [
+                "The school of the classroom must be the same as the school of the teacher."
+            ]
+        }
+        assert not Teacher.objects.exists()
@@ -0,0 +1,269 @@
+from apis import tokens
+from apis.authentication import TokenAuthentication
+from apis.models import ApiToken
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.authentication import BasicAuthentication
+from rest_framework.test import APIRequestFactory
+import base64
+import io
+import time
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    tokens.cache.clear()
+    yield
+    tokens.cache.clear()
+
+
+@pytest.fixture
+def user():
+    return User.objects.create_user("client")
+
+
+@pytest.fixture
+def issue(user):
+    def do_issue(name=""):
+        return tokens.issue(user, name)
+
+    return do_issue
+
+
+@pytest.fixture
+def list_schools(api_client):
+    def do_list_schools(authorization):
+        return api_client.get(
+            "/api/v1/schools/",
+            HTTP_ACCEPT="application/json",
+            HTTP_AUTHORIZATION=authorization,
+        )
+
+    return do_list_schools
+
+
+def token_queries(queries):
+    return [query for query in queries if "apis_apitoken" in query["sql"]]
+
+
+@pytest.mark.django_db
+class TestTokenAuthentication:
+    def test_if_token_is_valid_return_200(self, issue, list_schools):
+        _, key = issue()
+
+        response = list_schools(f"Token {key}")
+
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_if_token_is_unknown_return_401(self, list_schools):
+        response = list_schools("Token nope")
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert response["WWW-Authenticate"] == "Token"
+
+    def test_if_header_is_malformed_return_401(self, list_schools):
+        response = list_schools("Token a b")
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_if_token_is_revoked_return_401(self, issue, list_schools):
+        token, key = issue()
+        list_schools(f"Token {key}")
+
+        tokens.revoke(ApiToken.objects.filter(pk=token.pk))
+        response = list_schools(f"Token {key}")
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_if_token_is_saved_revoked_return_401(self, issue, list_schools):
+        token, key = issue()
+        list_schools(f"Token {key}")
+
+        token.revoked_at = timezone.now()
+        token.save()
+        response = list_schools(f"Token {key}")
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_if_token_is_revoked_in_admin_return_401(self, issue, list_schools):
+        token, key = issue()
+        list_schools(f"Token {key}")
+        admin = User.objects.create_superuser("admin")
+        client = Client()
+        client.force_login(admin)
+
+        response = client.post(
+            "/admin/apis/apitoken/",
+            {"action": "revoke", "_selected_action": [token.pk]},
+        )
+
+        assert response.status_code == status.HTTP_302_FOUND
+        token.refresh_from_db()
+        assert token.revoked_at is not None
+        response = list_schools(f"Token {key}")
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_if_user_is_deactivated_return_401(self, user, issue, list_schools):
+        _, key = issue()
+        list_schools(f"Token {key}")
+
+        user.is_active = False
+        user.save()
+        response = list_schools(f"Token {key}")
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_if_token_is_cached_no_query_is_run(self, issue, list_schools):
+        _, key = issue()
+        with CaptureQueriesContext(connection) as first:
+            list_schools(f"Token {key}")
+
+        with CaptureQueriesContext(connection) as second:
+            response = list_schools(f"Token {key}")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(token_queries(first)) == 1
+        assert token_queries(second) == []
+
+    def test_if_cache_entry_expired_token_is_checked_again(
+        self, issue, list_schools, settings
+    ):
+        settings.API_TOKEN_CACHE_SECONDS = 0
+        _, key = issue()
+        list_schools(f"Token {key}")
+
+        with CaptureQueriesContext(connection) as queries:
+            list_schools(f"Token {key}")
+
+        assert len(token_queries(queries)) == 1
+
+    def test_if_token_is_revoked_by_another_process_return_401(
+        self, settings, issue, list_schools, django_capture_on_commit_callbacks
+    ):
+        settings.API_TOKEN_REVOCATION_CACHE = "default"
+        token, key = issue()
+        list_schools(f"Token {key}")
+        # Another process, e.g. `revoke_token`, does not share this cache
+        other_process = tokens.TokenCache()
+        cache = tokens.cache
+        tokens.cache = other_process
+        try:
+            with django_capture_on_commit_callbacks(execute=True):
+                tokens.revoke(ApiToken.objects.filter(pk=token.pk))
+        finally:
+            tokens.cache = cache
+
+        with CaptureQueriesContext(connection) as queries:
+            response = list_schools(f"Token {key}")
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert len(token_queries(queries)) == 1
+
+    def test_if_user_without_tokens_is_saved_revocation_is_not_published(
+        self, settings, user, django_capture_on_commit_callbacks
+    ):
+        settings.API_TOKEN_REVOCATION_CACHE = "default"
+        revocation = tokens.get_revocation()
+
+        with django_capture_on_commit_callbacks(execute=True):
+            user.save()
+
+        assert tokens.get_revocation() == revocation
+
+    def test_evict_drops_only_the_given_tokens_and_users(self, user):
+        other_user = User.objects.create_user("other")
+        tokens.cache.set("a", 1, user)
+        tokens.cache.set("b", 2, user)
+        tokens.cache.set("c", 3, other_user)
+        tokens.cache.set("d", 4, other_user)
+
+        tokens.cache.evict(token_ids={3}, user_ids={user.pk}, shared=False)
+
+        assert list(tokens.cache.entries) == ["d"]
+        assert tokens.cache.by_token == {4: "d"}
+        assert tokens.cache.by_user == {other_user.pk: {"d"}}
+
+    def test_only_digest_is_stored(self, issue):
+        token, key = issue("sis")
+
+        token.refresh_from_db()
+        assert key not in (token.digest, token.prefix, token.name)
+        assert token.digest == tokens.make_digest(key)
+        assert key.startswith(token.prefix)
+
+
+@pytest.mark.django_db
+class TestTokenCommands:
+    def test_issued_token_authenticates(self, user, list_schools):
+        stdout = io.StringIO()
+
+        call_command("issue_token", "client", "--name", "sis", stdout=stdout)
+
+        token = ApiToken.objects.get()
+        header, key = stdout.getvalue().splitlines()
+        assert header == f"Issued token {token.pk} for client:"
+        assert token.name == "sis"
+        assert list_schools(f"Token {key}").status_code == status.HTTP_200_OK
+
+    def test_if_user_does_not_exist_issue_raises(self):
+        with pytest.raises(CommandError):
+            call_command("issue_token", "nobody")
+
+    def test_revoke_by_id(self, issue):
+        revoked, _ = issue()
+        kept, _ = issue()
+        stdout = io.StringIO()
+
+        call_command("revoke_token", str(revoked.pk), stdout=stdout)
+
+        assert stdout.getvalue() == "Revoked 1 token(s).\n"
+        assert list(
+            ApiToken.objects.filter(revoked_at__isnull=True).values_list(
+                "pk", flat=True
+            )
+        ) == [kept.pk]
+
+    def test_revoke_by_user(self, issue):
+        issue()
+        issue()
+        stdout = io.StringIO()
+
+        call_command("revoke_token", "--user", "client", stdout=stdout)
+        call_command("revoke_token", "--user", "client", stdout=stdout)
+
+        assert stdout.getvalue() == "Revoked 2 token(s).\nRevoked 0 token(s).\n"
+
+    def test_if_nothing_is_given_revoke_raises(self):
+        with pytest.raises(CommandError):
+            call_command("revoke_token")
+
+
+@pytest.mark.benchmark
+@pytest.mark.django_db
+def test_benchmark_token_against_basic_authentication():
+    User.objects.create_user("client", password="secret")
+    _, key = tokens.issue(User.objects.get())
+    credentials = base64.b64encode(b"client:secret").decode("ascii")
+    factory = APIRequestFactory()
+    requests = 20
+
+    def timing(authentication, authorization):
+        request = factory.get("/", HTTP_AUTHORIZATION=authorization)
+        assert authentication.authenticate(request) is not None
+        start = time.perf_counter()
+        for _ in range(requests):
+            authentication.authenticate(request)
+        return (time.perf_counter() - start) / requests
+
+    basic = timing(BasicAuthentication(), f"Basic {credentials}")
+    token = timing(TokenAuthentication(), f"Token {key}")
+
+    print(f"\nper request: Basic {basic * 1e6:.0f}µs, Token {token * 1e6:.1f}µs")
+    assert token * 100 < basic
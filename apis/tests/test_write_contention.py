@@ -0,0 +1,185 @@
+from apis import counters
+from apis.models import Classroom, Student
+from apis.serializers.classroom import throw_unique_error
+from django.conf import settings
+from django.db import IntegrityError, OperationalError
+from rest_framework import status
+from model_bakery import baker
+from pathlib import Path
+import json
+import os
+import subprocess
+import sys
+import pytest
+
+
+@pytest.fixture
+def create_student(api_client):
+    def do_create_student(classroom, first_name="John"):
+        return api_client.post(
+            "/api/v1/students/",
+            {
+                "first_name": first_name,
+                "last_name": "Doe",
+                "gender": "M",
+                "classroom_id": classroom.id,
+            },
+            format="json",
+        )
+
+    return do_create_student
+
+
+@pytest.fixture
+def lock_database(monkeypatch):
+    """Fails the next `times` student counter updates with a lock error."""
+
+    def do_lock_database(times):
+        shift_students = counters.shift_students
+        calls = []
+
+        def locked(*args, **kwargs):
+            calls.append(args)
+            if len(calls) <= times:
+                raise OperationalError("database is locked")
+            return shift_students(*args, **kwargs)
+
+        monkeypatch.setattr(counters, "shift_students", locked)
+        return calls
+
+    return do_lock_database
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("write_retry")
+class TestWriteRetry:
+    def test_if_database_is_locked_once_return_201(
+        self, authenticate, create_student, lock_database
+    ):
+        authenticate()
+        classroom = baker.make(Classroom)
+        calls = lock_database(times=1)
+
+        response = create_student(classroom)
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert len(calls) == 2
+        # The failed attempt was rolled back
+        assert Student.objects.count() == 1
+        classroom.refresh_from_db()
+        assert classroom.students_count == 1
+
+    def test_if_database_stays_locked_return_503(
+        self, authenticate, create_student, lock_database
+    ):
+        authenticate()
+        classroom = baker.make(Classroom)
+        calls = lock_database(times=10)
+
+        response = create_student(classroom)
+
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert response["Retry-After"] == "1"
+        assert len(calls) == settings.API_WRITE_RETRIES + 1
+        assert not Student.objects.exists()
+
+
+def test_throw_unique_error_reraises_other_integrity_errors():
+    error = IntegrityError("FOREIGN KEY constraint failed")
+
+    with pytest.raises(IntegrityError) as info:
+        throw_unique_error(["first_name"], error, "message")
+
+    assert info.value is error
+
+
+def run_writers(threads, posts):
+    """
+    Posts `posts` students from each of `threads` threads to a file database
+    set up with the production settings. Run in its own process.
+    """
+    import threading
+    import time
+    from django.test.utils import setup_test_environment
+
+    setup_test_environment()
+    from django.contrib.auth.models import User
+    from django.core.management import call_command
+    from django.db import connection
+    from django.urls import resolve
+    from rest_framework.test import APIClient
+    from apis.models import School, Classroom
+
+    call_command("migrate", verbosity=0)
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA journal_mode")
+        journal_mode = cursor.fetchone()[0]
+    classroom = Classroom.objects.create(
+        school=School.objects.create(name="s"), grade=1, room=1
+    )
+    statuses = []
+    # Import the URLconf outside of the timing
+    resolve("/api/v1/students/")
+
+    def write(thread):
+        client = APIClient()
+        client.force_authenticate(user=User(is_staff=True))
+        for post in range(posts):
+            response = client.post(
+                "/api/v1/students/",
+                {
+                    "first_name": f"t{thread}",
+                    "last_name": f"p{post}",
+                    "gender": "M",
+                    "classroom_id": classroom.id,
+                },
+                format="json",
+                HTTP_ACCEPT="application/json",
+            )
+            statuses.append(response.status_code)
+        connection.close()
+
+    workers = [threading.Thread(target=write, args=(n,)) for n in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    seconds = time.perf_counter() - start
+    classroom.refresh_from_db()
+    return {
+        "journal_mode": journal_mode,
+        "statuses": statuses,
+        "students_count": classroom.students_count,
+        "seconds": seconds,
+    }
+
+
+def test_concurrent_writers_get_no_server_errors(tmp_path):
+    threads, posts = 8, 10
+    script = (
+        "import django, json, sys; django.setup(); sys.path.insert(0, 'apis/tests');"
+        "from test_write_contention import run_writers;"
+        f"print(json.dumps(run_writers({threads}, {posts})))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        env={
+            **os.environ,
+            "DJANGO_SETTINGS_MODULE": "app.settings_production",
+            "SQLITE_PATH": str(tmp_path / "db.sqlite3"),
+            "SESSION_CACHE_DIR": str(tmp_path / "sessions"),
+            "API_METRICS_FILE": str(tmp_path / "metrics.sqlite3"),
+        },
+        cwd=Path(settings.BASE_DIR),
+        capture_output=True,
+        text=True,
+        timeout=300,
+    )
+    assert result.returncode == 0, result.stderr
+    outcome = json.loads(result.stdout.splitlines()[-1])
+
+    assert outcome["journal_mode"] == "wal"
+    assert outcome["statuses"] == [status.HTTP_201_CREATED] * (threads * posts)
+    assert outcome["students_count"] == threads * posts
+    print(f"\n{threads * posts / outcome['seconds']:.0f} writes/s")
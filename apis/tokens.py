@@ -0,0 +1,189 @@
+"""
+Hashed API tokens, checked by apis.authentication.TokenAuthentication and
+managed with the `issue_token` and `revoke_token` commands.
+
+A token is 256 random bits. It cannot be guessed from a dictionary like a
+password can, so a single SHA-256 is enough to store it, and the digest is
+looked up through a unique index. Verified tokens are kept in an in-process
+cache for `API_TOKEN_CACHE_SECONDS`, so most requests authenticate without
+a query. Revoking a token, or saving or deleting its user, evicts it from
+the cache of the current process.
+
+Other processes, like the servers when `revoke_token` runs, learn about it
+through a revocation marker kept in the `API_TOKEN_REVOCATION_CACHE` shared
+cache. Each eviction replaces the marker once its transaction commits, and
+a process that finds a new marker on a cache hit drops all of its entries.
+Without that cache, other processes drop a token when their entry expires.
+"""
+
+import copy
+import hashlib
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils import timezone
+from apis.models import ApiToken
+
+KEY_BYTES = 32
+PREFIX_LENGTH = 8
+
+REVOCATION_KEY = "apis:token-revocation"
+
+
+class TokenCache:
+    """
+    `{digest: (expires at, token id, user)}`, least recently used first,
+    with the digests indexed by token id and by user id for evictions.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.by_token = {}
+        self.by_user = {}
+        # The shared revocation marker when the entries were last checked
+        self.revocation = None
+
+    def get(self, digest):
+        revocation = get_revocation()
+        with self.lock:
+            if revocation != self.revocation:
+                self.clear_entries()
+                self.revocation = revocation
+            entry = self.entries.get(digest)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                self.remove(digest)
+                return None
+            self.entries.move_to_end(digest)
+            return entry
+
+    def set(self, digest, token_id, user):
+        with self.lock:
+            if digest in self.entries:
+                self.remove(digest)
+            self.entries[digest] = (
+                time.monotonic() + settings.API_TOKEN_CACHE_SECONDS,
+                token_id,
+                user,
+            )
+            self.by_token[token_id] = digest
+            self.by_user.setdefault(user.pk, set()).add(digest)
+            while len(self.entries) > settings.API_TOKEN_CACHE_SIZE:
+                self.remove(next(iter(self.entries)))
+
+    def evict(self, token_ids=(), user_ids=(), shared=True):
+        """
+        Drops the entries of `token_ids` and of `user_ids`, then, unless
+        `shared` is false, those of the other processes once the current
+        transaction commits.
+        """
+        with self.lock:
+            digests = {
+                self.by_token[token_id]
+                for token_id in token_ids
+                if token_id in self.by_token
+            }
+            for user_id in user_ids:
+                digests.update(self.by_user.get(user_id, ()))
+            for digest in digests:
+                self.remove(digest)
+        if shared:
+            transaction.on_commit(publish_revocation)
+
+    def clear(self):
+        with self.lock:
+            self.clear_entries()
+
+    def remove(self, digest):
+        _, token_id, user = self.entries.pop(digest)
+        del self.by_token[token_id]
+        digests = self.by_user[user.pk]
+        digests.discard(digest)
+        if not digests:
+            del self.by_user[user.pk]
+
+    def clear_entries(self):
+        self.entries.clear()
+        self.by_token.clear()
+        self.by_user.clear()
+
+
+cache = TokenCache()
+
+
+def get_revocation_cache():
+    alias = getattr(settings, "API_TOKEN_REVOCATION_CACHE", None)
+    return None if alias is None else caches[alias]
+
+
+def get_revocation():
+    """The current shared revocation marker, None without a shared cache."""
+    shared = get_revocation_cache()
+    return None if shared is None else shared.get(REVOCATION_KEY)
+
+
+def publish_revocation():
+    """Replaces the shared revocation marker, so that every process evicts."""
+    shared = get_revocation_cache()
+    if shared is not None:
+        shared.set(REVOCATION_KEY, secrets.token_hex(8), None)
+
+
+def forget_user(user_id):
+    """
+    Evicts the tokens of `user_id`, from every process only if it has valid
+    ones, as users are saved on each login.
+    """
+    shared = (
+        get_revocation_cache() is not None
+        and ApiToken.objects.filter(user_id=user_id, revoked_at__isnull=True).exists()
+    )
+    cache.evict(user_ids={user_id}, shared=shared)
+
+
+def make_digest(key):
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def issue(user, name=""):
+    """Creates a token for `user`, returns it with its key, only known here."""
+    key = secrets.token_urlsafe(KEY_BYTES)
+    token = ApiToken.objects.create(
+        user=user, name=name, prefix=key[:PREFIX_LENGTH], digest=make_digest(key)
+    )
+    return token, key
+
+
+def revoke(tokens):
+    """Revokes the `tokens` queryset, returns how many were still valid."""
+    ids = list(tokens.filter(revoked_at__isnull=True).values_list("pk", flat=True))
+    revoked = ApiToken.objects.filter(pk__in=ids).update(revoked_at=timezone.now())
+    cache.evict(token_ids=set(ids))
+    return revoked
+
+
+def valid_tokens(digest):
+    return ApiToken.objects.select_related("user").filter(
+        digest=digest, revoked_at__isnull=True, user__is_active=True
+    )
+
+
+def authenticate(key):
+    """Returns `(user, token id)` of the valid token `key`, or None."""
+    digest = make_digest(key)
+    entry = cache.get(digest)
+    if entry is None:
+        token = valid_tokens(digest).first()
+        if token is None:
+            return None
+        cache.set(digest, token.pk, token.user)
+        return copy.copy(token.user), token.pk
+    # Copied so that a request cannot change the cached user of another
+    return copy.copy(entry[2]), entry[1]
@@ -1,17 +1,51 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from apis.views.v1.aread import AsyncReadView
+from apis.views.v1.fast import FastReadMixin
+from apis.views.v1.job import JobViewSet
 from apis.views.v1.school import SchoolViewSet
 from apis.views.v1.classroom import ClassroomViewSet
 from apis.views.v1.teacher import TeacherViewSet
 from apis.views.v1.student import StudentViewSet
 
-
 router = DefaultRouter()
 router.register("schools", SchoolViewSet)
 router.register("classrooms", ClassroomViewSet)
 router.register("teachers", TeacherViewSet)
 router.register("students", StudentViewSet)
+router.register("jobs", JobViewSet)
+
+
+def async_read_urls(router):
+    """
+    List and detail routes served by AsyncReadView, to be placed before the
+    router's. Only integer primary keys are matched so that the router's
+    list-level actions (`export/`, `bulk/`...) still reach the viewsets.
+    Viewsets without fast reads are left to the router.
+    """
+    urls = []
+    for prefix, viewset, basename in router.registry:
+        if not issubclass(viewset, FastReadMixin):
+            continue
+        urls += [
+            path(
+                f"{prefix}/",
+                AsyncReadView.as_view(viewset=viewset, detail=False),
+                name=f"{basename}-list",
+            ),
+            path(
+                f"{prefix}/<int:pk>/",
+                AsyncReadView.as_view(viewset=viewset, detail=True),
+                name=f"{basename}-detail",
+            ),
+        ]
+    return urls
+
 
-api_v1_urls = (router.urls, "v1")
+if getattr(settings, "API_ASYNC_READS", False):
+    api_v1_urls = (async_read_urls(router) + router.urls, "v1")
+else:
+    api_v1_urls = (router.urls, "v1")
 
 urlpatterns = [path("v1/", include(api_v1_urls))]
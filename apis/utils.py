@@ -0,0 +1,12 @@
+from django.db import connection
+
+
+def batched(items, size):
+    """Yields consecutive slices of `items` holding at most `size` elements."""
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def max_query_params():
+    """Number of parameters the database accepts in a single query."""
+    return connection.features.max_query_params or 999
@@ -0,0 +1,79 @@
+"""
+Per-model version counters.
+
+Every save, delete and teacher/classroom m2m change bumps the version of the
+model it touched when its transaction commits, once per model and
+transaction (see apis.signals.handlers). Bulk write paths that skip the
+signals bump explicitly, inside their transactions. A read endpoint that depends on a set of models
+can then tell whether its output may have changed with one small query.
+"""
+
+from django.db import connection, transaction
+from apis.models import TableVersion
+
+
+def label(model):
+    return model._meta.label_lower
+
+
+def bump(*models):
+    """Increments the version of each of `models`, in one statement."""
+    bump_labels({label(model) for model in models})
+
+
+def bump_labels(names):
+    names = sorted(names)
+    quote_name = connection.ops.quote_name
+    table = quote_name(TableVersion._meta.db_table)
+    name, version = (
+        quote_name(TableVersion._meta.get_field(field).column)
+        for field in ("name", "version")
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} ({name}, {version}) "
+            f"VALUES {', '.join(['(%s, 1)'] * len(names))} "
+            f"ON CONFLICT ({name}) DO UPDATE SET {version} = {table}.{version} + 1",
+            names,
+        )
+
+
+def bump_on_commit(*models):
+    """
+    Bumps the versions of `models` when the current transaction commits, or
+    right away outside one, once per model however many of its rows the
+    transaction changed.
+    """
+    wrapper = transaction.get_connection()
+    pending = wrapper.__dict__.setdefault("pending_versions", set())
+    pending.update(label(model) for model in models)
+    # Registered each time, as the callbacks of rolled back savepoints are
+    # dropped. Robust, since the changes are already committed.
+    transaction.on_commit(lambda: bump_pending(wrapper), robust=True)
+
+
+def bump_pending(wrapper):
+    names = wrapper.__dict__.pop("pending_versions", None)
+    if names:
+        with transaction.atomic():
+            bump_labels(names)
+
+
+def get_versions(*models):
+    """Returns `{label: version}` for `models`, 0 for never changed ones."""
+    names = [label(model) for model in models]
+    versions = dict.fromkeys(names, 0)
+    versions.update(
+        TableVersion.objects.filter(name__in=names).values_list("name", "version")
+    )
+    return versions
+
+
+async def aget_versions(*models):
+    """`get_versions` for async views."""
+    names = [label(model) for model in models]
+    versions = dict.fromkeys(names, 0)
+    rows = TableVersion.objects.filter(name__in=names).values_list("name", "version")
+    async for name, version in rows:
+        versions[name] = version
+    return versions
@@ -0,0 +1,50 @@
+import hmac
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from apis import metrics, response_cache
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def metrics_view(request):
+    """
+    Request metrics of every worker process in the Prometheus text format.
+    Only served to staff users, and to scrapers sending `API_METRICS_TOKEN`
+    as a bearer token.
+    """
+    if not metrics.is_enabled() or not (
+        request.user.is_staff or has_metrics_token(request)
+    ):
+        raise Http404
+    extra = []
+    cache = response_cache.get_cache()
+    if cache is not None:
+        stats = response_cache.get_stats(cache)
+        extra += [
+            (
+                "api_response_cache_hits_total",
+                "counter",
+                "Response cache hits.",
+                stats["hits"],
+            ),
+            (
+                "api_response_cache_misses_total",
+                "counter",
+                "Response cache misses.",
+                stats["misses"],
+            ),
+        ]
+    return HttpResponse(
+        metrics.render(metrics.registry.collect(), extra), content_type=CONTENT_TYPE
+    )
+
+
+def has_metrics_token(request):
+    token = settings.API_METRICS_TOKEN
+    if not token:
+        return False
+    scheme, _, credentials = request.META.get("HTTP_AUTHORIZATION", "").partition(" ")
+    return scheme.lower() == "bearer" and hmac.compare_digest(
+        credentials.encode(), token.encode()
+    )
@@ -0,0 +1,152 @@
+from asgiref.sync import sync_to_async
+from django.http import Http404
+from django.utils.http import parse_etags
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from django_filters.filters import ModelChoiceFilter, ModelMultipleChoiceFilter
+from django_filters.utils import translate_validation
+from rest_framework import exceptions, status
+from rest_framework.request import Request
+from rest_framework.response import Response
+from apis import versioning
+
+
+class AsyncReadView(View):
+    """
+    Native async list and retrieve for a v1 viewset, for ASGI deployments
+    (`API_ASYNC_READS`, see apis.urls).
+
+    GET and HEAD requests negotiated to a non-browsable renderer are served
+    with the async ORM through the viewset's row builders: `async for` over
+    the page, `aget`-style lookups and async fetching of the to-many
+    relations. The viewset still provides the authenticators, queryset,
+    filterset, permissions, fieldsets, pagination and ETags, so both paths
+    answer alike.
+    Every other request goes to the regular viewset view.
+
+    Authentication and model choice filters run on the sync ORM, so they
+    cost one thread hop each. The response cache
+    is not consulted.
+    """
+
+    viewset = None
+    detail = False
+    # The viewset view serving everything else
+    sync_view = None
+    # Every method goes through the async dispatch below
+    view_is_async = True
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        if initkwargs["detail"]:
+            actions = {
+                "get": "retrieve",
+                "put": "update",
+                "patch": "partial_update",
+                "delete": "destroy",
+            }
+        else:
+            actions = {"get": "list", "post": "create"}
+        initkwargs["sync_view"] = initkwargs["viewset"].as_view(actions)
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return await self.delegate(request, *args, **kwargs)
+
+        viewset = self.get_viewset(request, kwargs)
+        drf_request = viewset.request
+        try:
+            renderer, media_type = viewset.perform_content_negotiation(drf_request)
+            drf_request.accepted_renderer = renderer
+            drf_request.accepted_media_type = media_type
+        except exceptions.NotAcceptable:
+            return await self.delegate(request, *args, **kwargs)
+        if renderer.format == "api" or not viewset.fast_read_enabled():
+            return await self.delegate(request, *args, **kwargs)
+
+        try:
+            await sync_to_async(self.authenticate)(drf_request)
+            viewset.check_permissions(drf_request)
+            response = await self.read(viewset, drf_request)
+        except Exception as exc:
+            response = viewset.handle_exception(exc)
+        return viewset.finalize_response(drf_request, response)
+
+    async def delegate(self, request, *args, **kwargs):
+        return await sync_to_async(self.sync_view)(request, *args, **kwargs)
+
+    def get_viewset(self, request, kwargs):
+        viewset = self.viewset()
+        viewset.action = "retrieve" if self.detail else "list"
+        viewset.action_map = {"get": viewset.action}
+        viewset.args = ()
+        viewset.kwargs = kwargs
+        viewset.format_kwarg = None
+        viewset.headers = viewset.default_response_headers
+        viewset.request = Request(
+            request,
+            parsers=viewset.get_parsers(),
+            authenticators=viewset.get_authenticators(),
+            negotiator=viewset.get_content_negotiator(),
+            parser_context=viewset.get_parser_context(request),
+        )
+        return viewset
+
+    def authenticate(self, request):
+        """
+        Runs the viewset's authenticators, which may query the database and
+        so run in the request's sync thread.
+        """
+        request.user
+
+    async def read(self, viewset, request):
+        viewset._versions = await versioning.aget_versions(*viewset.etag_models)
+        etag = viewset.get_etag(request)
+        if etag in parse_etags(request.headers.get("If-None-Match", "")):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+        rows = viewset.get_rows(await self.filter_queryset(viewset, request))
+        builder = viewset.get_row_builder()
+        if self.detail:
+            response = Response(await self.retrieve(viewset, request, rows, builder))
+        else:
+            paginator = viewset.paginator
+            page = await paginator.apaginate_queryset(rows, request, view=viewset)
+            response = paginator.get_paginated_response(await builder.abuild_many(page))
+        response["ETag"] = etag
+        return response
+
+    async def retrieve(self, viewset, request, rows, builder):
+        lookup_url_kwarg = viewset.lookup_url_kwarg or viewset.lookup_field
+        lookup = {viewset.lookup_field: viewset.kwargs[lookup_url_kwarg]}
+        try:
+            row = await rows.filter(**lookup).afirst()
+        except (TypeError, ValueError):
+            row = None
+        if row is None:
+            raise Http404
+        viewset.check_object_permissions(request, row)
+        return (await builder.abuild_many([row]))[0]
+
+    async def filter_queryset(self, viewset, request):
+        """The DjangoFilterBackend filtering, validated without the ORM if possible."""
+        filterset = viewset.filterset_class(
+            request.query_params, queryset=viewset.get_queryset(), request=request
+        )
+        if needs_database(filterset):
+            valid = await sync_to_async(filterset.is_valid)()
+        else:
+            valid = filterset.is_valid()
+        if not valid:
+            raise translate_validation(filterset.errors)
+        return filterset.qs
+
+
+def needs_database(filterset):
+    """Whether validating the bound filterset runs a query."""
+    return any(
+        isinstance(filter, (ModelChoiceFilter, ModelMultipleChoiceFilter))
+        and name in filterset.data
+        for name, filter in filterset.filters.items()
+    )
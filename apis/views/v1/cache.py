@@ -0,0 +1,109 @@
+import hashlib
+from django.db.models import Model
+from django.http import HttpResponse
+from rest_framework import status
+from apis import response_cache
+from .conditional import ConditionalGetMixin
+
+
+class ResponseCacheMixin(ConditionalGetMixin):
+    """
+    Serves list and retrieve from the response cache when the
+    `API_RESPONSE_CACHE` setting names a cache alias, see apis.response_cache.
+
+    The key is made of the path, the query string normalized by the
+    viewset's filterset, the accepted media type and the versions of
+    `etag_models`. Responses carry `X-Cache: HIT` or `X-Cache: MISS`.
+    """
+
+    def get_fresh_response(self, handler, request, *args, **kwargs):
+        cache = response_cache.get_cache()
+        key = self.get_cache_key(request) if cache is not None else None
+        if key is None:
+            return handler(request, *args, **kwargs)
+
+        cached = cache.get(key)
+        response_cache.record(cache, hit=cached is not None)
+        if cached is not None:
+            content, content_type = cached
+            response = HttpResponse(content, content_type=content_type)
+            response["X-Cache"] = "HIT"
+            return response
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            # Rendered here rather than by finalize_response to store the bytes
+            response.accepted_renderer = request.accepted_renderer
+            response.accepted_media_type = request.accepted_media_type
+            response.renderer_context = self.get_renderer_context()
+            response.render()
+            cache.set(
+                key,
+                (response.content, response["Content-Type"]),
+                response_cache.get_timeout(),
+            )
+        response["X-Cache"] = "MISS"
+        return response
+
+    def get_cache_key(self, request):
+        """
+        Returns the cache key of the request, or None when the filters do not
+        validate and the request should go through uncached.
+        """
+        query = self.get_normalized_query(request)
+        if query is None:
+            return None
+        key = "\n".join(
+            [
+                request.path,
+                query,
+                request.accepted_media_type,
+                *(
+                    f"{name}={version}"
+                    for name, version in sorted(self.get_versions().items())
+                ),
+            ]
+        )
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return f"{response_cache.KEY_PREFIX}:{digest}"
+
+    def get_normalized_query(self, request):
+        """
+        Encodes the query string with the filter values as cleaned by the
+        filterset, so equivalent spellings (`?school=01`, `?school=1&name=`,
+        reordered parameters) share an entry. Other parameters, such as the
+        pagination ones, are kept verbatim.
+        """
+        params = request.query_params
+        filterset_class = getattr(self, "filterset_class", None)
+        filters, filter_names = {}, ()
+        if filterset_class is not None:
+            filterset = filterset_class(
+                params, queryset=self.get_queryset(), request=request
+            )
+            if not filterset.is_valid():
+                return None
+            filters = {
+                name: normalize(value)
+                for name, value in filterset.form.cleaned_data.items()
+                if value not in (None, "", [])
+            }
+            filter_names = filterset.filters
+        others = sorted(
+            (name, value)
+            for name in params
+            if name not in filter_names
+            for value in params.getlist(name)
+        )
+        return "&".join(
+            [f"{name}={value}" for name, value in sorted(filters.items())]
+            + [f"{name}={value}" for name, value in others]
+        )
+
+
+def normalize(value):
+    if isinstance(value, Model):
+        return str(value.pk)
+    if isinstance(value, (list, tuple)):
+        return ",".join(sorted(normalize(item) for item in value))
+    return str(value)
@@ -1,15 +1,23 @@
 from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework.decorators import action
+from rest_framework.generics import get_object_or_404
 from rest_framework.viewsets import ModelViewSet
-from ...models import Classroom
+from .cache import ResponseCacheMixin
+from .fast import FastReadMixin
+from .export import ExportMixin
+from ...models import Classroom, School, Teacher, Student
 from ...filters import ClassroomFilter
+from apis.serializers.rows import RowBuilder
+from apis.serializers.simple import SimpleStudentSerializer
 from apis.serializers.classroom import (
     ClassroomSerializer,
+    ClassroomListSerializer,
     CreateClassroomSerializer,
     UpdateClassroomSerializer,
 )
 
 
-class ClassroomViewSet(ModelViewSet):
+class ClassroomViewSet(ResponseCacheMixin, FastReadMixin, ExportMixin, ModelViewSet):
     http_method_names = ["get", "post", "patch", "delete", "head", "options"]
 
     queryset = (
@@ -20,10 +28,45 @@ class ClassroomViewSet(ModelViewSet):
     serializer_class = ClassroomSerializer
     filter_backends = [DjangoFilterBackend]
     filterset_class = ClassroomFilter
+    etag_models = (Classroom, School, Teacher, Student)
+    row_builder = RowBuilder(ClassroomSerializer)
+    list_row_builder = RowBuilder(ClassroomListSerializer)
+    # Up to thousands of rooms of 40-60 students, see the students action
+    collapsed_fields = ("teachers", "students")
+    student_row_builder = RowBuilder(SimpleStudentSerializer)
+    export_fields = {
+        "id": "id",
+        "grade": "grade",
+        "room": "room",
+        "school_id": "school_id",
+        "school_name": "school__name",
+        "students_count": "students_count",
+        "teachers_count": "teachers_count",
+    }
 
     def get_serializer_class(self):
         if self.request.method == "POST":
             return CreateClassroomSerializer
         elif self.request.method == "PATCH":
             return UpdateClassroomSerializer
+        elif self.action == "list":
+            return ClassroomListSerializer
         return ClassroomSerializer
+
+    @action(detail=True, methods=["get"])
+    def students(self, request, pk=None):
+        """The students of the classroom, paginated like the lists."""
+        return self.conditional(self.list_students, request, pk=pk)
+
+    def list_students(self, request, pk=None):
+        get_object_or_404(Classroom.objects.values_list("pk"), pk=pk)
+        students = Student.objects.filter(classroom=pk)
+        if self.fast_read_enabled():
+            ordering = [*Student._meta.ordering, "id"]
+            columns = self.student_row_builder.get_columns(ordering)
+            page = self.paginate_queryset(students.values_list(*columns, named=True))
+            data = self.student_row_builder.build_many(page)
+        else:
+            page = self.paginate_queryset(students)
+            data = SimpleStudentSerializer(page, many=True).data
+        return self.get_paginated_response(data)
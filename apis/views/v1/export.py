@@ -0,0 +1,74 @@
+import csv
+import json
+from django.http import StreamingHttpResponse
+from rest_framework.decorators import action
+from apis.renderers import CSVRenderer, NDJSONRenderer
+
+
+class Echo:
+    """File-like object whose `write` hands back the written line."""
+
+    def write(self, value):
+        return value
+
+
+class ExportMixin:
+    """
+    Adds `GET <resource>/export/?format=ndjson|csv`, streaming every row that
+    matches the filterset.
+
+    Rows are read as tuples with `.values_list().iterator()`, so neither model
+    instances nor serializers are built per row and memory stays flat however
+    many rows are exported. Rows are flushed every `export_chunk_size` rows,
+    before the query has been fully read.
+    """
+
+    # Output column -> ORM lookup, set by the viewsets
+    export_fields = {}
+    export_chunk_size = 2000
+
+    @action(
+        detail=False,
+        methods=["get"],
+        renderer_classes=[NDJSONRenderer, CSVRenderer],
+    )
+    def export(self, request):
+        model = self.get_queryset().model
+        rows = (
+            self.filter_queryset(model.objects.all())
+            .values_list(*self.export_fields.values())
+            .iterator(chunk_size=self.export_chunk_size)
+        )
+        renderer = request.accepted_renderer
+        if renderer.format == "csv":
+            lines = self.stream_csv(rows)
+        else:
+            lines = self.stream_ndjson(rows)
+        response = StreamingHttpResponse(
+            self.flush_in_chunks(lines), content_type=renderer.media_type
+        )
+        filename = f"{model._meta.verbose_name_plural}.{renderer.format}"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+    def stream_csv(self, rows):
+        writer = csv.writer(Echo())
+        yield writer.writerow(self.export_fields.keys())
+        for row in rows:
+            yield writer.writerow(row)
+
+    def stream_ndjson(self, rows):
+        columns = list(self.export_fields)
+        encode = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+        for row in rows:
+            yield encode(dict(zip(columns, row))) + "\n"
+
+    def flush_in_chunks(self, lines):
+        chunk = []
+        for line in lines:
+            chunk.append(line)
+            if len(chunk) >= self.export_chunk_size:
+                yield "".join(chunk)
+                chunk = []
+        if chunk:
+            yield "".join(chunk)
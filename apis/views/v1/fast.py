@@ -0,0 +1,133 @@
+from django.conf import settings
+from rest_framework.exceptions import ValidationError
+from rest_framework.generics import get_object_or_404
+from rest_framework.response import Response
+from apis.serializers.rows import parse_fieldset, prune
+
+
+class FastReadMixin:
+    """
+    Serves list and retrieve from `.values_list()` rows through `row_builder`,
+    an apis.serializers.rows.RowBuilder compiled from the read serializer,
+    instead of building model instances and a serializer per row.
+
+    Disabled, falling back to the serializer, by `API_FAST_READ = False`.
+
+    Both paths take sparse fieldsets, `?fields=id,school.name` keeping and
+    `?omit=students` removing fields. On the fast path only the columns and
+    relations of the remaining fields are selected, on the serializer path
+    the queryset is cut down with `select_related`, `prefetch_related` and
+    `.only()` to the same effect. The heavy `collapsed_fields` of list rows
+    are omitted the same way until requested with `?expand=`.
+    """
+
+    row_builder = None
+    # Builder of the list action when its rows differ from the detail ones
+    list_row_builder = None
+    # Fields left out of list rows unless named in `?expand=`
+    collapsed_fields = ()
+    fields_query_param = "fields"
+    omit_query_param = "omit"
+    expand_query_param = "expand"
+
+    def fast_read_enabled(self):
+        return self.get_base_row_builder() is not None and getattr(
+            settings, "API_FAST_READ", True
+        )
+
+    def get_base_row_builder(self):
+        if self.action == "list" and self.list_row_builder is not None:
+            return self.list_row_builder
+        return self.row_builder
+
+    def get_fieldsets(self):
+        """Returns the validated `(fields, omit)` trees of the request."""
+        if not hasattr(self, "_fieldsets"):
+            builder = self.get_base_row_builder()
+            fieldsets, errors = [], {}
+            for param in (self.fields_query_param, self.omit_query_param):
+                tree = parse_fieldset(self.request.query_params.get(param))
+                unknown = builder.unknown_fields(tree) if tree else []
+                if unknown:
+                    errors[param] = [f"Unknown field '{path}'." for path in unknown]
+                fieldsets.append(tree)
+            fields, omit = fieldsets
+            if self.action == "list" and self.collapsed_fields:
+                param = self.request.query_params.get(self.expand_query_param)
+                expand = parse_fieldset(param) or {}
+                unknown = [name for name in expand if name not in self.collapsed_fields]
+                if unknown:
+                    errors[self.expand_query_param] = [
+                        f"Cannot expand '{name}'." for name in unknown
+                    ]
+                collapsed = [
+                    name
+                    for name in self.collapsed_fields
+                    if name not in expand and (fields is None or name not in fields)
+                ]
+                if collapsed:
+                    omit = {**(omit or {}), **dict.fromkeys(collapsed)}
+            if errors:
+                raise ValidationError(errors)
+            self._fieldsets = (fields, omit)
+        return self._fieldsets
+
+    def is_sparse(self):
+        return (
+            self.get_base_row_builder() is not None
+            and self.action in ("list", "retrieve")
+            and self.get_fieldsets() != (None, None)
+        )
+
+    def get_row_builder(self):
+        return self.get_base_row_builder().project(*self.get_fieldsets())
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.fast_read_enabled() or not self.is_sparse():
+            return queryset
+        builder = self.get_row_builder()
+        ordering = [*queryset.model._meta.ordering, queryset.model._meta.pk.name]
+        queryset = queryset.select_related(None).prefetch_related(None)
+        if builder.joins:
+            queryset = queryset.select_related(*builder.joins)
+        if builder.relations:
+            queryset = queryset.prefetch_related(
+                *(relation.lookup for relation in builder.relations)
+            )
+        return queryset.only(*builder.get_columns(ordering), *builder.joins)
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        if self.is_sparse():
+            prune(serializer, *self.get_fieldsets())
+        return serializer
+
+    def get_rows(self, queryset=None):
+        """The filtered queryset as named rows holding the builder's columns."""
+        if queryset is None:
+            queryset = self.filter_queryset(self.get_queryset())
+        ordering = [*queryset.model._meta.ordering, queryset.model._meta.pk.name]
+        return queryset.prefetch_related(None).values_list(
+            *self.get_row_builder().get_columns(ordering), named=True
+        )
+
+    def list(self, request, *args, **kwargs):
+        if not self.fast_read_enabled():
+            return super().list(request, *args, **kwargs)
+        rows = self.get_rows()
+        page = self.paginate_queryset(rows)
+        builder = self.get_row_builder()
+        if page is not None:
+            return self.get_paginated_response(builder.build_many(page))
+        return Response(builder.build_many(rows))
+
+    def retrieve(self, request, *args, **kwargs):
+        if not self.fast_read_enabled():
+            return super().retrieve(request, *args, **kwargs)
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        row = get_object_or_404(
+            self.get_rows(), **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        )
+        self.check_object_permissions(request, row)
+        return Response(self.get_row_builder().build_many([row])[0])
@@ -0,0 +1,11 @@
+from rest_framework.mixins import RetrieveModelMixin
+from rest_framework.viewsets import GenericViewSet
+from ...models import Job
+from apis.serializers.job import JobSerializer
+
+
+class JobViewSet(RetrieveModelMixin, GenericViewSet):
+    """Status of the background jobs started by the API, see apis.jobs."""
+
+    queryset = Job.objects.all()
+    serializer_class = JobSerializer
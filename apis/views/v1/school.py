@@ -1,7 +1,16 @@
+from django.conf import settings
+from django.db import transaction
 from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework import status
+from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
-from ...models import School
+from apis import deletion, jobs
+from .cache import ResponseCacheMixin
+from .fast import FastReadMixin
+from ...models import School, Classroom, Teacher, Student
 from ...filters import SchoolFilter
+from apis.serializers.job import JobSerializer
+from apis.serializers.rows import RowBuilder
 from apis.serializers.school import (
     SchoolSerializer,
     CreateSchoolSerializer,
@@ -9,14 +18,15 @@ from apis.serializers.school import (
 )
 
 
-class SchoolViewSet(ModelViewSet):
+class SchoolViewSet(ResponseCacheMixin, FastReadMixin, ModelViewSet):
     http_method_names = ["get", "post", "patch", "delete", "head", "options"]
 
-    queryset = School.objects.prefetch_related(
-        "classrooms", "classrooms__students", "teachers"
-    ).all()
+    queryset = School.objects.all()
     filter_backends = [DjangoFilterBackend]
     filterset_class = SchoolFilter
+    # Counters are derived from the other tables
+    etag_models = (School, Classroom, Teacher, Student)
+    row_builder = RowBuilder(SchoolSerializer)
 
     def get_serializer_class(self):
         if self.request.method == "POST":
@@ -24,3 +34,30 @@ class SchoolViewSet(ModelViewSet):
         elif self.request.method == "PATCH":
             return UpdateSchoolSerializer
         return SchoolSerializer
+
+    @transaction.non_atomic_requests
+    def destroy(self, request, *args, **kwargs):
+        """
+        Deletes the school and everything under it with apis.deletion.
+        Schools with more than `API_SCHOOL_DELETE_JOB_THRESHOLD` classrooms,
+        teachers and students are deleted by a background job instead: the
+        response is 202 with the job, whose URL is the Location header.
+
+        Kept out of the request transaction of WriteRetryMiddleware, so that
+        each chunk commits and releases the write lock.
+        """
+        school = self.get_object()
+        rows = school.classrooms_count + school.teachers_count + school.students_count
+        if rows <= settings.API_SCHOOL_DELETE_JOB_THRESHOLD:
+            deletion.delete_school(school.pk)
+            return Response(status=status.HTTP_204_NO_CONTENT)
+
+        job = jobs.find_pending("delete_school", school_id=school.pk)
+        if job is None:
+            job = jobs.enqueue(
+                "delete_school", {"school_id": school.pk}, total=rows + 1
+            )
+        data = JobSerializer(job, context=self.get_serializer_context()).data
+        return Response(
+            data, status=status.HTTP_202_ACCEPTED, headers={"Location": data["url"]}
+        )
@@ -1,23 +1,55 @@
+from django.db import transaction
 from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
-from ...models import Student
+from .cache import ResponseCacheMixin
+from .fast import FastReadMixin
+from .export import ExportMixin
+from ...models import Student, Classroom, School
 from ...filters import StudentFilter
+from apis.serializers.rows import RowBuilder
 from apis.serializers.student import (
     StudentSerializer,
     CreateStudentSerializer,
     UpdateStudentSerializer,
+    BulkCreateStudentSerializer,
 )
 
 
-class StudentViewSet(ModelViewSet):
+class StudentViewSet(ResponseCacheMixin, FastReadMixin, ExportMixin, ModelViewSet):
     http_method_names = ["get", "post", "patch", "delete", "head", "options"]
     queryset = Student.objects.select_related("classroom", "classroom__school").all()
     filter_backends = [DjangoFilterBackend]
     filterset_class = StudentFilter
+    etag_models = (Student, Classroom, School)
+    row_builder = RowBuilder(StudentSerializer)
+    export_fields = {
+        "id": "id",
+        "first_name": "first_name",
+        "last_name": "last_name",
+        "gender": "gender",
+        "classroom_id": "classroom_id",
+        "classroom_grade": "classroom__grade",
+        "classroom_room": "classroom__room",
+        "school_id": "classroom__school_id",
+        "school_name": "classroom__school__name",
+    }
 
     def get_serializer_class(self):
+        if self.action == "bulk_create":
+            return BulkCreateStudentSerializer
         if self.request.method == "POST":
             return CreateStudentSerializer
         elif self.request.method == "PATCH":
             return UpdateStudentSerializer
         return StudentSerializer
+
+    @action(detail=False, methods=["post"], url_path="bulk")
+    @transaction.non_atomic_requests
+    def bulk_create(self, request):
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -1,15 +1,22 @@
 from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework.decorators import action
+from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
-from ...models import Teacher
+from .cache import ResponseCacheMixin
+from .fast import FastReadMixin
+from .export import ExportMixin
+from ...models import Teacher, School, Classroom
 from ...filters import TeacherFilter
+from apis.serializers.rows import RowBuilder
 from apis.serializers.teacher import (
     TeacherSerializer,
     CreateTeacherSerializer,
     UpdateTeacherSerializer,
+    AssignClassroomsSerializer,
 )
 
 
-class TeacherViewSet(ModelViewSet):
+class TeacherViewSet(ResponseCacheMixin, FastReadMixin, ExportMixin, ModelViewSet):
     http_method_names = ["get", "post", "patch", "delete", "head", "options"]
 
     queryset = (
@@ -17,8 +24,20 @@ class TeacherViewSet(ModelViewSet):
     )
     filter_backends = [DjangoFilterBackend]
     filterset_class = TeacherFilter
+    etag_models = (Teacher, School, Classroom)
+    row_builder = RowBuilder(TeacherSerializer)
+    export_fields = {
+        "id": "id",
+        "first_name": "first_name",
+        "last_name": "last_name",
+        "gender": "gender",
+        "school_id": "school_id",
+        "school_name": "school__name",
+    }
 
     def get_serializer_class(self):
+        if self.action == "assign_classrooms":
+            return AssignClassroomsSerializer
         if self.request.method == "POST":
             return CreateTeacherSerializer
         elif self.request.method == "PATCH":
@@ -28,3 +47,10 @@ class TeacherViewSet(ModelViewSet):
     def get_serializer_context(self):
         if self.request.method == "PATCH":
             return {"teacher_id": self.kwargs["pk"]}
+
+    @action(detail=False, methods=["post"], url_path="assign-classrooms")
+    def assign_classrooms(self, request):
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data)
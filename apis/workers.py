@@ -0,0 +1,158 @@
+"""
+Pool of worker processes running the background jobs of apis.jobs, see the
+`run_workers` command.
+
+The supervisor claims the jobs, leased under its own name, and forks one
+child process per job, at most `processes` at a time. It renews the leases
+of the running jobs, terminates the children running longer than
+`API_JOB_TIMEOUT` and records their attempt as failed, as it does for
+children that die. Children record the outcome of their job themselves.
+
+A first SIGINT or SIGTERM stops claiming jobs and waits for the running
+ones, a second one terminates them, their attempts failing to be retried.
+Forking makes the pool Unix-only.
+"""
+
+import multiprocessing
+import signal
+import time
+
+from django.conf import settings
+from django.db import connections
+from apis import jobs
+from apis.models import Job
+
+# Seconds a terminated child has to exit before it is killed
+TERMINATE_GRACE = 5
+
+
+class Supervisor:
+    def __init__(self, processes, poll_interval=1.0, burst=False, log=print):
+        self.processes = processes
+        self.poll_interval = poll_interval
+        # Exit once no job is running nor ready
+        self.burst = burst
+        self.log = log
+        self.worker = jobs.worker_name()
+        # {job id: (job, process, started at)}
+        self.running = {}
+        self.signals = 0
+        self.renewed_at = time.monotonic()
+        self.context = multiprocessing.get_context("fork")
+
+    def run(self):
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, self.on_signal)
+        self.log(f"Worker {self.worker} running {self.processes} process(es).")
+        try:
+            while True:
+                self.reap()
+                self.enforce_timeouts()
+                self.renew()
+                if self.signals:
+                    if self.signals > 1:
+                        self.terminate_all()
+                    if not self.running:
+                        break
+                else:
+                    claimed = self.claim()
+                    if self.burst and not claimed and not self.running:
+                        break
+                time.sleep(self.poll_interval)
+        finally:
+            self.terminate_all()
+            connections.close_all()
+        self.log("Worker stopped.")
+
+    def on_signal(self, signum, frame):
+        self.signals += 1
+        if self.signals == 1:
+            self.log("Stopping once the running jobs finish.")
+        else:
+            self.log("Terminating the running jobs.")
+
+    def claim(self):
+        """Starts ready jobs in the free processes, returns how many."""
+        claimed = 0
+        while len(self.running) < self.processes:
+            job = jobs.claim(self.worker)
+            if job is None:
+                break
+            self.start(job)
+            claimed += 1
+        return claimed
+
+    def start(self, job):
+        # Children must not share the connections of the supervisor
+        connections.close_all()
+        process = self.context.Process(
+            target=work, args=(job.pk, self.worker), name=f"job-{job.pk}"
+        )
+        process.start()
+        self.running[job.pk] = (job, process, time.monotonic())
+        self.log(
+            f"Job {job.pk} ({job.kind}) started in process {process.pid}, "
+            f"attempt {job.attempts}/{job.max_attempts}."
+        )
+
+    def reap(self):
+        """Forgets the children that exited, failing the jobs they left running."""
+        for job_id, (job, process, started_at) in list(self.running.items()):
+            if process.is_alive():
+                continue
+            process.join()
+            del self.running[job_id]
+            seconds = time.monotonic() - started_at
+            if process.exitcode != 0:
+                jobs.fail(
+                    job, self.worker, f"Worker process exited with {process.exitcode}."
+                )
+            job = Job.objects.get(pk=job_id)
+            self.log(f"Job {job_id} {job.status} after {seconds:.1f}s.")
+
+    def enforce_timeouts(self):
+        now = time.monotonic()
+        for job_id, (job, process, started_at) in list(self.running.items()):
+            if now - started_at > settings.API_JOB_TIMEOUT:
+                self.stop(job, process)
+                jobs.fail(
+                    job,
+                    self.worker,
+                    f"Timed out after {settings.API_JOB_TIMEOUT} second(s).",
+                )
+
+    def terminate_all(self):
+        for job, process, _ in list(self.running.values()):
+            self.stop(job, process)
+            jobs.fail(job, self.worker, "Worker stopped.")
+
+    def stop(self, job, process):
+        process.terminate()
+        process.join(TERMINATE_GRACE)
+        if process.is_alive():
+            process.kill()
+            process.join()
+        del self.running[job.pk]
+        self.log(f"Job {job.pk} stopped.")
+
+    def renew(self):
+        if not self.running:
+            return
+        if time.monotonic() - self.renewed_at < settings.API_JOB_LEASE_SECONDS / 3:
+            return
+        jobs.renew(self.worker, list(self.running))
+        self.renewed_at = time.monotonic()
+
+
+def work(job_id, worker):
+    """Runs a claimed job, in a child process."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    try:
+        jobs.execute(Job.objects.get(pk=job_id), worker)
+    finally:
+        connections.close_all()
+
+
+def run_workers(processes, poll_interval=1.0, burst=False, log=print):
+    Supervisor(processes, poll_interval, burst, log).run()
@@ -44,6 +44,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "apis.middleware.MetricsMiddleware",
     "debug_toolbar.middleware.DebugToolbarMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -52,6 +53,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "apis.middleware.ReplicaMiddleware",
 ]
 
 REST_FRAMEWORK = {
@@ -63,6 +65,7 @@ REST_FRAMEWORK = {
         "rest_framework.renderers.JSONRenderer",
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
+        "apis.authentication.TokenAuthentication",
         "rest_framework.authentication.BasicAuthentication",
         "rest_framework.authentication.SessionAuthentication",
     ],
@@ -70,6 +73,7 @@ REST_FRAMEWORK = {
         "rest_framework.permissions.IsAuthenticated",
     ],
     "DEFAULT_FILTER_BACKENDS": ["django_filters.rest_framework.DjangoFilterBackend"],
+    "DEFAULT_PAGINATION_CLASS": "apis.pagination.KeysetPagination",
 }
 
 ROOT_URLCONF = "app.urls"
@@ -100,9 +104,120 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
-    }
+    },
+    # Read copy of default refreshed by `manage.py sync_replica`. No
+    # CONN_MAX_AGE, so that every request opens the latest copy.
+    "replica": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / "db.replica.sqlite3",
+        "TEST": {"MIRROR": "default"},
+    },
 }
 
+DATABASE_ROUTERS = ["apis.db_routers.ReplicaRouter"]
+
+# Send the reads of v1 GET requests to the replica, see apis/db_routers.py.
+# Requests following a write read from default for API_REPLICA_STICKY_SECONDS,
+# which should be longer than the sync_replica interval.
+
+API_READ_REPLICA = False
+
+API_REPLICA_COOKIE = "read_primary"
+
+API_REPLICA_STICKY_SECONDS = 60
+
+
+# Response cache
+# Name a cache alias from CACHES to cache rendered list and detail responses
+# of the v1 API, see apis/response_cache.py. The local-memory and file-based
+# backends are both supported.
+
+API_RESPONSE_CACHE = None
+
+API_RESPONSE_CACHE_TIMEOUT = 300
+
+# Build list and detail responses of the v1 API from `.values_list()` rows
+# with the row builders of apis/serializers/rows.py instead of serializers
+
+API_FAST_READ = True
+
+# Serve list and detail GETs of the v1 API with native async views, see
+# apis/views/v1/aread.py. Only worth it when served by an ASGI server.
+
+API_ASYNC_READS = False
+
+# Retries of write requests on a locked database, with a backoff doubling
+# from API_WRITE_BACKOFF seconds, see WriteRetryMiddleware in
+# apis/middleware.py. The middleware is installed by app/settings_production.py.
+
+API_WRITE_RETRIES = 3
+
+API_WRITE_BACKOFF = 0.05
+
+API_WRITE_LOCK_TIMEOUT = 10
+
+# Per-route latency, SQL and response size metrics, served at /metrics to
+# staff users in the Prometheus text format, see apis/metrics.py. Each worker
+# process adds its counts to the API_METRICS_FILE SQLite file every
+# API_METRICS_FLUSH_SECONDS. None disables them.
+
+API_METRICS_FILE = None
+
+API_METRICS_FLUSH_SECONDS = 5
+
+# Bearer token that also grants access to /metrics, for scrapers. None only
+# lets staff users in.
+
+API_METRICS_TOKEN = None
+
+# Schools with more classrooms, teachers and students than this are deleted by
+# a background job, the DELETE answering 202 with the job, see apis/deletion.py
+# and apis/jobs.py.
+
+API_SCHOOL_DELETE_JOB_THRESHOLD = 10_000
+
+# Background jobs, see apis/jobs.py. With API_JOB_THREADS they run in a thread
+# of the process enqueuing them, otherwise `manage.py run_workers` runs them in
+# a pool of API_JOB_PROCESSES processes. A worker leases a job for
+# API_JOB_LEASE_SECONDS and renews the lease while it runs, so the jobs of a
+# dead worker are taken over once their lease expires. Workers stop attempts
+# running longer than API_JOB_TIMEOUT seconds. A job is attempted up to
+# API_JOB_MAX_ATTEMPTS times, retries waiting API_JOB_RETRY_BACKOFF seconds,
+# doubled with each attempt.
+
+API_JOB_THREADS = True
+
+API_JOB_PROCESSES = 2
+
+API_JOB_LEASE_SECONDS = 60
+
+API_JOB_TIMEOUT = 3600
+
+API_JOB_MAX_ATTEMPTS = 3
+
+API_JOB_RETRY_BACKOFF = 30
+
+# Verified API tokens are cached in each process for API_TOKEN_CACHE_SECONDS,
+# at most API_TOKEN_CACHE_SIZE of them, see apis/tokens.py. A token revoked
+# by another process keeps working here until its entry expires, unless
+# API_TOKEN_REVOCATION_CACHE names a cache from CACHES shared by the
+# processes, through which revocations reach all of them.
+
+API_TOKEN_CACHE_SECONDS = 60
+
+API_TOKEN_CACHE_SIZE = 10_000
+
+API_TOKEN_REVOCATION_CACHE = None
+
+# Cache alias from CACHES keeping the users of sessions for
+# API_USER_CACHE_SECONDS, with apis.backends.auth.CachedModelBackend in
+# AUTHENTICATION_BACKENDS. The cache must be shared by the server processes,
+# as saving a user only clears the entry there. None disables it.
+
+API_USER_CACHE = None
+
+API_USER_CACHE_SECONDS = 300
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
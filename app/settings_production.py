@@ -0,0 +1,79 @@
+"""
+Production settings, serving many concurrent writers from SQLite.
+
+Use with `DJANGO_SETTINGS_MODULE=app.settings_production`.
+"""
+
+import os
+
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR, DATABASES, MIDDLEWARE, SECRET_KEY
+
+SECRET_KEY = os.environ.get("DJANGO_SECRET_KEY", SECRET_KEY)
+
+DEBUG = False
+
+ALLOWED_HOSTS = os.environ.get("DJANGO_ALLOWED_HOSTS", "localhost").split(",")
+
+DATABASES = {
+    **DATABASES,
+    "default": {
+        # Takes the write lock at BEGIN, see apis/backends/sqlite3/base.py
+        "ENGINE": "apis.backends.sqlite3",
+        "NAME": os.environ.get("SQLITE_PATH", BASE_DIR / "db.sqlite3"),
+        # Keep connections, and their page cache, across requests
+        "CONN_MAX_AGE": 600,
+        "CONN_HEALTH_CHECKS": True,
+        # Applied to every new connection
+        "PRAGMAS": {
+            # Readers no longer block the writer, nor the writer the readers
+            "journal_mode": "WAL",
+            # Durable at checkpoints, enough with WAL
+            "synchronous": "NORMAL",
+            # Milliseconds a writer waits for the lock before failing
+            "busy_timeout": 5000,
+            # 64 MB of page cache per connection
+            "cache_size": -64000,
+            "temp_store": "MEMORY",
+            "mmap_size": 268435456,
+        },
+    },
+}
+
+MIDDLEWARE = [*MIDDLEWARE, "apis.middleware.WriteRetryMiddleware"]
+
+# Sessions and their users are read from a file cache shared by the server
+# processes, so authenticated requests no longer query django_session and
+# auth_user. Session writes go to both the cache and the database.
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "sessions": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.environ.get(
+            "SESSION_CACHE_DIR", BASE_DIR / "cache" / "sessions"
+        ),
+        "OPTIONS": {"MAX_ENTRIES": 100_000},
+    },
+}
+
+SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
+
+SESSION_CACHE_ALIAS = "sessions"
+
+AUTHENTICATION_BACKENDS = [
+    "apis.backends.auth.CachedModelBackend",
+    # Sessions started before the switch
+    "django.contrib.auth.backends.ModelBackend",
+]
+
+API_USER_CACHE = "sessions"
+
+# Revoking a token, e.g. with `manage.py revoke_token`, reaches the servers
+API_TOKEN_REVOCATION_CACHE = "sessions"
+
+API_METRICS_FILE = os.environ.get("API_METRICS_FILE", BASE_DIR / "metrics.sqlite3")
+
+API_METRICS_TOKEN = os.environ.get("API_METRICS_TOKEN")
+
+# Jobs are run by `manage.py run_workers`
+API_JOB_THREADS = False
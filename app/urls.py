@@ -17,10 +17,12 @@ Including another URLconf
 
 from django.contrib import admin
 from django.urls import path, include
+from apis.views.metrics import metrics_view
 import debug_toolbar
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", include("apis.urls")),
+    path("metrics", metrics_view),
     path("_debug_/", include(debug_toolbar.urls)),
 ]